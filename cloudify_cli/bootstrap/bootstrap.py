@@ -16,7 +16,6 @@
 
 
 import os
-import time
 import copy
 import shutil
 import base64
@@ -31,15 +30,14 @@ from StringIO import StringIO
 
 import requests
 from retrying import retry
-import fabric.api as fabric
 
-from cloudify.workflows import local
 from cloudify.exceptions import RecoverableError
 
 from .. import env
 from .. import constants
 from ..config import config
 from ..logger import get_logger
+from ..retry import RetryPolicy
 from ..local import initialize_blueprint
 from ..exceptions import CloudifyBootstrapError
 
@@ -52,6 +50,12 @@ SSH_KEY_PATH_RUNTIME_PROPERTY = 'ssh_key_path'
 MANAGER_DEPLOYMENT_ARCHIVE_IGNORED_FILES = ['.git']
 MAX_MANAGER_DEPLOYMENT_SIZE = 50 * (10 ** 6)  # 50MB
 
+# How long to wait for a snapshot to be restored by `recover`, and how
+# often to check, in seconds
+SNAPSHOT_RESTORE_TIMEOUT = 60 * 60
+SNAPSHOT_RESTORE_POLL_INTERVAL = 5
+SNAPSHOT_RESTORE_MAX_POLL_INTERVAL = 60
+
 _ENV_NAME = 'manager'
 
 
@@ -73,6 +77,8 @@ def delete_workdir():
 
 
 def load_env(name=_ENV_NAME):
+    from cloudify.workflows import local
+
     storage = local.FileStorage(storage_dir=_workdir())
     return local.load_env(name=name, storage=storage)
 
@@ -238,6 +244,8 @@ def bootstrap(blueprint_path,
               task_thread_pool_size=1,
               install_plugins=False,
               skip_sanity=False):
+    from cloudify.workflows import local
+
     storage = local.FileStorage(storage_dir=_workdir())
     try:
         working_env = initialize_blueprint(
@@ -425,22 +433,18 @@ def recover(snapshot_path,
     execution = client.snapshots.restore(snapshot_id, True)
 
     # waiting for snapshot restoration
-    attempts = 5
-    start_time = time.time()
-    wait_time = 60 * 1
-    while client.executions.get(
-            execution.id).status not in execution.END_STATES:
-        if time.time() > start_time + wait_time:
-            if attempts == 0:
-                raise RuntimeError('Failed to restore snapshot '
-                                   'after {0} attempts'.format(attempts))
-            attempts -= 1
-            start_time = time.time()
-            wait_time *= 2
-            logger.info('Waiting {0} seconds for '
-                        'snapshot restoration'.format(wait_time))
-        time.sleep(5)
-    execution = client.executions.get(execution.id)
+    logger.info('Waiting up to {0} seconds for snapshot restoration'
+                .format(SNAPSHOT_RESTORE_TIMEOUT))
+    policy = RetryPolicy(base_delay=SNAPSHOT_RESTORE_POLL_INTERVAL,
+                         max_delay=SNAPSHOT_RESTORE_MAX_POLL_INTERVAL,
+                         deadline=SNAPSHOT_RESTORE_TIMEOUT)
+    for _ in policy.attempts('snapshot restore status'):
+        execution = client.executions.get(execution.id)
+        if execution.status in execution.END_STATES:
+            break
+    else:
+        raise RuntimeError('Failed to restore snapshot: timed out after '
+                           '{0} seconds'.format(SNAPSHOT_RESTORE_TIMEOUT))
     if execution.status == execution.FAILED:
         raise RuntimeError('Failed to restore '
                            'snapshot {0}'.format(snapshot_id))
@@ -475,6 +479,8 @@ def _dump_manager_deployment(manager_node_instance):
 
 def _copy_agent_key(agent_local_key_path, agent_remote_key_path,
                     fabric_env):
+    import fabric.api as fabric
+
     if not agent_local_key_path:
         return None
     agent_local_key_path = os.path.expanduser(agent_local_key_path)
@@ -530,6 +536,8 @@ def upload_dsl_resources(dsl_resources, temp_dir, fabric_env, retries,
     :param timeout: timeout for uploading a dsl resource.
     :return:
     """
+    import fabric.api as fabric
+
     logger = get_logger()
     remote_plugins_folder = '/opt/manager/resources/'
 
@@ -19,6 +19,7 @@ import os
 import sys
 import difflib
 import StringIO
+import importlib
 import traceback
 from functools import wraps
 from base64 import standard_b64encode
@@ -28,8 +29,10 @@ from cloudify_rest_client.exceptions import NotModifiedError
 from cloudify_rest_client.exceptions import CloudifyClientError
 from cloudify_rest_client.exceptions import MaintenanceModeActiveError
 from cloudify_rest_client.exceptions import MaintenanceModeActivatingError
+from cloudify_rest_client.executions import Execution
 
 from .. import env
+from .. import timings
 from .. import constants
 from ..cli import helptexts
 from ..inputs import inputs_to_dict
@@ -44,6 +47,11 @@ CLICK_CONTEXT_SETTINGS = dict(
     help_option_names=['-h', '--help'],
     token_normalize_func=lambda param: param.lower())
 
+EXECUTION_STATUSES = [Execution.PENDING,
+                      Execution.STARTED,
+                      Execution.CANCELLING,
+                      Execution.FORCE_CANCELLING] + Execution.END_STATES
+
 
 class MutuallyExclusiveOption(click.Option):
     """Makes options mutually exclusive. The option must pass a `cls` argument
@@ -96,13 +104,20 @@ def _format_version_data(version_data,
     return output.getvalue()
 
 
-def show_version(ctx, param, value):
-    if not value or ctx.resilient_parsing:
+def show_version(ctx, param, refresh):
+    """Display the version, if `--version` was passed.
+
+    This is the callback of `--refresh` rather than of `--version`, as the
+    eager `--version` option is processed first, and the version can only
+    be shown once we know whether the cached manager version should be
+    refreshed.
+    """
+    if not ctx.params.get('version') or ctx.resilient_parsing:
         return
 
     cli_version_data = env.get_version_data()
-    rest_version_data = env.get_manager_version_data() \
-        if env.is_manager_active() else None
+    rest_version_data = env.get_manager_version_data(refresh=refresh) \
+        if env.profile and env.profile.manager_ip else None
 
     cli_version = _format_version_data(
         cli_version_data,
@@ -118,9 +133,25 @@ def show_version(ctx, param, value):
             suffix=' [ip={ip}]\n'.format(**rest_version_data))
 
     get_logger().info('{0}{1}'.format(cli_version, rest_version))
+    # Exiting while the options are processed skips the context's close
+    # callbacks (e.g. reporting the timings), so they're called here
+    ctx.close()
     ctx.exit()
 
 
+def print_timings(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    # The timings are reported once the command is done
+    ctx.call_on_close(timings.print_summary)
+
+
+def write_timings_trace(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    ctx.call_on_close(lambda: timings.write_trace(value))
+
+
 def inputs_callback(ctx, param, value):
     """Allow to pass any inputs we provide to a command as
     processed inputs instead of having to call `inputs_to_dict`
@@ -136,6 +167,38 @@ def inputs_callback(ctx, param, value):
     return inputs_to_dict(value)
 
 
+def filters_callback(ctx, param, value):
+    """Return the `key=value` filters passed to a list command as a dict"""
+    if not value or ctx.resilient_parsing:
+        return {}
+
+    filters = {}
+    for filter_string in value:
+        if isinstance(filter_string, str):
+            try:
+                # the values are compared with the resources' (unicode) ones
+                filter_string = filter_string.decode('utf-8')
+            except UnicodeDecodeError:
+                raise click.BadParameter(
+                    '`{0}` is not valid UTF-8'.format(filter_string),
+                    ctx=ctx, param=param)
+        key, separator, filter_value = filter_string.partition('=')
+        if not key or not separator:
+            raise click.BadParameter(
+                '`{0}` is not of the form `key=value`'.format(filter_string),
+                ctx=ctx, param=param)
+        filters[key.strip()] = filter_value.strip()
+    return filters
+
+
+def positive_callback(ctx, param, value):
+    """Validate that a number passed is positive"""
+    if value is not None and value <= 0:
+        raise click.BadParameter('must be positive, not {0}'.format(value),
+                                 ctx=ctx, param=param)
+    return value
+
+
 def set_verbosity_level(ctx, param, value):
     if not value or ctx.resilient_parsing:
         return
@@ -294,7 +357,7 @@ class AliasedGroup(click.Group):
         if not matches:
             return None
         elif len(matches) == 1:
-            return click.Group.get_command(self, ctx, matches[0])
+            return self.get_command(ctx, matches[0])
         ctx.fail('Too many matches: {0}'.format(', '.join(sorted(matches))))
 
     def resolve_command(self, ctx, args):
@@ -318,7 +381,52 @@ class AliasedGroup(click.Group):
             raise click.exceptions.UsageError(error_msg, error.ctx)
 
 
-def group(name):
+class LazyAliasedGroup(AliasedGroup):
+    """An AliasedGroup whose commands are only imported when used.
+
+    Commands are registered by name along with an import path of the form
+    `package.module:attribute`. The module is imported the first time the
+    command is resolved (e.g. when it is invoked, when the help is printed
+    or when it is completed), so that invoking a single command doesn't
+    require importing the modules of all other commands.
+    """
+    def __init__(self, *args, **kwargs):
+        self.lazy_commands = {}
+        super(LazyAliasedGroup, self).__init__(*args, **kwargs)
+
+    def add_lazy_command(self, name, import_path, callback=None):
+        """Register a command to be imported from `import_path` on demand.
+
+        :param name: The name of the command.
+        :param import_path: `package.module:attribute` path of the command.
+        :param callback: If passed, it will be called with the command
+                         once it's loaded, before it is returned.
+        """
+        # Drop a previously loaded command of the same name, so that
+        # re-registering (e.g. when switching profiles) takes effect
+        self.commands.pop(name, None)
+        self.lazy_commands[name] = (import_path, callback)
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self._load_command(cmd_name)
+        return super(LazyAliasedGroup, self).get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name):
+        import_path, callback = self.lazy_commands[cmd_name]
+        module_name, attribute = import_path.split(':')
+        with timings.span(timings.IMPORTS, module_name):
+            module = importlib.import_module(module_name)
+        command = getattr(module, attribute)
+        if callback:
+            callback(command)
+        self.add_command(command, cmd_name)
+
+
+def group(name, cls=AliasedGroup):
     """Allow to create a group with a default click context
     and a cls for click's `didyoueamn` without having to repeat
     it for every group.
@@ -326,7 +434,7 @@ def group(name):
     return click.group(
         name=name,
         context_settings=CLICK_CONTEXT_SETTINGS,
-        cls=AliasedGroup)
+        cls=cls)
 
 
 def command(*args, **kwargs):
@@ -362,11 +470,36 @@ class Options(object):
         self.version = click.option(
             '--version',
             is_flag=True,
-            callback=show_version,
-            expose_value=False,
             is_eager=True,
             help=helptexts.VERSION)
 
+        self.timings = click.option(
+            '--timings',
+            # processed before `--refresh`, which may exit (see
+            # `show_version`)
+            is_eager=True,
+            is_flag=True,
+            envvar=constants.CLOUDIFY_TIMINGS_ENV,
+            callback=print_timings,
+            expose_value=False,
+            help=helptexts.TIMINGS)
+
+        self.timings_trace = click.option(
+            '--timings-trace',
+            is_eager=True,
+            type=click.Path(dir_okay=False, writable=True),
+            envvar=constants.CLOUDIFY_TIMINGS_TRACE_ENV,
+            callback=write_timings_trace,
+            expose_value=False,
+            help=helptexts.TIMINGS_TRACE)
+
+        self.refresh_version = click.option(
+            '--refresh',
+            is_flag=True,
+            callback=show_version,
+            expose_value=False,
+            help=helptexts.REFRESH_VERSION)
+
         self.inputs = click.option(
             '-i',
             '--inputs',
@@ -642,11 +775,60 @@ class Options(object):
             default=False,
             help=helptexts.DESCENDING)
 
+        self.page_size = click.option(
+            '--page-size',
+            type=click.IntRange(min=1),
+            default=constants.DEFAULT_PAGE_SIZE,
+            help=helptexts.PAGE_SIZE)
+
+        self.filters = click.option(
+            '--filter',
+            'filters',
+            multiple=True,
+            callback=filters_callback,
+            help=helptexts.FILTERS)
+
+        self.deployment_id_pattern = click.option(
+            '-d',
+            '--deployment-id',
+            'deployment_id_pattern',
+            help=helptexts.DEPLOYMENT_ID_PATTERN)
+
+        self.watched_workflow_id = click.option(
+            '-w',
+            '--workflow-id',
+            help=helptexts.WATCHED_WORKFLOW_ID)
+
+        self.execution_statuses = click.option(
+            '--status',
+            'statuses',
+            multiple=True,
+            type=click.Choice(EXECUTION_STATUSES),
+            help=helptexts.EXECUTION_STATUSES)
+
+        self.prefetch = click.option(
+            '--prefetch/--no-prefetch',
+            default=True,
+            help=helptexts.PREFETCH)
+
         self.install_script = click.option(
             '-s',
             '--install-script',
             help=helptexts.INSTALL_SCRIPT_LOCATION)
 
+        self.agents_concurrency = click.option(
+            '--concurrency',
+            type=click.IntRange(min=1),
+            default=constants.AGENTS_INSTALL_CONCURRENCY,
+            help=helptexts.AGENTS_CONCURRENCY)
+
+        self.max_request_rate = click.option(
+            '--max-request-rate',
+            type=float,
+            callback=positive_callback,
+            default=constants.AGENTS_INSTALL_MAX_REQUEST_RATE,
+            help=helptexts.MAX_REQUEST_RATE)
+
         self.security_role = click.option(
             '-r',
             '--security-role',
@@ -737,6 +919,13 @@ class Options(object):
             mutually_exclusive=['all_tenants']
         )
 
+    @staticmethod
+    def foreground(help):
+        return click.option(
+            '--foreground',
+            is_flag=True,
+            help=help)
+
     @staticmethod
     def force(help):
         return click.option(
@@ -0,0 +1,174 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+"""A cache of the IDs of the manager's resources, for shell completion.
+
+Completion runs on every TAB press, so it can't wait for the manager to
+list all of its resources. Instead, the IDs are kept in a file per profile,
+tenant and resource type, under the profile's directory. Stale IDs are
+returned immediately, and refreshed in the background.
+
+Commands which create or delete resources invalidate the relevant cache.
+"""
+
+import os
+import time
+import glob
+import json
+
+from .. import env
+from .. import constants
+
+COMPLETION_CACHE_DIR_NAME = 'completion-cache'
+
+# How long cached IDs are considered fresh, in seconds
+CACHE_TTL = 300
+# How long a background refresh may take before another one is started
+REFRESH_TIMEOUT = 60
+
+
+def get_ids(cache_name, fetch, prefix=''):
+    """Return the cached IDs which start with `prefix`.
+
+    :param cache_name: The name of the cache (e.g. `deployments`).
+    :param fetch: A function returning the current IDs. It's only called
+                  if there's nothing cached yet (in which case completion
+                  has to wait for it), or in the background, if the cached
+                  IDs are stale.
+    """
+    if _get_profile_cache_dir() is None:
+        # Not using a manager, so there's nothing to cache
+        return [id_ for id_ in fetch() if id_.startswith(prefix)]
+
+    path = get_cache_path(cache_name)
+    cached = _read(path)
+    if cached is None:
+        ids = _fetch_and_write(path, fetch)
+    else:
+        ids = cached['ids']
+        if time.time() - cached['timestamp'] > CACHE_TTL:
+            _refresh_in_background(path, fetch)
+    return [id_ for id_ in ids if id_.startswith(prefix)]
+
+
+def invalidate(*cache_names):
+    """Remove the caches named `cache_names`, of all tenants.
+
+    This is called by the commands which create or delete resources, so
+    that completion doesn't offer deleted resources, or miss new ones.
+    """
+    cache_dir = _get_profile_cache_dir()
+    if cache_dir is None:
+        return
+    for cache_name in cache_names:
+        pattern = os.path.join(cache_dir, '*', _get_file_name(cache_name))
+        for path in glob.glob(pattern):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def workflows_cache_name(deployment_id):
+    return 'workflows-{0}'.format(deployment_id)
+
+
+def get_cache_path(cache_name):
+    tenant_name = env.get_tenant_name() or constants.DEFAULT_TENANT_NAME
+    return os.path.join(
+        _get_profile_cache_dir(), tenant_name, _get_file_name(cache_name))
+
+
+def _get_profile_cache_dir():
+    profile_name = env.get_active_profile()
+    if not profile_name or profile_name == 'local':
+        return None
+    return os.path.join(
+        env.get_profile_dir(profile_name, suppress_error=True),
+        COMPLETION_CACHE_DIR_NAME)
+
+
+def _get_file_name(cache_name):
+    return '{0}.json'.format(cache_name)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def _fetch_and_write(path, fetch):
+    ids = list(fetch())
+    cache_dir = os.path.dirname(path)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    env._atomic_write(path, json.dumps({'timestamp': time.time(),
+                                        'ids': ids}))
+    return ids
+
+
+def _refresh_in_background(path, fetch):
+    """Refresh the cache in a detached process.
+
+    The completion process exits as soon as it prints its results, so a
+    thread wouldn't live long enough. Where forking isn't possible, the
+    stale IDs are used until the cache is invalidated.
+    """
+    if not hasattr(os, 'fork') or not _acquire_refresh_lock(path):
+        return
+
+    pid = os.fork()
+    if pid:
+        # Reap the intermediate child, which exits right away
+        os.waitpid(pid, 0)
+        return
+
+    # Fork again, so that the refreshing process isn't our child, and won't
+    # be left as a zombie
+    if os.fork() == 0:
+        try:
+            _fetch_and_write(path, fetch)
+        except BaseException:
+            pass
+        finally:
+            _release_refresh_lock(path)
+            os._exit(0)
+    os._exit(0)
+
+
+def _acquire_refresh_lock(path):
+    lock_path = path + '.lock'
+    try:
+        if time.time() - os.path.getmtime(lock_path) > REFRESH_TIMEOUT:
+            # A refresh which died before releasing the lock
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except OSError:
+        return False
+    return True
+
+
+def _release_refresh_lock(path):
+    try:
+        os.remove(path + '.lock')
+    except OSError:
+        pass
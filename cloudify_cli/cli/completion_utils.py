@@ -18,6 +18,7 @@ from argcomplete.completers import FilesCompleter
 
 from .. import env
 from ..commands import dev
+from . import completion_cache
 
 yaml_files_completer = FilesCompleter(['*.yml', '*.yaml'])
 archive_files_completer = FilesCompleter(
@@ -31,10 +32,12 @@ def objects_args_completer_maker(objects_type, **kw):
         if not context:
             return []
 
-        rest_client = env.get_rest_client()
-        objs_ids_list = getattr(rest_client, objects_type).list(
-            _include=['id'])
-        return (obj.id for obj in objs_ids_list if obj.id.startswith(prefix))
+        def fetch():
+            rest_client = env.get_rest_client()
+            objs_ids_list = getattr(rest_client, objects_type).list(
+                _include=['id'])
+            return [obj.id for obj in objs_ids_list]
+        return completion_cache.get_ids(objects_type, fetch, prefix)
     return _objects_args_completer
 
 
@@ -49,12 +52,15 @@ def workflow_id_completer(prefix, parsed_args, **kwargs):
     if not context:
         return []
 
-    rest_client = env.get_rest_client()
-
     deployment_id = parsed_args.deployment_id
-    workflows = rest_client.deployments.get(
-        deployment_id, _include=['workflows']).workflows
-    return (wf.id for wf in workflows if wf.id.startswith(prefix))
+
+    def fetch():
+        rest_client = env.get_rest_client()
+        workflows = rest_client.deployments.get(
+            deployment_id, _include=['workflows']).workflows
+        return [wf.id for wf in workflows]
+    return completion_cache.get_ids(
+        completion_cache.workflows_cache_name(deployment_id), fetch, prefix)
 
 
 def dev_task_name_completer(prefix, parsed_args, **kwargs):
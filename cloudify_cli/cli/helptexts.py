@@ -20,6 +20,19 @@ VERSION = (
     "Display the version and exit (if a manager is used, its version will "
     "also show)"
 )
+TIMINGS = (
+    "Print how long each phase of the command took (e.g. loading the "
+    "profile, and each request to the manager) to stderr [env "
+    "CFY_TIMINGS=true]"
+)
+TIMINGS_TRACE = (
+    "Write how long each phase of the command took to this file, as a "
+    "Chrome trace (see chrome://tracing) [env CFY_TIMINGS_TRACE]"
+)
+REFRESH_VERSION = (
+    "Used with `--version`. Fetch the manager's version, rather than use "
+    "the version cached in the profile"
+)
 
 INPUTS_PARAMS_USAGE = (
     '(Can be provided as wildcard based paths '
@@ -167,9 +180,35 @@ IMPORT_SSH_KEYS = 'WARNING: Import exported keys to their original locations'
 
 SORT_BY = "Key for sorting the list"
 DESCENDING = "Sort list in descending order [default: False]"
+PAGE_SIZE = "The number of items to fetch from the manager per request"
+FILTERS = (
+    "Only list the items whose field has the given value, in the form of "
+    "`key=value` (can be passed multiple times). Fields the manager can "
+    "filter by are filtered by the manager, any other field is filtered "
+    "locally"
+)
+DEPLOYMENT_ID_PATTERN = (
+    "Only watch the executions of the deployments whose ID matches this "
+    "glob pattern (e.g. `web-*`)"
+)
+WATCHED_WORKFLOW_ID = "Only watch the executions of this workflow"
+EXECUTION_STATUSES = (
+    "Only watch the executions in this status (can be passed multiple "
+    "times) [default: the statuses of executions which didn't end]"
+)
+PREFETCH = (
+    "Whether to fetch the next page of items while the current one is "
+    "shown [default: True]"
+)
 
 INSTALL_SCRIPT_LOCATION = \
     'Alternative location of the `install_agents.py` script'
+AGENTS_CONCURRENCY = (
+    "The number of deployments to install agents on at the same time"
+)
+MAX_REQUEST_RATE = (
+    "The number of requests to send to the manager per second, at most"
+)
 TENANT = 'The name of the tenant'
 ALL_TENANTS = 'Include resources from all tenants associated with the user.'
 GROUP = 'The name of the user group'
@@ -213,3 +252,6 @@ RESTORE_SNAPSHOT_TENANT_NAME = 'The name of the tenant into which the ' \
                                'will be raised'
 SKIP_CREDENTIALS_VALIDATION = 'Do not check that the passed credentials are ' \
                               'correct (default:False)'
+
+DAEMON_FOREGROUND = 'Run the daemon in the foreground, instead of detaching ' \
+                    'it from the terminal'
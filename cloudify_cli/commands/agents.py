@@ -20,12 +20,17 @@ import threading
 from cloudify import logs
 
 from ..cli import cfy
+from ..pagination import list_pages
+from ..concurrency import TokenBucket, imap_unordered
 from ..exceptions import ExecutionTimeoutError
 from ..exceptions import SuppressedCloudifyCliError
-from ..execution_events_fetcher import wait_for_execution, \
-    WAIT_FOR_EXECUTION_SLEEP_INTERVAL
+from ..execution_events_fetcher import wait_for_execution
 
-_NODE_INSTANCE_STATE_STARTED = 'started'
+# The states of a node instance which isn't installed (i.e. all but
+# `started`)
+_NODE_INSTANCE_STATES_NOT_STARTED = [
+    'uninitialized', 'initializing', 'creating', 'created', 'configuring',
+    'configured', 'starting', 'stopping', 'stopped', 'deleting', 'deleted']
 
 
 @cfy.group(name='agents')
@@ -37,11 +42,38 @@ def agents():
     pass
 
 
-def _is_deployment_installed(client, deployment_id):
-    for node_instance in client.node_instances.list(deployment_id):
-        if node_instance.state != _NODE_INSTANCE_STATE_STARTED:
-            return False
-    return True
+def _get_installed_deployments(client, deployment_id=None):
+    """Return the IDs of the deployments whose node instances are all
+    started (of `deployment_id`'s only, if it's passed).
+
+    The deployments, and the node instances which aren't started, are
+    listed concurrently (a page at a time, prefetching the next one), so
+    that the check takes the same two listings however many deployments
+    there are, rather than a listing per deployment.
+    """
+    filters = {'deployment_id': deployment_id} if deployment_id else {}
+
+    def list_deployments():
+        pages = list_pages(client.deployments.list,
+                           include=['id'],
+                           **({'id': deployment_id} if deployment_id else {}))
+        return set(dep.id for page in pages for dep in page)
+
+    def list_not_installed():
+        pages = list_pages(client.node_instances.list,
+                           include=['deployment_id'],
+                           state=_NODE_INSTANCE_STATES_NOT_STARTED,
+                           **filters)
+        return set(node_instance.deployment_id
+                   for page in pages for node_instance in page)
+
+    results = {}
+    for func, result, exc_info in imap_unordered(
+            lambda func: func(), [list_deployments, list_not_installed], 2):
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+        results[func] = result
+    return sorted(results[list_deployments] - results[list_not_installed])
 
 
 def _deployment_exists(client, deployment_id):
@@ -57,53 +89,73 @@ def _deployment_exists(client, deployment_id):
 @cfy.argument('deployment-id', required=False)
 @cfy.options.include_logs
 @cfy.options.install_script
+@cfy.options.agents_concurrency
+@cfy.options.max_request_rate
 @cfy.options.verbose()
 @cfy.pass_logger
 @cfy.pass_client()
-def install(deployment_id, include_logs, install_script, logger, client):
+def install(deployment_id,
+            include_logs,
+            install_script,
+            concurrency,
+            max_request_rate,
+            logger,
+            client):
     """Install agents on the hosts of existing deployments
 
     `DEPLOYMENT_ID` - The ID of the deployment you would like to
     install agents for.
 
+    The agents of up to `--concurrency` deployments are installed at the
+    same time.
+
     See Cloudify's documentation at http://docs.getcloudify.org for more
     information.
     """
+    # shared by all of the threads, so that all of their requests together
+    # are limited
+    client._client.rate_limiter = TokenBucket(max_request_rate)
+    try:
+        _install_agents(client, deployment_id, include_logs, install_script,
+                        concurrency, logger)
+    finally:
+        # the client is reused by later commands (e.g. of a `cfy shell`)
+        client._client.rate_limiter = None
+
+
+def _install_agents(client,
+                    deployment_id,
+                    include_logs,
+                    install_script,
+                    concurrency,
+                    logger):
     workflow_id = 'install_new_agents'
+    timeout = 900
+    start_time = time.time()
 
     if deployment_id:
-        deps = [deployment_id]
         if not _deployment_exists(client, deployment_id):
             logger.error("Could not find deployment for deployment id: '{0}'."
                          .format(deployment_id))
             raise SuppressedCloudifyCliError()
-        if not _is_deployment_installed(client, deployment_id):
+        deps = _get_installed_deployments(client, deployment_id)
+        if not deps:
             logger.error("Deployment '{0}' is not installed"
                          .format(deployment_id))
             raise SuppressedCloudifyCliError()
         logger.info("Installing agent for deployment '{0}'"
                     .format(deployment_id))
     else:
-        deps = [dep.id for dep in client.deployments.list()
-                if _is_deployment_installed(client, dep.id)]
+        deps = _get_installed_deployments(client)
         if not deps:
             logger.error('There are no deployments installed')
             raise SuppressedCloudifyCliError()
-        logger.info('Installing agents for all installed deployments')
-
-    error_summary = []
-    error_summary_lock = threading.Lock()
+        logger.info('Installing agents for all {0} installed deployments '
+                    '({1} at a time)'.format(
+                        len(deps), min(concurrency, len(deps))))
 
     event_lock = threading.Lock()
 
-    def log_to_summary(message):
-        with error_summary_lock:
-            error_summary.append(message)
-
-    def threadsafe_log(message):
-        with event_lock:
-            logger.info(message)
-
     def threadsafe_events_logger(events):
         with event_lock:
             for event in events:
@@ -112,44 +164,47 @@ def install(deployment_id, include_logs, install_script, logger, client):
                     logger.info(output)
 
     def worker(dep_id):
-        timeout = 900
-
-        try:
-            kwargs = {}
-            if install_script is not None:
-                kwargs = {
-                    'parameters': {
-                        'install_script': install_script
-                    },
-                    'allow_custom_parameters': True
-                }
-            execution = client.executions.start(
-                dep_id,
-                workflow_id,
-                **kwargs
-            )
-
-            execution = wait_for_execution(
-                client,
-                execution,
-                events_handler=threadsafe_events_logger,
-                include_logs=include_logs,
-                timeout=timeout
-            )
-
-            if execution.error:
-                log_to_summary("Execution of workflow '{0}' for "
-                               "deployment '{1}' failed. [error={2}]"
-                               .format(workflow_id,
-                                       dep_id,
-                                       execution.error))
-            else:
-                threadsafe_log("Finished executing workflow "
-                               "'{0}' on deployment"
-                               " '{1}'".format(workflow_id, dep_id))
-
-        except ExecutionTimeoutError as e:
-            log_to_summary(
+        kwargs = {}
+        if install_script is not None:
+            kwargs = {
+                'parameters': {
+                    'install_script': install_script
+                },
+                'allow_custom_parameters': True
+            }
+        execution = client.executions.start(
+            dep_id,
+            workflow_id,
+            **kwargs
+        )
+
+        return wait_for_execution(
+            client,
+            execution,
+            events_handler=threadsafe_events_logger,
+            include_logs=include_logs,
+            timeout=timeout
+        )
+
+    error_summary = []
+    failed = timed_out = 0
+    for done, (dep_id, execution, exc_info) in enumerate(
+            imap_unordered(worker, deps, concurrency), 1):
+        progress = '[{0}/{1}]'.format(done, len(deps))
+        if exc_info is None and not execution.error:
+            with event_lock:
+                logger.info("{0} Finished executing workflow '{1}' on "
+                            "deployment '{2}'".format(progress, workflow_id,
+                                                      dep_id))
+            continue
+        if exc_info is None:
+            failed += 1
+            message = ("Execution of workflow '{0}' for deployment '{1}' "
+                       "failed. [error={2}]".format(workflow_id, dep_id,
+                                                    execution.error))
+        elif isinstance(exc_info[1], ExecutionTimeoutError):
+            timed_out += 1
+            message = (
                 "Timed out waiting for workflow '{0}' of deployment '{1}' to "
                 "end. The execution may still be running properly; however, "
                 "the command-line utility was instructed to wait up to {3} "
@@ -158,20 +213,21 @@ def install(deployment_id, include_logs, install_script, logger, client):
                 "status.\n"
                 "* Run 'cfy executions cancel --execution-id {2}' to cancel"
                 " the running workflow.".format(
-                    workflow_id, deployment_id, e.execution_id, timeout))
-
-    threads = [threading.Thread(target=worker, args=(dep_id,))
-               for dep_id in deps]
-
-    for t in threads:
-        t.daemon = True
-        t.start()
-
-    while True:
-        if all(not thread.is_alive() for thread in threads):
-            break
-        time.sleep(WAIT_FOR_EXECUTION_SLEEP_INTERVAL)
-
+                    workflow_id, dep_id, exc_info[1].execution_id, timeout))
+        else:
+            failed += 1
+            message = ("Failed executing workflow '{0}' on deployment "
+                       "'{1}': {2}".format(workflow_id, dep_id, exc_info[1]))
+        error_summary.append(message)
+        with event_lock:
+            logger.info("{0} Workflow '{1}' on deployment '{2}' didn't "
+                        "succeed (see the summary)".format(
+                            progress, workflow_id, dep_id))
+
+    logger.info('Installed agents on {0} of {1} deployment(s) in {2:.1f} '
+                'seconds ({3} failed, {4} timed out)'.format(
+                    len(deps) - failed - timed_out, len(deps),
+                    time.time() - start_time, failed, timed_out))
     if error_summary:
         logger.error('Summary:\n{0}\n'.format(
             '\n'.join(error_summary)
@@ -22,22 +22,22 @@ from urlparse import urlparse
 
 import click
 
-from dsl_parser.parser import parse_from_path
-from dsl_parser.exceptions import DSLParsingException
-
 from .. import local
 from .. import utils
-from ..cli import cfy
+from ..cli import cfy, completion_cache
 from .. import blueprint
 from .. import exceptions
 from ..config import config
-from ..table import print_data
+from ..table import print_data, print_pages
+from ..pagination import list_pages
 from ..exceptions import CloudifyCliError
 
 
 DESCRIPTION_LIMIT = 20
 BLUEPRINT_COLUMNS = ['id', 'description', 'main_file_name', 'created_at',
                      'updated_at', 'permission', 'tenant_name']
+# The fields the manager can filter blueprints by
+BLUEPRINT_FILTER_FIELDS = ['id', 'description', 'main_file_name']
 INPUTS_COLUMNS = ['name', 'type', 'default', 'description']
 
 
@@ -59,6 +59,9 @@ def validate_blueprint(blueprint_path, logger):
 
     `BLUEPRINT_PATH` is the path of the blueprint to validate.
     """
+    from dsl_parser.parser import parse_from_path
+    from dsl_parser.exceptions import DSLParsingException
+
     logger.info('Validating blueprint: {0}'.format(blueprint_path))
     try:
         resolver = config.get_import_resolver()
@@ -155,6 +158,7 @@ def upload(ctx,
                 )
                 shutil.rmtree(temp_directory)
 
+    completion_cache.invalidate('blueprints')
     logger.info("Blueprint uploaded. The blueprint's id is {0}".format(
         blueprint_obj.id))
 
@@ -201,6 +205,7 @@ def delete(blueprint_id, logger, client, tenant_name):
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Deleting blueprint {0}...'.format(blueprint_id))
     client.blueprints.delete(blueprint_id)
+    completion_cache.invalidate('blueprints')
     logger.info('Blueprint deleted')
 
 
@@ -208,13 +213,24 @@ def delete(blueprint_id, logger, client, tenant_name):
                     short_help='List blueprints [manager only]')
 @cfy.options.sort_by()
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.verbose()
 @cfy.options.tenant_name(required=False)
 @cfy.options.all_tenants
 @cfy.assert_manager_active()
 @cfy.pass_client()
 @cfy.pass_logger
-def list(sort_by, descending, tenant_name, all_tenants, logger, client):
+def list(sort_by,
+         descending,
+         filters,
+         page_size,
+         prefetch,
+         tenant_name,
+         all_tenants,
+         logger,
+         client):
     """List all blueprints
     """
     def trim_description(blueprint):
@@ -229,9 +245,17 @@ def list(sort_by, descending, tenant_name, all_tenants, logger, client):
     if tenant_name:
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Listing all blueprints...')
-    blueprints = [trim_description(b) for b in client.blueprints.list(
-        sort=sort_by, is_descending=descending, _all_tenants=all_tenants)]
-    print_data(BLUEPRINT_COLUMNS, blueprints, 'Blueprints:')
+    pages = list_pages(client.blueprints.list,
+                       page_size=page_size,
+                       prefetch=prefetch,
+                       include=BLUEPRINT_COLUMNS,
+                       filters=filters,
+                       server_filter_fields=BLUEPRINT_FILTER_FIELDS,
+                       sort=sort_by,
+                       is_descending=descending,
+                       _all_tenants=all_tenants)
+    pages = ([trim_description(b) for b in page] for page in pages)
+    print_pages(BLUEPRINT_COLUMNS, pages, 'Blueprints:')
 
 
 @blueprints.command(name='get',
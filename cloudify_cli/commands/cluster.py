@@ -24,11 +24,14 @@ from cloudify_rest_client.exceptions import (CloudifyClientError,
 from .. import env
 from ..cli import cfy
 from ..table import print_data
+from ..retry import RetryPolicy
 from ..exceptions import CloudifyCliError
 from ..execution_events_fetcher import WAIT_FOR_EXECUTION_SLEEP_INTERVAL
 
 
 CLUSTER_COLUMNS = ['name', 'host_ip', 'master', 'online']
+# The longest interval between polls of the cluster's status, in seconds
+CLUSTER_STATUS_MAX_POLL_INTERVAL = 15
 
 
 def _verify_not_in_cluster(client):
@@ -172,11 +175,10 @@ def join(client,
             logger.error('Error while joining the Cloudify Manager cluster')
             raise CloudifyCliError(status.error)
 
-    while True:
-        if time.time() > deadline:
-            raise CloudifyCliError('Timed out waiting for database '
-                                   'replication to be established')
-
+    policy = RetryPolicy(base_delay=WAIT_FOR_EXECUTION_SLEEP_INTERVAL,
+                         max_delay=CLUSTER_STATUS_MAX_POLL_INTERVAL,
+                         deadline=max(deadline - time.time(), 0))
+    for _ in policy.attempts('cluster nodes'):
         # find the current node in the cluster nodes list, and check if it
         # reports being online
         nodes = cluster_client.cluster.nodes.list()
@@ -185,8 +187,9 @@ def join(client,
             if n.host_ip == cluster_host_ip), None)
         if joined_node is not None and joined_node.online:
             break
-        else:
-            time.sleep(WAIT_FOR_EXECUTION_SLEEP_INTERVAL)
+    else:
+        raise CloudifyCliError('Timed out waiting for database '
+                               'replication to be established')
 
     node = _make_node_from_profile()
     joined_profile.cluster.append(node)
@@ -277,12 +280,10 @@ def _wait_for_cluster_initialized(client, logger=None, timeout=900):
     # yield logs more recent than that.
     last_log = None
 
-    deadline = time.time() + timeout
-    while True:
-        if time.time() >= deadline:
-            raise CloudifyCliError('Timed out waiting for the Cloudify '
-                                   'Manager cluster to be initialized.')
-
+    policy = RetryPolicy(base_delay=WAIT_FOR_EXECUTION_SLEEP_INTERVAL,
+                         max_delay=CLUSTER_STATUS_MAX_POLL_INTERVAL,
+                         deadline=timeout)
+    for _ in policy.attempts('cluster status'):
         try:
             status = client.cluster.status(
                 _include=include,
@@ -293,8 +294,9 @@ def _wait_for_cluster_initialized(client, logger=None, timeout=900):
             # during cluster initialization, we restart the database, nginx,
             # and the rest service; while that happens, the server might
             # return intermittent 500 errors
-            logger.info('Error while fetching cluster status: {0}'
-                        .format(e))
+            if logger:
+                logger.info('Error while fetching cluster status: {0}'
+                            .format(e))
         else:
             if logger and status.logs:
                 last_log = status.logs[-1]['cursor']
@@ -303,4 +305,5 @@ def _wait_for_cluster_initialized(client, logger=None, timeout=900):
             if status.initialized or status.error:
                 return status
 
-        time.sleep(WAIT_FOR_EXECUTION_SLEEP_INTERVAL)
+    raise CloudifyCliError('Timed out waiting for the Cloudify '
+                           'Manager cluster to be initialized.')
@@ -0,0 +1,93 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+import socket
+
+from .. import daemon as cli_daemon
+from ..cli import cfy, helptexts
+from ..exceptions import CloudifyCliError
+
+
+@cfy.group(name='daemon')
+@cfy.options.verbose()
+def daemon():
+    """Handle the CLI daemon
+
+    The daemon is a background process which keeps the CLI loaded between
+    commands.
+
+    To have `cfy` run commands by the daemon, set the `CFY_DAEMON`
+    environment variable to `true`. Each command is run by a process of its
+    own, forked from the daemon, so several commands (e.g. in different
+    terminals) run at the same time. Commands are only run by the daemon
+    when stdin isn't a terminal (e.g. in scripts). Otherwise, or if the
+    daemon isn't running, commands are run as usual.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise CloudifyCliError(
+            'The CLI daemon is not supported on this platform')
+
+
+@daemon.command(name='start', short_help='Start the CLI daemon')
+@cfy.options.foreground(helptexts.DAEMON_FOREGROUND)
+@cfy.options.verbose()
+@cfy.pass_logger
+def start(foreground, logger):
+    """Start the CLI daemon
+    """
+    pid = cli_daemon.get_pid()
+    if pid:
+        logger.info('The CLI daemon is already running [pid={0}]'.format(pid))
+        return
+
+    if foreground:
+        server = cli_daemon.Server()
+        server.start()
+        logger.info('Serving commands on {0}'.format(server.socket_path))
+        server.serve_forever()
+        return
+
+    pid = cli_daemon.start_in_background()
+    if not pid:
+        raise CloudifyCliError(
+            'The CLI daemon failed to start. See the CLI log for details')
+    logger.info('The CLI daemon started [pid={0}]'.format(pid))
+
+
+@daemon.command(name='stop', short_help='Stop the CLI daemon')
+@cfy.options.verbose()
+@cfy.pass_logger
+def stop(logger):
+    """Stop the CLI daemon
+    """
+    if cli_daemon.stop():
+        logger.info('The CLI daemon stopped')
+    else:
+        logger.info('The CLI daemon is not running')
+
+
+@daemon.command(name='status', short_help='Show the CLI daemon status')
+@cfy.options.verbose()
+@cfy.pass_logger
+def status(logger):
+    """Show whether the CLI daemon is running
+    """
+    pid = cli_daemon.get_pid()
+    if pid:
+        logger.info('The CLI daemon is running [pid={0}, socket={1}]'.format(
+            pid, cli_daemon.get_socket_path()))
+    else:
+        logger.info('The CLI daemon is not running')
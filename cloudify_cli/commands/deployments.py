@@ -23,8 +23,9 @@ from cloudify_rest_client.exceptions import UnknownDeploymentInputError
 
 from .. import utils
 from ..local import load_env
-from ..table import print_data
-from ..cli import cfy, helptexts
+from ..table import print_pages
+from ..pagination import list_pages
+from ..cli import cfy, helptexts, completion_cache
 from ..logger import get_events_logger
 from .. import execution_events_fetcher
 from ..constants import DEFAULT_BLUEPRINT_PATH
@@ -33,6 +34,8 @@ from ..exceptions import CloudifyCliError, SuppressedCloudifyCliError
 
 DEPLOYMENT_COLUMNS = ['id', 'blueprint_id', 'created_at', 'updated_at',
                       'permission', 'tenant_name']
+# The fields the manager can filter deployments by
+DEPLOYMENT_FILTER_FIELDS = ['id', 'blueprint_id', 'description']
 
 
 @cfy.group(name='deployments')
@@ -61,6 +64,9 @@ def _print_deployment_inputs(client, blueprint_id, logger):
 @cfy.options.blueprint_id()
 @cfy.options.sort_by()
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.tenant_name(required=False)
 @cfy.options.all_tenants
 @cfy.options.verbose()
@@ -70,6 +76,9 @@ def _print_deployment_inputs(client, blueprint_id, logger):
 def manager_list(blueprint_id,
                  sort_by,
                  descending,
+                 filters,
+                 page_size,
+                 prefetch,
                  all_tenants,
                  logger,
                  client,
@@ -87,13 +96,18 @@ def manager_list(blueprint_id,
     else:
         logger.info('Listing all deployments...')
 
-    deployments = client.deployments.list(
-        sort=sort_by, is_descending=descending, _all_tenants=all_tenants)
     if blueprint_id:
-        deployments = filter(lambda deployment:
-                             deployment['blueprint_id'] == blueprint_id,
-                             deployments)
-    print_data(DEPLOYMENT_COLUMNS, deployments, 'Deployments:')
+        filters['blueprint_id'] = blueprint_id
+    pages = list_pages(client.deployments.list,
+                       page_size=page_size,
+                       prefetch=prefetch,
+                       include=DEPLOYMENT_COLUMNS,
+                       filters=filters,
+                       server_filter_fields=DEPLOYMENT_FILTER_FIELDS,
+                       sort=sort_by,
+                       is_descending=descending,
+                       _all_tenants=all_tenants)
+    print_pages(DEPLOYMENT_COLUMNS, pages, 'Deployments:')
 
 
 @cfy.command(name='update', short_help='Update a deployment [manager only]')
@@ -151,6 +165,9 @@ def manager_update(deployment_id,
         skip_install=skip_install,
         skip_uninstall=skip_uninstall,
         force=force)
+    # The update might change the deployment's workflows
+    completion_cache.invalidate(
+        completion_cache.workflows_cache_name(deployment_id))
     events_logger = get_events_logger(json_output)
 
     execution = execution_events_fetcher.wait_for_execution(
@@ -230,6 +247,7 @@ def manager_create(blueprint_id,
         _print_deployment_inputs(client, blueprint_id)
         raise CloudifyCliError(str(e))
 
+    completion_cache.invalidate('deployments')
     logger.info("Deployment created. The deployment's id is {0}".format(
         deployment.id))
 
@@ -252,6 +270,8 @@ def manager_delete(deployment_id, force, logger, client, tenant_name):
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Deleting deployment {0}...'.format(deployment_id))
     client.deployments.delete(deployment_id, force)
+    completion_cache.invalidate(
+        'deployments', completion_cache.workflows_cache_name(deployment_id))
     logger.info("Deployment deleted")
 
 
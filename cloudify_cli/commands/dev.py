@@ -15,10 +15,8 @@
 ############
 
 import click
-from fabric.api import env as fabric_env
-from fabric.context_managers import settings
 
-from ..env import profile
+from .. import env
 from ..cli import cfy, helptexts
 from ..exceptions import CloudifyCliError
 
@@ -38,10 +36,10 @@ from ..exceptions import CloudifyCliError
 def dev(tasks_file, task, args):
     """Run fabric tasks on the manager
     """
-    _execute(username=profile.ssh_user,
-             port=profile.ssh_port,
-             key=profile.ssh_key,
-             ip=profile.manager_ip,
+    _execute(username=env.profile.ssh_user,
+             port=env.profile.ssh_port,
+             key=env.profile.ssh_key,
+             ip=env.profile.manager_ip,
              task=task,
              tasks_file=tasks_file,
              args=args)
@@ -54,6 +52,8 @@ def _execute(username, port, key, ip, task, tasks_file, args):
 
 
 def _setup_fabric_env(username, port, key):
+    from fabric.api import env as fabric_env
+
     fabric_env.user = username
     fabric_env.port = port
     fabric_env.key_filename = key
@@ -89,6 +89,8 @@ def _execute_task(ip, task, tasks, task_args):
     task_function = tasks.get(task)
     if not task_function:
         raise CloudifyCliError('Task {0} not found'.format(task))
+    from fabric.context_managers import settings
+
     try:
         with settings(host_string=ip):
             task_function(*args, **kwargs)
@@ -127,4 +129,11 @@ def get_exec_globals(tasks_file):
     copied_globals['__file__'] = tasks_file
     copied_globals['__name__'] = 'cli_dev_tasks'
     copied_globals['__package__'] = None
+    # tasks files may rely on these being in their globals, even though
+    # this module no longer imports them itself
+    from fabric.api import env as fabric_env
+    from fabric.context_managers import settings
+    copied_globals['fabric_env'] = fabric_env
+    copied_globals['settings'] = settings
+    copied_globals['profile'] = env.profile
     return copied_globals
@@ -16,15 +16,18 @@
 
 import json
 import time
+import fnmatch
 
 from cloudify_rest_client import exceptions
+from cloudify_rest_client.executions import Execution
 
 from .. import local
 from .. import utils
-from ..table import print_data
+from ..table import print_data, print_pages
+from ..pagination import list_pages
 from ..cli import cfy, helptexts
 from ..logger import get_events_logger
-from ..execution_events_fetcher import wait_for_execution
+from ..execution_events_fetcher import wait_for_execution, watch_executions
 from ..exceptions import CloudifyCliError, ExecutionTimeoutError, \
     SuppressedCloudifyCliError
 
@@ -34,6 +37,12 @@ _STATUS_CANCELING_MESSAGE = (
 
 EXECUTION_COLUMNS = ['id', 'workflow_id', 'status', 'deployment_id',
                      'created_at', 'error', 'permission', 'tenant_name']
+# The statuses of the executions which didn't end yet
+ACTIVE_STATES = [Execution.PENDING, Execution.STARTED, Execution.CANCELLING,
+                 Execution.FORCE_CANCELLING]
+# The fields the manager can filter executions by
+EXECUTION_FILTER_FIELDS = ['id', 'workflow_id', 'status', 'deployment_id',
+                           'blueprint_id', 'is_system_workflow']
 
 
 @cfy.group(name='executions')
@@ -85,6 +94,9 @@ def manager_get(execution_id, logger, client, tenant_name):
 @cfy.options.include_system_workflows
 @cfy.options.sort_by()
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.tenant_name(required=False)
 @cfy.options.verbose()
 @cfy.assert_manager_active()
@@ -95,6 +107,9 @@ def manager_list(
         include_system_workflows,
         sort_by,
         descending,
+        filters,
+        page_size,
+        prefetch,
         logger,
         client,
         tenant_name):
@@ -111,7 +126,13 @@ def manager_list(
                 deployment_id))
         else:
             logger.info('Listing all executions...')
-        executions = client.executions.list(
+        pages = list_pages(
+            client.executions.list,
+            page_size=page_size,
+            prefetch=prefetch,
+            include=EXECUTION_COLUMNS,
+            filters=filters,
+            server_filter_fields=EXECUTION_FILTER_FIELDS,
             deployment_id=deployment_id,
             include_system_workflows=include_system_workflows,
             sort=sort_by,
@@ -123,11 +144,19 @@ def manager_list(
         raise CloudifyCliError('Deployment {0} does not exist'.format(
             deployment_id))
 
-    print_data(EXECUTION_COLUMNS, executions, 'Executions:')
+    # The executions are only available while their page is printed
+    cancelling = []
+
+    def find_cancelling(pages):
+        for page in pages:
+            cancelling.extend(
+                execution.id for execution in page if execution.status in (
+                    execution.CANCELLING, execution.FORCE_CANCELLING))
+            yield page
+
+    print_pages(EXECUTION_COLUMNS, find_cancelling(pages), 'Executions:')
 
-    if any(execution.status in (
-            execution.CANCELLING, execution.FORCE_CANCELLING)
-            for execution in executions):
+    if cancelling:
         logger.info(_STATUS_CANCELING_MESSAGE)
 
 
@@ -272,6 +301,107 @@ def manager_cancel(execution_id, force, logger, client, tenant_name):
         "cfy executions get {0}".format(execution_id))
 
 
+@cfy.command(name='watch',
+             short_help='Watch workflow executions until they end '
+                        '[manager only]')
+@cfy.argument('execution-ids', nargs=-1)
+@cfy.options.deployment_id_pattern
+@cfy.options.watched_workflow_id
+@cfy.options.execution_statuses
+@cfy.options.include_logs
+@cfy.options.json_output
+@cfy.options.verbose()
+@cfy.options.tenant_name(required=False)
+@cfy.assert_manager_active()
+@cfy.pass_client()
+@cfy.pass_logger
+def manager_watch(execution_ids,
+                  deployment_id_pattern,
+                  workflow_id,
+                  statuses,
+                  include_logs,
+                  json_output,
+                  logger,
+                  client,
+                  tenant_name):
+    """Watch workflow executions, and show their events, until they end
+
+    `EXECUTION_IDS` are the executions to watch. If none are passed, the
+    executions matching the filters are watched (by default, all of the
+    executions which didn't end yet).
+
+    The events of all of the executions are shown as they arrive, each
+    prefixed by the ID of its execution. Once all of the executions ended,
+    their statuses are shown.
+    """
+    if tenant_name:
+        logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
+    if execution_ids:
+        executions = [_get_execution(client, execution_id)
+                      for execution_id in execution_ids]
+    else:
+        executions = _list_executions(client, deployment_id_pattern,
+                                      workflow_id, statuses or ACTIVE_STATES)
+    executions = [execution for execution in executions
+                  if _matches(execution, deployment_id_pattern,
+                              workflow_id, statuses)]
+    if not executions:
+        logger.info('No executions to watch')
+        return
+
+    logger.info('Watching {0} executions...'.format(len(executions)))
+    width = max(len(execution.id) for execution in executions)
+
+    def get_events_handler(execution):
+        return get_events_logger(json_output, prefix='{0:<{1}}  '.format(
+            execution.id, width))
+
+    executions = watch_executions(client,
+                                  executions,
+                                  get_events_handler=get_events_handler,
+                                  include_logs=include_logs)
+    print_data(EXECUTION_COLUMNS, executions, 'Executions:')
+    unsuccessful = [execution for execution in executions
+                    if execution.status != execution.TERMINATED]
+    if unsuccessful:
+        logger.info('{0} of {1} executions did not succeed'.format(
+            len(unsuccessful), len(executions)))
+        raise SuppressedCloudifyCliError()
+
+
+def _get_execution(client, execution_id):
+    try:
+        return client.executions.get(execution_id)
+    except exceptions.CloudifyClientError as e:
+        if e.status_code != 404:
+            raise
+        raise CloudifyCliError('Execution {0} not found'.format(execution_id))
+
+
+def _list_executions(client, deployment_id_pattern, workflow_id, statuses):
+    """Return the executions matching the filters"""
+    filters = {'status': list(statuses)}
+    if workflow_id:
+        filters['workflow_id'] = workflow_id
+    # only patterns without wildcards can be filtered by the manager
+    if deployment_id_pattern and \
+            not any(char in deployment_id_pattern for char in '*?['):
+        filters['deployment_id'] = deployment_id_pattern
+    pages = list_pages(client.executions.list,
+                       include=EXECUTION_COLUMNS,
+                       **filters)
+    return [execution for page in pages for execution in page]
+
+
+def _matches(execution, deployment_id_pattern, workflow_id, statuses):
+    # system workflows' executions have no deployment
+    return (not deployment_id_pattern or (
+        execution.deployment_id is not None and fnmatch.fnmatchcase(
+            execution.deployment_id, deployment_id_pattern))) and \
+        (not workflow_id or execution.workflow_id == workflow_id) and \
+        (not statuses or execution.status in statuses)
+
+
 def _get_deployment_environment_creation_execution(client, deployment_id):
     executions = client.executions.list(deployment_id=deployment_id)
     for execution in executions:
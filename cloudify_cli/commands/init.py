@@ -19,8 +19,6 @@ import os
 import shutil
 import pkg_resources
 
-from jinja2.environment import Template
-
 import cloudify_cli
 from .. import env
 from .. import local
@@ -193,6 +191,8 @@ def _raise_initialized_error(profile_name):
 
 
 def set_config(enable_colors=False):
+    from jinja2.environment import Template
+
     cli_config = pkg_resources.resource_string(
         cloudify_cli.__name__,
         'config/config_template.yaml')
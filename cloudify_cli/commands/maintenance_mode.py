@@ -14,17 +14,18 @@
 # limitations under the License.
 ############
 
-import time
-
 from .. import utils
 from ..cli import cfy
 from .. import exceptions
 from ..table import print_data
+from ..retry import RetryPolicy
 from ..logger import NO_VERBOSE
 from ..logger import get_global_verbosity
 
 
 DEFAULT_TIMEOUT_INTERVAL = 5
+# The longest interval between polls of the status, in seconds
+MAX_POLL_INTERVAL = 30
 MAINTENANCE_MODE_ACTIVE = 'activated'
 EXECUTION_COLUMNS = ['id', 'deployment_id', 'workflow_id', 'status']
 
@@ -116,23 +117,16 @@ def activate(wait, timeout, logger, client):
     if wait:
         logger.info("Cloudify manager will enter Maintenance mode once "
                     "there are no running or pending executions...\n")
-        deadline = time.time() + timeout
-
-        while True:
-            if _is_timeout(timeout, deadline):
-                raise exceptions.CloudifyCliError(
-                    "Timed out while entering maintenance mode. "
-                    "Note that the manager is still entering maintenance mode"
-                    " in the background. You can run "
-                    "'cfy maintenance-mode status' to check the status.")
-
-            status_response = client.maintenance_mode.status()
-            if status_response.status == MAINTENANCE_MODE_ACTIVE:
-                logger.info('Manager is in maintenance mode.')
-                logger.info('While in maintenance mode most requests will '
-                            'be blocked.')
-                return
-            time.sleep(DEFAULT_TIMEOUT_INTERVAL)
+        if wait_for_maintenance_mode(client, timeout=timeout or None):
+            logger.info('Manager is in maintenance mode.')
+            logger.info('While in maintenance mode most requests will '
+                        'be blocked.')
+            return
+        raise exceptions.CloudifyCliError(
+            "Timed out while entering maintenance mode. "
+            "Note that the manager is still entering maintenance mode"
+            " in the background. You can run "
+            "'cfy maintenance-mode status' to check the status.")
     logger.info("Run 'cfy maintenance-mode status' to check the "
                 "maintenance mode's status.\n")
 
@@ -151,5 +145,19 @@ def deactivate(logger, client):
     logger.info('Maintenance mode is off.')
 
 
-def _is_timeout(timeout, deadline):
-    return timeout > 0 and time.time() > deadline
+def wait_for_maintenance_mode(client, timeout=None, logger=None):
+    """Poll the manager until it's in maintenance mode.
+
+    Return whether it is, or False if it's not by `timeout` seconds (None
+    means there's no timeout). The status is logged before each wait, if
+    `logger` is passed.
+    """
+    policy = RetryPolicy(base_delay=DEFAULT_TIMEOUT_INTERVAL,
+                         max_delay=MAX_POLL_INTERVAL,
+                         deadline=timeout)
+    for _ in policy.attempts('maintenance mode status'):
+        if client.maintenance_mode.status().status == MAINTENANCE_MODE_ACTIVE:
+            return True
+        if logger:
+            logger.info('Waiting for maintenance mode to be activated...')
+    return False
@@ -21,12 +21,16 @@ from cloudify_rest_client.exceptions import CloudifyClientError
 from .. import utils
 from ..cli import cfy
 from ..local import load_env
-from ..table import print_data
+from ..table import print_data, print_pages
+from ..pagination import list_pages
 from ..exceptions import CloudifyCliError
 
 
 NODE_INSTANCE_COLUMNS = ['id', 'deployment_id', 'host_id', 'node_id', 'state',
                          'permission', 'tenant_name']
+# The fields the manager can filter node-instances by
+NODE_INSTANCE_FILTER_FIELDS = ['id', 'deployment_id', 'host_id', 'node_id',
+                               'state']
 
 
 @cfy.group(name='node-instances')
@@ -79,6 +83,9 @@ def get(node_instance_id, logger, client, tenant_name):
 @cfy.options.node_name
 @cfy.options.sort_by('node_id')
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.tenant_name(required=False)
 @cfy.options.all_tenants
 @cfy.options.verbose()
@@ -88,6 +95,9 @@ def list(deployment_id,
          node_name,
          sort_by,
          descending,
+         filters,
+         page_size,
+         prefetch,
          all_tenants,
          logger,
          client,
@@ -105,7 +115,13 @@ def list(deployment_id,
                 deployment_id))
         else:
             logger.info('Listing all instances...')
-        node_instances = client.node_instances.list(
+        pages = list_pages(
+            client.node_instances.list,
+            page_size=page_size,
+            prefetch=prefetch,
+            include=NODE_INSTANCE_COLUMNS,
+            filters=filters,
+            server_filter_fields=NODE_INSTANCE_FILTER_FIELDS,
             deployment_id=deployment_id,
             node_name=node_name,
             sort=sort_by,
@@ -117,7 +133,7 @@ def list(deployment_id,
         raise CloudifyCliError('Deployment {0} does not exist'.format(
             deployment_id))
 
-    print_data(NODE_INSTANCE_COLUMNS, node_instances, 'Node-instances:')
+    print_pages(NODE_INSTANCE_COLUMNS, pages, 'Node-instances:')
 
 
 @cfy.command(name='node-instances',
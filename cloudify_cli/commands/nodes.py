@@ -16,7 +16,8 @@
 
 from cloudify_rest_client.exceptions import CloudifyClientError
 
-from ..table import print_data
+from ..table import print_data, print_pages
+from ..pagination import list_pages
 from .. import utils
 from ..cli import cfy
 from ..exceptions import CloudifyCliError
@@ -25,6 +26,9 @@ from ..exceptions import CloudifyCliError
 NODE_COLUMNS = ['id', 'deployment_id', 'blueprint_id', 'host_id', 'type',
                 'number_of_instances', 'planned_number_of_instances',
                 'permission', 'tenant_name']
+# The fields the manager can filter nodes by
+NODE_FILTER_FIELDS = ['id', 'deployment_id', 'blueprint_id', 'host_id', 'type',
+                      'number_of_instances', 'planned_number_of_instances']
 
 
 @cfy.group(name='nodes')
@@ -94,13 +98,24 @@ def get(node_id, deployment_id, logger, client, tenant_name):
 @cfy.options.deployment_id()
 @cfy.options.sort_by('deployment_id')
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.tenant_name(required=False)
 @cfy.options.all_tenants
 @cfy.options.verbose()
 @cfy.pass_logger
 @cfy.pass_client()
-def list(deployment_id, sort_by, descending, tenant_name, all_tenants,
-         logger, client):
+def list(deployment_id,
+         sort_by,
+         descending,
+         filters,
+         page_size,
+         prefetch,
+         tenant_name,
+         all_tenants,
+         logger,
+         client):
     """List nodes
 
     If `DEPLOYMENT_ID` is provided, list nodes for that deployment.
@@ -114,15 +129,20 @@ def list(deployment_id, sort_by, descending, tenant_name, all_tenants,
                 deployment_id))
         else:
             logger.info('Listing all nodes...')
-        nodes = client.nodes.list(
-            deployment_id=deployment_id,
-            sort=sort_by,
-            is_descending=descending,
-            _all_tenants=all_tenants)
+        pages = list_pages(client.nodes.list,
+                           page_size=page_size,
+                           prefetch=prefetch,
+                           include=NODE_COLUMNS,
+                           filters=filters,
+                           server_filter_fields=NODE_FILTER_FIELDS,
+                           deployment_id=deployment_id,
+                           sort=sort_by,
+                           is_descending=descending,
+                           _all_tenants=all_tenants)
     except CloudifyClientError as e:
         if not e.status_code != 404:
             raise
         raise CloudifyCliError('Deployment {0} does not exist'.format(
             deployment_id))
 
-    print_data(NODE_COLUMNS, nodes, 'Nodes:')
+    print_pages(NODE_COLUMNS, pages, 'Nodes:')
@@ -17,15 +17,20 @@
 import tarfile
 from urlparse import urlparse
 
-from ..table import print_data
+from ..table import print_data, print_pages
+from ..pagination import list_pages
 from .. import utils
-from ..cli import helptexts, cfy
+from ..cli import helptexts, cfy, completion_cache
 from ..exceptions import CloudifyCliError
 
 
 PLUGIN_COLUMNS = ['id', 'package_name', 'package_version', 'distribution',
                   'supported_platform', 'distribution_release', 'uploaded_at',
                   'permission', 'tenant_name']
+# The fields the manager can filter plugins by
+PLUGIN_FILTER_FIELDS = ['id', 'package_name', 'package_version',
+                        'distribution', 'supported_platform',
+                        'distribution_release']
 EXCLUDED_COLUMNS = ['archive_name', 'distribution_version', 'excluded_wheels',
                     'package_source', 'supported_py_versions', 'wheels']
 
@@ -92,6 +97,7 @@ def delete(plugin_id, force, logger, client, tenant_name):
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Deleting plugin {0}...'.format(plugin_id))
     client.plugins.delete(plugin_id=plugin_id, force=force)
+    completion_cache.invalidate('plugins')
     logger.info('Plugin deleted')
 
 
@@ -123,6 +129,7 @@ def upload(ctx, plugin_path, private_resource, logger, client, tenant_name):
     plugin = client.plugins.upload(plugin_path,
                                    private_resource,
                                    progress_handler)
+    completion_cache.invalidate('plugins')
     logger.info("Plugin uploaded. The plugin's id is {0}".format(plugin.id))
 
 
@@ -175,24 +182,46 @@ def get(plugin_id, logger, client, tenant_name):
                  short_help='List plugins [manager only]')
 @cfy.options.sort_by('uploaded_at')
 @cfy.options.descending
+@cfy.options.filters
+@cfy.options.page_size
+@cfy.options.prefetch
 @cfy.options.tenant_name(required=False)
 @cfy.options.all_tenants
 @cfy.options.verbose()
 @cfy.assert_manager_active()
 @cfy.pass_client()
 @cfy.pass_logger
-def list(sort_by, descending, tenant_name, all_tenants, logger, client):
+def list(sort_by,
+         descending,
+         filters,
+         page_size,
+         prefetch,
+         tenant_name,
+         all_tenants,
+         logger,
+         client):
     """List all plugins on the manager
     """
     if tenant_name:
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Listing all plugins...')
-    plugins_list = client.plugins.list(sort=sort_by,
-                                       is_descending=descending,
-                                       _all_tenants=all_tenants)
-    for plugin in plugins_list:
-        _transform_plugin_response(plugin)
-    print_data(PLUGIN_COLUMNS, plugins_list, 'Plugins:')
+    pages = list_pages(client.plugins.list,
+                       page_size=page_size,
+                       prefetch=prefetch,
+                       include=PLUGIN_COLUMNS,
+                       filters=filters,
+                       server_filter_fields=PLUGIN_FILTER_FIELDS,
+                       sort=sort_by,
+                       is_descending=descending,
+                       _all_tenants=all_tenants)
+
+    def transform(pages):
+        for page in pages:
+            for plugin in page:
+                _transform_plugin_response(plugin)
+            yield page
+
+    print_pages(PLUGIN_COLUMNS, transform(pages), 'Plugins:')
 
 
 @plugins.command(name='add-permission', short_help='Add permissions to users')
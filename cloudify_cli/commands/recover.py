@@ -19,7 +19,8 @@ import os
 from .. import exceptions
 from ..cli import helptexts, cfy
 from ..bootstrap import bootstrap as bs
-from ..env import profile, get_profile_context
+from .. import env
+from ..env import get_profile_context
 
 CLOUDIFY_MANAGER_PK_PATH_ENVAR = 'CLOUDIFY_MANAGER_PRIVATE_KEY_PATH'
 
@@ -63,13 +64,13 @@ def recover(snapshot_path,
                 "exist: {1}".format(CLOUDIFY_MANAGER_PK_PATH_ENVAR, key_path)
             )
     else:
-        if not profile.ssh_key:
+        if not env.profile.ssh_key:
             raise exceptions.CloudifyValidationError(
                 "Cannot perform recovery. manager key file not found. Set "
                 "the manager private key path via the {0} environment "
                 "variable".format(CLOUDIFY_MANAGER_PK_PATH_ENVAR)
             )
-        key_path = os.path.expanduser(profile.ssh_key)
+        key_path = os.path.expanduser(env.profile.ssh_key)
         if not os.path.isfile(key_path):
             # manager key file path exists in context but does not exist
             # in the file system. fail now.
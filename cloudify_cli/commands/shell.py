@@ -0,0 +1,189 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+import os
+import sys
+import shlex
+
+import click
+
+from .. import env
+from .. import timings
+from ..cli import cfy
+from ..exceptions import CloudifyCliError
+from ..logger import (NO_VERBOSE,
+                      configure_loggers,
+                      get_global_verbosity,
+                      set_global_verbosity_level)
+
+EXIT_COMMANDS = ('exit', 'quit')
+
+
+@cfy.command(name='shell',
+             short_help='Run commands in an interactive session')
+@cfy.options.verbose()
+@cfy.pass_logger
+def shell(logger):
+    """Run CLI commands in an interactive session
+
+    Commands are entered without the `cfy` prefix (e.g. `blueprints list`)
+    and are all executed by the same process. This saves the start up time
+    of every command, and allows reusing the connections to the manager
+    between commands.
+
+    Commands can also be piped into the shell, one per line
+    (e.g. `cfy shell < commands.txt`).
+
+    Type `exit` or press Ctrl-D to end the session.
+    """
+    interactive = sys.stdin.isatty()
+    if interactive:
+        _enable_history()
+        logger.info('Type `exit` or press Ctrl-D to end the session')
+
+    session = Session()
+    while True:
+        try:
+            line = _read_line(session.prompt if interactive else '')
+        except EOFError:
+            break
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+
+        if line.strip() in EXIT_COMMANDS:
+            break
+        session.run(line)
+
+    if interactive:
+        click.echo()
+    elif session.status:
+        # When running a script, return the status of the last command
+        sys.exit(session.status)
+
+
+class Session(object):
+    """The state kept between the commands of a shell session.
+
+    All of the commands of a session reuse the same REST clients (see
+    `env.get_rest_client`). The profile is only reloaded when a command
+    changes it (e.g. `cfy profiles use`).
+    """
+
+    def __init__(self):
+        self.status = 0
+        self._profile_state = _get_profile_state()
+
+    @property
+    def prompt(self):
+        return 'cfy [{0}]> '.format(env.get_active_profile() or 'local')
+
+    def run(self, line):
+        """Run a single command, and return its exit code"""
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo('Invalid command: {0}'.format(e), err=True)
+            self.status = 2
+            return self.status
+
+        # Allow writing commands exactly as they're written in a terminal
+        if args and args[0] == 'cfy':
+            del args[0]
+        if not args:
+            return self.status
+
+        try:
+            timings.reset()
+            self.status = _invoke(args)
+        finally:
+            # the next command may use a different config or environment
+            # (e.g. of the HTTP cache, or of retrying requests)
+            env.clear_rest_clients(keep_connections=True)
+            _reset_verbosity()
+            self._reload_profile_if_changed()
+        return self.status
+
+    def _reload_profile_if_changed(self):
+        profile_state = _get_profile_state()
+        if profile_state == self._profile_state:
+            return
+        self._profile_state = profile_state
+
+        from ..main import _register_commands
+
+        env.profile = env.get_profile_context(suppress_error=True)
+        # Switching between a manager and the local profile changes the
+        # commands that are available
+        _register_commands()
+
+
+def _invoke(args):
+    from ..main import _cfy
+
+    try:
+        _cfy.main(args=args, prog_name='cfy', standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo('Aborted!', err=True)
+        return 1
+    except SystemExit as e:
+        # e.g. after printing the help of a command
+        return e.code if isinstance(e.code, int) else int(bool(e.code))
+    except Exception:
+        # This is how an error would have been reported had the command
+        # been run on its own (see `cfy.set_cli_except_hook`)
+        sys.excepthook(*sys.exc_info())
+        return 1
+    return 0
+
+
+def _get_profile_state():
+    """Return what identifies the active profile, and its current version"""
+    profile_name = env.get_active_profile()
+    try:
+        stat = os.stat(env.get_context_path(profile_name))
+    except (OSError, CloudifyCliError):
+        return profile_name, None
+    return profile_name, stat.st_mtime, stat.st_size
+
+
+def _reset_verbosity():
+    # Verbosity is only set when the `-v` flag is passed, so it has to be
+    # reset for it not to affect the following commands
+    if get_global_verbosity() != NO_VERBOSE:
+        set_global_verbosity_level(NO_VERBOSE)
+        configure_loggers()
+
+
+def _read_line(prompt):
+    if prompt:
+        return raw_input(prompt)
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError()
+    return line
+
+
+def _enable_history():
+    try:
+        # Importing readline is enough for `raw_input` to support
+        # history and line editing
+        import readline  # NOQA
+    except ImportError:
+        pass
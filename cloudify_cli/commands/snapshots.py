@@ -16,7 +16,7 @@
 
 from ..table import print_data
 from .. import utils
-from ..cli import helptexts, cfy
+from ..cli import helptexts, cfy, completion_cache
 
 SNAPSHOT_COLUMNS = ['id', 'created_at', 'status', 'error', 'permission'
                     'tenant_name']
@@ -97,6 +97,7 @@ def create(snapshot_id,
                                         include_metrics,
                                         not exclude_credentials,
                                         private_resource)
+    completion_cache.invalidate('snapshots')
     logger.info("Started workflow execution. The execution's id is {0}".format(
         execution.id))
 
@@ -117,6 +118,7 @@ def delete(snapshot_id, logger, client, tenant_name):
         logger.info('Explicitly using tenant `{0}`'.format(tenant_name))
     logger.info('Deleting snapshot {0}...'.format(snapshot_id))
     client.snapshots.delete(snapshot_id)
+    completion_cache.invalidate('snapshots')
     logger.info('Snapshot deleted successfully')
 
 
@@ -149,6 +151,7 @@ def upload(snapshot_path,
                                        snapshot_id,
                                        private_resource,
                                        progress_handler)
+    completion_cache.invalidate('snapshots')
     logger.info("Snapshot uploaded. The snapshot's id is {0}".format(
         snapshot.id))
 
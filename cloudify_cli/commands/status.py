@@ -19,7 +19,7 @@ from cloudify_rest_client.exceptions import CloudifyClientError, \
 
 from ..table import print_data
 from ..cli import cfy
-from ..env import profile
+from .. import env
 
 STATUS_COLUMNS = ['service', 'status']
 
@@ -32,7 +32,7 @@ STATUS_COLUMNS = ['service', 'status']
 def status(logger, client):
     """Show the status of the manager
     """
-    rest_host = profile.manager_ip
+    rest_host = env.profile.manager_ip
     logger.info('Retrieving manager services status... [ip={0}]'.format(
         rest_host))
     try:
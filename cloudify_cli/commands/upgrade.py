@@ -15,7 +15,6 @@
 ############
 
 import os
-import time
 import json
 import shutil
 import tempfile
@@ -25,7 +24,7 @@ from .. import local
 from .. import utils
 from ..cli import cfy
 from .. import exceptions
-from ..env import profile
+from .. import env
 from . import maintenance_mode
 from ..bootstrap import bootstrap as bs
 from ..bootstrap.bootstrap import load_env
@@ -68,7 +67,7 @@ def upgrade(blueprint_path,
     `BLUEPRINT_PATH` is the path of the manager blueprint to use for upgrade.
     """
 
-    manager_ip = profile.manager_ip
+    manager_ip = env.profile.manager_ip
     verify_and_wait_for_maintenance_mode_activation(client)
 
     if skip_validations:
@@ -149,7 +148,7 @@ def upgrade(blueprint_path,
 
     logger.info('Upgrade complete')
     logger.info('Manager is up at {0}'.format(
-        profile.manager_ip))
+        env.profile.manager_ip))
 
 
 def update_inputs(inputs=None):
@@ -158,7 +157,7 @@ def update_inputs(inputs=None):
     inputs.update({'ssh_key_filename': _load_ssh_key(inputs)})
     inputs.update({'ssh_user': _load_ssh_user(inputs)})
     inputs.update({'ssh_port': _load_ssh_port(inputs)})
-    inputs.update({'public_ip': profile.manager_ip})
+    inputs.update({'public_ip': env.profile.manager_ip})
     return inputs
 
 
@@ -172,7 +171,7 @@ def _load_private_ip(inputs):
 
 def _load_ssh_key(inputs):
     try:
-        key_path = inputs.get('ssh_key_filename') or profile.ssh_key
+        key_path = inputs.get('ssh_key_filename') or env.profile.ssh_key
         return os.path.expanduser(key_path)
     except Exception:
         raise exceptions.CloudifyCliError('SSH key must be provided for '
@@ -181,7 +180,7 @@ def _load_ssh_key(inputs):
 
 def _load_ssh_user(inputs):
     try:
-        return inputs.get('ssh_user') or profile.ssh_user
+        return inputs.get('ssh_user') or env.profile.ssh_user
     except Exception:
         raise exceptions.CloudifyCliError('SSH user must be provided for '
                                           'the upgrade/rollback process')
@@ -189,7 +188,7 @@ def _load_ssh_user(inputs):
 
 def _load_ssh_port(inputs):
     try:
-        return inputs.get('ssh_port') or profile.ssh_port
+        return inputs.get('ssh_port') or env.profile.ssh_port
     except Exception:
         raise exceptions.CloudifyCliError('SSH port must be provided for '
                                           'the upgrade/rollback process')
@@ -224,8 +223,4 @@ def put_workflow_state_file(is_upgrade, key_filename, user, port):
 
 
 def _wait_for_maintenance(client, logger):
-    curr_status = client.maintenance_mode.status().status
-    while curr_status != maintenance_mode.MAINTENANCE_MODE_ACTIVE:
-        logger.info('Waiting for maintenance mode to be activated...')
-        time.sleep(maintenance_mode.DEFAULT_TIMEOUT_INTERVAL)
-        curr_status = client.maintenance_mode.status().status
+    maintenance_mode.wait_for_maintenance_mode(client, logger=logger)
@@ -0,0 +1,126 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Run calls concurrently, and limit the rate of the requests they send.
+
+Commands which act on many resources at once (e.g. installing the agents
+of all deployments) run a call per resource on a fixed number of threads,
+rather than a thread per resource, so that the number of connections to
+the manager (and of workflows running on it) stays bounded however many
+resources there are.
+
+As each of these calls may send many requests (e.g. polling an execution),
+the rate of the requests all of them send together can be limited as well,
+by a token bucket shared by the rest client's threads (see
+`SessionHTTPClient.rate_limiter`).
+"""
+
+import sys
+import time
+import threading
+from Queue import Queue, Empty
+
+from . import timings
+
+
+class TokenBucket(object):
+    """Allow up to `rate` calls per second, in bursts of up to `capacity`.
+
+    The bucket starts full, and is refilled at `rate` tokens per second.
+    Each call to `acquire` takes a token, waiting for one if there are none.
+    The tokens are handed out in the order they were asked for: a caller
+    which has to wait reserves the next token, so callers arriving later
+    wait for the ones after it.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('rate must be positive, not {0}'.format(rate))
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.waits = 0
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self, name=None):
+        """Take a token, sleeping until there is one if there are none"""
+        with self._lock:
+            now = time.time()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate
+            if delay > 0:
+                self.waits += 1
+        if delay > 0:
+            with timings.span(timings.RATE_LIMIT, name):
+                time.sleep(delay)
+
+
+def imap_unordered(func, items, size):
+    """Yield `(item, result, exc_info)` of calling `func` with each item.
+
+    The calls are made by (up to) `size` threads, and each is yielded once
+    it returns, in the order they return. If a call raises, its `result` is
+    None and `exc_info` is what `sys.exc_info()` returned; otherwise
+    `exc_info` is None.
+
+    If the iteration stops early, the calls which didn't start yet are
+    never made, while the ones running are left to end on their own (the
+    threads are daemons, so they don't keep the process from exiting).
+    """
+    items = list(items)
+    tasks = Queue()
+    results = Queue()
+    stopped = threading.Event()
+    for item in items:
+        tasks.put(item)
+
+    def work():
+        while not stopped.is_set():
+            try:
+                item = tasks.get_nowait()
+            except Empty:
+                return
+            try:
+                results.put((item, func(item), None))
+            except Exception:
+                results.put((item, None, sys.exc_info()))
+
+    for _ in range(min(size, len(items))):
+        thread = threading.Thread(target=work)
+        thread.daemon = True
+        thread.start()
+    try:
+        for _ in items:
+            yield get_interruptibly(results)
+    finally:
+        stopped.set()
+
+
+def get_interruptibly(queue):
+    """Return the next item of `queue`, waiting for it if there's none.
+
+    Waiting without a timeout can't be interrupted (e.g. by ^C), so it
+    waits a second at a time.
+    """
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            continue
@@ -18,10 +18,8 @@
 import os
 import yaml
 
-from dsl_parser import utils as dsl_parser_utils
-from dsl_parser.constants import IMPORT_RESOLVER_KEY
-
 from .. import env
+from .. import timings
 
 
 CLOUDIFY_CONFIG_PATH = os.path.join(env.CLOUDIFY_WORKDIR, 'config.yaml')
@@ -45,6 +43,7 @@ class CloudifyConfig(object):
     def __init__(self):
         with open(CLOUDIFY_CONFIG_PATH) as f:
             self._config = yaml.safe_load(f.read())
+        self._import_resolver = None
 
     @property
     def colors(self):
@@ -64,41 +63,99 @@ class CloudifyConfig(object):
 
     @property
     def local_import_resolver(self):
+        from dsl_parser.constants import IMPORT_RESOLVER_KEY
         return self._config.get(IMPORT_RESOLVER_KEY, {})
 
+    @property
+    def http_cache(self):
+        return self._config.get('http_cache') or {}
+
+    @property
+    def retry(self):
+        return self._config.get('retry') or {}
+
+    @property
+    def events(self):
+        return self._config.get('events') or {}
+
     @property
     def validate_definitions_version(self):
         return self._config.get('validate_definitions_version', True)
 
+    @property
+    def import_resolver(self):
+        """The import resolver, as configured by `local_import_resolver`.
+
+        The resolver is created once and reused on subsequent calls.
+        """
+        if self._import_resolver is None:
+            # dsl_parser is only needed by local commands, so it's imported
+            # here rather than by every command that reads the config
+            from dsl_parser import utils as dsl_parser_utils
+            self._import_resolver = dsl_parser_utils.create_import_resolver(
+                self.local_import_resolver)
+        return self._import_resolver
+
+
+_config_cache = {}
+
+
+def get_config():
+    """Return the CloudifyConfig of the current working directory.
+
+    The config file is only parsed once per process, and is parsed again
+    only if it was changed since (judging by its modification time and size).
+    """
+    stat = os.stat(CLOUDIFY_CONFIG_PATH)
+    cache_key = (CLOUDIFY_CONFIG_PATH, stat.st_mtime, stat.st_size)
+    if _config_cache.get('key') != cache_key:
+        with timings.span(timings.CONFIG):
+            _config_cache['config'] = CloudifyConfig()
+        _config_cache['key'] = cache_key
+    return _config_cache['config']
+
 
 def is_use_colors():
     if not env.is_initialized():
         return False
 
-    config = CloudifyConfig()
-    return config.colors
+    return get_config().colors
 
 
 def is_auto_generate_ids():
     if not env.is_initialized():
         return False
 
-    config = CloudifyConfig()
-    return config.auto_generate_ids
+    return get_config().auto_generate_ids
 
 
 def get_import_resolver():
     if not env.is_initialized():
         return None
 
-    config = CloudifyConfig()
     # get the resolver configuration from the config file
-    local_import_resolver = config.local_import_resolver
-    return dsl_parser_utils.create_import_resolver(local_import_resolver)
+    return get_config().import_resolver
 
 
 def is_validate_definitions_version():
     if not env.is_initialized():
         return True
-    config = CloudifyConfig()
-    return config.validate_definitions_version
+    return get_config().validate_definitions_version
+
+
+def get_http_cache_config():
+    if not env.is_initialized():
+        return {}
+    return get_config().http_cache
+
+
+def get_retry_config():
+    if not env.is_initialized():
+        return {}
+    return get_config().retry
+
+
+def get_events_config():
+    if not env.is_initialized():
+        return {}
+    return get_config().events
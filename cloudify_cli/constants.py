@@ -15,6 +15,8 @@
 ############
 
 CLOUDIFY_PROFILE_CONTEXT_FILE_NAME = 'context'
+CLOUDIFY_PROFILE_CONTEXT_CACHE_FILE_NAME = 'context.cache'
+CLUSTER_STATE_FILE_NAME = 'cluster-state.json'
 CLOUDIFY_BASE_DIRECTORY_NAME = '.cloudify'
 CONFIG_FILE_NAME = 'cloudify-config.yaml'
 DEFAULTS_CONFIG_FILE_NAME = 'cloudify-config.defaults.yaml'
@@ -33,6 +35,40 @@ REMOTE_EXECUTION_PORT = 22
 
 POLICY_ENGINE_START_TIMEOUT = 30
 
+# How long the manager's version is cached in the profile, in seconds
+MANAGER_VERSION_CACHE_TTL = 3600
+# The manager's version is fetched with a short timeout, as `cfy --version`
+# shouldn't hang when the manager is unreachable
+MANAGER_VERSION_TIMEOUT = 3
+
+# The number of managers (e.g. cluster nodes) connections are kept to, and
+# the number of connections kept to each
+REST_CONNECTION_POOLS = 10
+REST_CONNECTION_POOL_SIZE = 20
+
+# The number of resources the list commands fetch per request (the
+# manager's maximum)
+DEFAULT_PAGE_SIZE = 1000
+
+# Responses at least this large (or of an unknown size) are decoded as
+# they're read, a chunk of this many bytes at a time
+JSON_STREAM_MIN_SIZE = 1024 * 1024
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+
+# The minimal interval between writes of a cluster's state file by the same
+# process, in seconds (changes made in between are written on exit)
+CLUSTER_STATE_WRITE_INTERVAL = 10
+
+# The events shown as they're fetched are written once this many bytes of
+# them were rendered, or this many seconds since they were last written
+EVENTS_FLUSH_SIZE = 64 * 1024
+EVENTS_FLUSH_INTERVAL = 0.5
+
+# The number of deployments `cfy agents install` installs agents on at the
+# same time, and the number of requests per second it sends, at most
+AGENTS_INSTALL_CONCURRENCY = 10
+AGENTS_INSTALL_MAX_REQUEST_RATE = 20
+
 DEFAULT_REST_PORT = 80
 SECURED_REST_PORT = 443
 DEFAULT_REST_PROTOCOL = 'http'
@@ -62,9 +98,13 @@ IGNORED_LOCAL_WORKFLOW_MODULES = (
 
 CLOUDIFY_AUTHENTICATION_HEADER = 'Authorization'
 CLOUDIFY_TENANT_HEADER = 'Tenant'
+CLOUDIFY_VERSION_HEADER = 'X-Cloudify-Version'
 CLOUDIFY_USERNAME_ENV = 'CLOUDIFY_USERNAME'
 CLOUDIFY_PASSWORD_ENV = 'CLOUDIFY_PASSWORD'
 CLOUDIFY_TENANT_ENV = 'CLOUDIFY_TENANT'
+CLOUDIFY_TIMINGS_ENV = 'CFY_TIMINGS'
+CLOUDIFY_TIMINGS_TRACE_ENV = 'CFY_TIMINGS_TRACE'
+CLOUDIFY_HTTP_CACHE_ENV = 'CFY_HTTP_CACHE'
 DEFAULT_TENANT_NAME = 'default_tenant'
 
 PUBLIC_REST_CERT = 'public_rest_cert.crt'
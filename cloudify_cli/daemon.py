@@ -0,0 +1,667 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+"""Run CLI commands in a warm, long running, background process.
+
+The daemon (see `cfy daemon start`) imports the CLI once, and then serves
+commands over a Unix domain socket in the CLI's working directory. When
+`CFY_DAEMON` is set to `true`, the `cfy` executable sends its arguments,
+environment, working directory and stdin to the daemon, and writes back the
+stdout, stderr and exit code it receives. If the daemon isn't running, the
+command is run in-process, as usual.
+
+Each command is run by a child process, forked from the daemon once it
+imported the CLI, so that commands run at the same time (e.g. a long
+`cfy executions start` doesn't hold up a `cfy status` in another terminal),
+and none of them can change the global state the next one starts with.
+
+This module is imported by the `cfy` executable before anything else, so it
+must not import anything which is slow to import at the module level.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import socket
+import signal
+import struct
+import threading
+import traceback
+
+from . import timings
+from . import constants
+
+DAEMON_ENV = 'CFY_DAEMON'
+SOCKET_FILE_NAME = 'daemon.sock'
+PID_FILE_NAME = 'daemon.pid'
+
+# Frames sent between the launcher and the daemon. Each frame is its type,
+# the length of its payload, and then the payload itself
+FRAME_HEADER = struct.Struct('!cI')
+REQUEST = 'r'
+STDIN = 'i'
+STDOUT = 'o'
+STDERR = 'e'
+EXIT = 'x'
+FALLBACK = 'f'
+
+# Environment variables which are only read by the CLI when it's imported.
+# A daemon can't serve a command which has these set differently.
+IMPORT_TIME_ENV = ('CFY_WORKDIR', 'CFY_MULTIPLE_BLUEPRINTS')
+
+
+def launch():
+    """The entry point of the `cfy` executable"""
+    if _should_forward(sys.argv[1:]):
+        exit_code = forward(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from .main import _cfy
+    _cfy()
+
+
+def _should_forward(args):
+    if os.environ.get(DAEMON_ENV) != 'true':
+        return False
+    if not hasattr(socket, 'AF_UNIX'):
+        return False
+    # Interactive input (e.g. password prompts) has to be read from the
+    # terminal, which the daemon doesn't have
+    if sys.stdin.isatty():
+        return False
+    # The daemon shouldn't be used to manage itself
+    command = next((arg for arg in args if not arg.startswith('-')), '')
+    return not (len(command) > 1 and 'daemon'.startswith(command))
+
+
+def get_workdir():
+    # The same as `env.CLOUDIFY_WORKDIR`, which isn't used here as importing
+    # `env` is much of what the launcher is trying to avoid
+    return os.path.join(
+        os.environ.get('CFY_WORKDIR', os.path.expanduser('~')),
+        constants.CLOUDIFY_BASE_DIRECTORY_NAME)
+
+
+def get_socket_path():
+    return os.path.join(get_workdir(), SOCKET_FILE_NAME)
+
+
+def get_pid_file_path():
+    return os.path.join(get_workdir(), PID_FILE_NAME)
+
+
+def get_pid():
+    """Return the pid of the running daemon, or None if it isn't running"""
+    if not is_running():
+        return None
+    try:
+        with open(get_pid_file_path()) as f:
+            return int(f.read().strip())
+    except (IOError, ValueError):
+        return None
+
+
+def is_running(socket_path=None):
+    sock = _connect(socket_path or get_socket_path())
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+def forward(args,
+            socket_path=None,
+            stdin=None,
+            stdout=None,
+            stderr=None):
+    """Run a command by the daemon, and return its exit code.
+
+    None is returned if the daemon can't run the command (e.g. it isn't
+    running), in which case nothing was written to stdout or stderr, and the
+    command should be run in-process.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+
+    try:
+        request = json.dumps({
+            'args': args,
+            'prog_name': os.path.basename(sys.argv[0]) or 'cfy',
+            'env': dict(os.environ),
+            'cwd': os.getcwd(),
+            'stdout': _describe_stream(stdout),
+            'stderr': _describe_stream(stderr),
+        })
+    except UnicodeDecodeError:
+        # Arguments or environment variables which aren't valid UTF-8
+        return None
+
+    sock = _connect(socket_path or get_socket_path())
+    if sock is None:
+        return None
+
+    try:
+        _send_frame(sock, REQUEST, request)
+        while True:
+            frame_type, data = _receive_frame(sock)
+            if frame_type == STDOUT:
+                stdout.write(data)
+                stdout.flush()
+            elif frame_type == STDERR:
+                stderr.write(data)
+                stderr.flush()
+            elif frame_type == STDIN:
+                _send_frame(sock, STDIN, _read_input(stdin, int(data)))
+            elif frame_type == EXIT:
+                return int(data)
+            elif frame_type == FALLBACK:
+                return None
+            else:
+                # The daemon died mid-command
+                stderr.write('The CLI daemon closed the connection '
+                             'unexpectedly\n')
+                return 1
+    finally:
+        sock.close()
+
+
+def _describe_stream(stream):
+    description = {
+        'isatty': _isatty(stream),
+        'encoding': getattr(stream, 'encoding', None),
+    }
+    if description['isatty']:
+        from backports.shutil_get_terminal_size import get_terminal_size
+        description['columns'], description['lines'] = get_terminal_size()
+    return description
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _read_input(stdin, size):
+    try:
+        fd = stdin.fileno()
+    except (AttributeError, ValueError):
+        return stdin.read(size)
+    try:
+        return os.read(fd, size)
+    except OSError:
+        return ''
+
+
+def _connect(socket_path):
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        sock.close()
+        return None
+    return sock
+
+
+def _send_frame(sock, frame_type, data=''):
+    # a single call, so that the frame is sent as a whole by a `_Connection`
+    sock.sendall(FRAME_HEADER.pack(frame_type, len(data)) + data)
+
+
+def _receive_frame(sock):
+    """Return the type and payload of the next frame.
+
+    (None, None) is returned if the connection was closed.
+    """
+    header = _receive_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None, None
+    frame_type, size = FRAME_HEADER.unpack(header)
+    data = _receive_exactly(sock, size)
+    if data is None:
+        return None, None
+    return frame_type, data
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+class _Shutdown(BaseException):
+    """Stop the daemon.
+
+    This isn't a SystemExit, so that it isn't mistaken for the exit of the
+    command that is being run when the daemon is stopped.
+    """
+
+
+class _Connection(object):
+    """A launcher's connection, which several threads may send frames on.
+
+    The command may write to stdout and stderr from several threads (e.g.
+    the threads fetching pages, or installing agents), so each frame is
+    sent while holding a lock, rather than interleaved with the others.
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._send_lock = threading.Lock()
+
+    def sendall(self, data):
+        with self._send_lock:
+            self._sock.sendall(data)
+
+    def recv(self, size):
+        return self._sock.recv(size)
+
+    def close(self):
+        self._sock.close()
+
+
+class _OutputProxy(object):
+    """Stands for the launcher's stdout/stderr while running a command"""
+
+    def __init__(self, sock, frame_type, description):
+        self._sock = sock
+        self._frame_type = frame_type
+        self._isatty = description['isatty']
+        self.encoding = description['encoding']
+        self.closed = False
+
+    def write(self, data):
+        if isinstance(data, unicode):
+            data = data.encode(self.encoding or 'ascii')
+        if data:
+            _send_frame(self._sock, self._frame_type, data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self._isatty
+
+
+class _InputProxy(object):
+    """Stands for the launcher's stdin while running a command.
+
+    Input is only requested from the launcher when it's read, so that
+    the launcher's stdin isn't consumed by commands which don't read it.
+    """
+
+    chunk_size = 4096
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._buffer = ''
+        self._eof = False
+        self.closed = False
+        self.encoding = None
+
+    def _fill(self):
+        if self._eof:
+            return False
+        _send_frame(self._sock, STDIN, str(self.chunk_size))
+        frame_type, data = _receive_frame(self._sock)
+        if frame_type != STDIN or not data:
+            self._eof = True
+            return False
+        self._buffer += data
+        return True
+
+    def read(self, size=-1):
+        while (size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self, size=-1):
+        while '\n' not in self._buffer and self._fill():
+            pass
+        end = self._buffer.find('\n') + 1 or len(self._buffer)
+        if size >= 0:
+            end = min(end, size)
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def readlines(self):
+        return list(self)
+
+    def __iter__(self):
+        return iter(self.readline, '')
+
+    def isatty(self):
+        return False
+
+
+class Server(object):
+    """Serve CLI commands over a Unix domain socket.
+
+    `serve_forever` runs each command in a child process of its own (see
+    `_fork`). `handle` runs a command in this process; the global state
+    that a command might change (the active profile, verbosity, the except
+    hook, the standard streams, etc.) is restored after it, so that each
+    command runs just as it would have in a new process.
+    """
+
+    def __init__(self, socket_path=None, pid_file_path=None):
+        self.socket_path = socket_path or get_socket_path()
+        self.pid_file_path = pid_file_path or get_pid_file_path()
+        self._socket = None
+        self._environ = None
+        self._cwd = None
+        self._globals = None
+
+    def start(self):
+        """Preload the CLI and start listening (without serving yet)"""
+        self._preload()
+        self._environ = dict(os.environ)
+        self._cwd = os.getcwd()
+        self._globals = _snapshot_globals()
+
+        workdir = os.path.dirname(self.socket_path)
+        if not os.path.isdir(workdir):
+            os.makedirs(workdir)
+        if os.path.exists(self.socket_path):
+            # A leftover of a daemon which wasn't stopped properly
+            os.remove(self.socket_path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the current user should be able to run commands as itself
+        old_umask = os.umask(0o177)
+        try:
+            self._socket.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self._socket.listen(128)
+
+        with open(self.pid_file_path, 'w') as f:
+            f.write(str(os.getpid()))
+
+    def serve_forever(self):
+        def shutdown(*_):
+            raise _Shutdown()
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGCHLD, _reap_children)
+
+        try:
+            while True:
+                try:
+                    connection, _ = self._socket.accept()
+                except socket.error as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    raise
+                try:
+                    self._fork(connection)
+                finally:
+                    connection.close()
+        except _Shutdown:
+            pass
+        finally:
+            self.stop()
+
+    def _fork(self, connection):
+        """Handle `connection` in a child process.
+
+        The commands which are still running when the daemon is stopped
+        are left to end on their own.
+        """
+        try:
+            pid = os.fork()
+        except OSError:
+            self._log_error()
+            _send_frame(connection, FALLBACK)
+            return
+        if pid:
+            return
+
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # the command's own child processes are waited for by it
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            self._socket.close()
+            connection = _Connection(connection)
+            try:
+                self.handle(connection)
+            except Exception:
+                self._log_error()
+            finally:
+                connection.close()
+        finally:
+            os._exit(0)
+
+    def stop(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        for path in (self.socket_path, self.pid_file_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def handle(self, connection):
+        frame_type, data = _receive_frame(connection)
+        if frame_type != REQUEST:
+            return
+        request = _to_native(json.loads(data))
+
+        if not self._can_run(request):
+            _send_frame(connection, FALLBACK)
+            return
+        exit_code = self._run(request, connection)
+        _send_frame(connection, EXIT, str(exit_code))
+
+    def _can_run(self, request):
+        if not os.path.isdir(request['cwd']):
+            return False
+        return all(request['env'].get(name) == self._environ.get(name)
+                   for name in IMPORT_TIME_ENV)
+
+    def _run(self, request, connection):
+        import colorama.initialise
+        from . import env
+        from . import main
+        from . import logger
+
+        environ = dict(request['env'])
+        stdout = request['stdout']
+        if stdout['isatty']:
+            environ.setdefault('COLUMNS', str(stdout['columns']))
+            environ.setdefault('LINES', str(stdout['lines']))
+        os.environ.clear()
+        os.environ.update(environ)
+        os.chdir(request['cwd'])
+
+        sys.argv = [request['prog_name']] + request['args']
+        sys.stdin = _InputProxy(connection)
+        sys.stdout = _OutputProxy(connection, STDOUT, stdout)
+        sys.stderr = _OutputProxy(connection, STDERR, request['stderr'])
+        # colorama wraps the streams it found when it was first imported
+        colorama.initialise.orig_stdout = sys.stdout
+        colorama.initialise.orig_stderr = sys.stderr
+
+        try:
+            timings.reset()
+            # What would have happened when importing `main`
+            env.profile = env.get_profile_context(suppress_error=True)
+            main._register_commands()
+            logger.configure_loggers()
+
+            main._cfy.main(args=request['args'],
+                           prog_name=request['prog_name'])
+        except SystemExit as e:
+            return _get_exit_code(e.code)
+        except Exception:
+            # The exception would have reached the interpreter, which
+            # would have passed it to the except hook, and exited with 1
+            sys.excepthook(*sys.exc_info())
+            return 1
+        finally:
+            # What would have happened when exiting (the process which ran
+            # the command is ended by `os._exit`, see `Server._fork`)
+            env._save_unsaved_cluster_states()
+            # the next command may use a different config or environment
+            # (e.g. of the HTTP cache, or of retrying requests)
+            env.clear_rest_clients(keep_connections=True)
+            _restore_globals(self._globals)
+            os.chdir(self._cwd)
+            os.environ.clear()
+            os.environ.update(self._environ)
+        return 0
+
+    @staticmethod
+    def _preload():
+        from . import main
+
+        # Import all of the commands, so that they're warm as well
+        for name in main._cfy.list_commands(None):
+            main._cfy.get_command(None, name)
+
+    @staticmethod
+    def _log_error():
+        from .logger import DEFAULT_LOG_FILE
+
+        with open(DEFAULT_LOG_FILE, 'a') as log_file:
+            traceback.print_exc(file=log_file)
+
+
+def _reap_children(*_):
+    """Wait for the processes which ran commands, once they've ended"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except OSError:
+            # no more children
+            return
+        if not pid:
+            return
+
+
+def _to_native(value):
+    # JSON strings are decoded as unicode, while the CLI expects `str`s, just
+    # like it gets them from sys.argv and os.environ
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_native(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_to_native(key), _to_native(item))
+                    for key, item in value.items())
+    return value
+
+
+def _get_exit_code(code):
+    # The same as the interpreter's handling of SystemExit
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write('{0}\n'.format(code))
+    return 1
+
+
+def _isolated_globals():
+    import colorama.initialise
+    from cloudify import logs
+    from . import env
+    from . import logger
+
+    return [
+        (sys, ('argv', 'stdin', 'stdout', 'stderr', 'excepthook')),
+        (env, ('profile',)),
+        (logger, ('verbosity_level',)),
+        (logs, ('EVENT_CLASS', 'EVENT_VERBOSITY_LEVEL')),
+        (colorama.initialise, ('orig_stdout', 'orig_stderr',
+                               'wrapped_stdout', 'wrapped_stderr')),
+    ]
+
+
+def _snapshot_globals():
+    return [(module, dict((name, getattr(module, name)) for name in names))
+            for module, names in _isolated_globals()]
+
+
+def _restore_globals(snapshot):
+    for module, values in snapshot:
+        for name, value in values.items():
+            setattr(module, name, value)
+
+
+def start_in_background(timeout=10):
+    """Start the daemon in a new, detached, process.
+
+    Return the pid of the daemon once it's ready to serve commands.
+    """
+    server = Server()
+    pid = os.fork()
+    if pid == 0:
+        # The daemon's process (after detaching from the terminal)
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        try:
+            _redirect_standard_streams()
+            server.start()
+            server.serve_forever()
+        except BaseException:
+            server._log_error()
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        daemon_pid = get_pid()
+        if daemon_pid:
+            return daemon_pid
+        time.sleep(0.1)
+    return None
+
+
+def stop(timeout=10):
+    """Stop the running daemon. Return False if it wasn't running"""
+    pid = get_pid()
+    if not pid:
+        return False
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.time() + timeout
+    while time.time() < deadline and is_running():
+        time.sleep(0.1)
+    return True
+
+
+def _redirect_standard_streams():
+    with open(os.devnull, 'r+') as devnull:
+        for stream in (sys.stdin, sys.stdout, sys.stderr):
+            os.dup2(devnull.fileno(), stream.fileno())
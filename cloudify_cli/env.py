@@ -16,13 +16,20 @@
 
 
 import os
+import copy
 import json
+import atexit
+import time
 import types
 import shutil
 import pkgutil
 import getpass
+import Queue
 import tempfile
-import itertools
+import threading
+import cPickle as pickle
+from functools import partial
+from urlparse import urlparse
 from base64 import urlsafe_b64encode
 
 import yaml
@@ -33,8 +40,13 @@ from cloudify_rest_client.client import HTTPClient
 from cloudify_rest_client.exceptions import (CloudifyClientError,
                                              NotClusterMaster)
 
+from . import retry
+from . import concurrency
+from . import json_stream
+from . import timings
 from . import constants
 from .exceptions import CloudifyCliError
+from .retry_body import RetryBody
 
 DEFAULT_LOG_FILE = os.path.expanduser(
     '{0}/cloudify-{1}/cloudify-cli.log'.format(
@@ -142,14 +154,79 @@ def get_profile_context(profile_name=None, suppress_error=False):
         raise CloudifyCliError('Local profile does not have context')
     try:
         path = get_context_path(profile_name)
-        with open(path) as f:
-            return yaml.load(f.read())
+        return _load_profile_context(path)
     except CloudifyCliError:
         if suppress_error:
             return ProfileContext()
         raise
 
 
+@timings.timed(timings.PROFILE)
+def _load_profile_context(context_path):
+    """Load a profile context, preferably from its compiled cache.
+
+    Parsing the context's YAML is relatively slow, so a pickled copy of the
+    context is kept alongside it. The cache is only used if it was created
+    from the current version of the YAML file (judging by its modification
+    time and size). Otherwise, the YAML is parsed and the cache is rebuilt.
+    """
+    try:
+        cache_key = _get_context_cache_key(context_path)
+        with open(_get_context_cache_path(context_path), 'rb') as f:
+            cached_key, context = pickle.load(f)
+        if cached_key == cache_key:
+            return context
+    except Exception:
+        # A missing, corrupt or incompatible cache is simply rebuilt
+        pass
+
+    with open(context_path) as f:
+        context = yaml.load(f.read())
+    _write_context_cache(context_path, context)
+    return context
+
+
+def _get_context_cache_key(context_path):
+    stat = os.stat(context_path)
+    return stat.st_mtime, stat.st_size
+
+
+def _get_context_cache_path(context_path):
+    return os.path.join(os.path.dirname(context_path),
+                        constants.CLOUDIFY_PROFILE_CONTEXT_CACHE_FILE_NAME)
+
+
+def _write_context_cache(context_path, context):
+    try:
+        _atomic_write(
+            _get_context_cache_path(context_path),
+            pickle.dumps((_get_context_cache_key(context_path), context),
+                         pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        # The cache is only an optimization, so failing to write it (e.g.
+        # due to a read-only profile directory) is not an error
+        pass
+
+
+def _atomic_write(path, data):
+    """Write `data` to `path`, so that readers never see a partial file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                     prefix='.{0}.'.format(
+                                         os.path.basename(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if os.name == 'nt' and os.path.exists(path):
+            # rename doesn't overwrite existing files on Windows
+            os.remove(path)
+        os.rename(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def is_initialized(profile_name=None):
     """Check if a profile or an environment is initialized.
 
@@ -187,6 +264,58 @@ def raise_uninitialized():
     raise error
 
 
+# REST clients, by the manager they connect to and the credentials they use.
+# A client is reused by all of the commands a command runs (e.g. the
+# commands chained by `cfy install`). The commands of a `cfy shell` each
+# get their own clients, sharing the session's connections
+_rest_clients = {}
+# The session all of the clients send their requests with (see `get_session`)
+_session = None
+
+
+def get_session():
+    """Return the `requests.Session` shared by all of the REST clients.
+
+    The session keeps a pool of connections to each manager alive, so
+    consecutive requests don't have to open a connection (and perform a
+    TLS handshake) each.
+    """
+    global _session
+    if _session is None:
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=constants.REST_CONNECTION_POOLS,
+            pool_maxsize=constants.REST_CONNECTION_POOL_SIZE)
+        _session = requests.Session()
+        # large responses are much smaller compressed (this is also the
+        # default of `requests`, which decompresses them as they're read)
+        _session.headers['Accept-Encoding'] = 'gzip, deflate'
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def clear_rest_clients(keep_connections=False):
+    """Forget the REST clients created so far, and close their connections.
+
+    The cluster states the clients loaded are forgotten as well, after
+    saving any changes to them, and so is their retry budget.
+
+    :param keep_connections: Keep the session, and the connections it keeps
+                             alive, for the clients created next (e.g. by
+                             the next command of a `cfy shell`).
+    """
+    global _session
+    _rest_clients.clear()
+    retry.reset_request_budget()
+    _save_unsaved_cluster_states()
+    _cluster_states.clear()
+    _cluster_state_writes.clear()
+    if _session is not None and not keep_connections:
+        _session.close()
+        _session = None
+
+
+@timings.timed(timings.REST_CLIENT)
 def get_rest_client(rest_host=None,
                     rest_port=None,
                     rest_protocol=None,
@@ -215,6 +344,11 @@ def get_rest_client(rest_host=None,
 
     cert = get_ssl_cert()
 
+    cache_key = (rest_host, rest_port, rest_protocol, username, password,
+                 tenant_name, trust_all, cert, bool(cluster))
+    if cache_key in _rest_clients:
+        return _rest_clients[cache_key]
+
     if cluster:
         client = CloudifyClusterClient(
             host=rest_host,
@@ -225,7 +359,7 @@ def get_rest_client(rest_host=None,
             trust_all=trust_all)
 
     else:
-        client = CloudifyClient(
+        client = CloudifySessionClient(
             host=rest_host,
             port=rest_port,
             protocol=rest_protocol,
@@ -233,6 +367,11 @@ def get_rest_client(rest_host=None,
             cert=cert,
             trust_all=trust_all)
 
+    client._client.session = get_session()
+    client._client.http_cache = _get_http_cache(rest_host, tenant_name)
+    client._client.retry_policy = _get_retry_policy()
+    _rest_clients[cache_key] = client
+
     # TODO: Put back version check after we've solved the problem where
     # a new CLI is used with an older manager on `cfy upgrade`.
     if skip_version_check or True:
@@ -251,6 +390,29 @@ def get_rest_client(rest_host=None,
             'Manager Version: {1}'.format(cli_version, manager_version))
 
 
+def _get_http_cache(host, tenant_name):
+    """Return the cache of GET responses, or None if it's not enabled.
+
+    Responses are only cached for the profile's manager, in the profile's
+    directory.
+    """
+    # Imported here, as both modules import this one
+    from .config import config
+    from . import http_cache
+
+    enabled = os.environ.get(constants.CLOUDIFY_HTTP_CACHE_ENV)
+    cache_config = config.get_http_cache_config()
+    if enabled is None:
+        enabled = cache_config.get('enabled', False)
+    else:
+        enabled = enabled.lower() in ('true', '1', 'yes')
+    if not enabled or not _is_profile_manager(host):
+        return None
+    return http_cache.HTTPCache(
+        http_cache.get_cache_dir(profile.manager_ip, tenant_name),
+        ttls=cache_config.get('ttl'))
+
+
 def build_manager_host_string(ssh_user='', ip=''):
     ssh_user = ssh_user or profile.ssh_user
     if not ssh_user:
@@ -326,22 +488,92 @@ def get_version_data():
     return json.loads(data)
 
 
-def get_manager_version_data(rest_client=None):
+def get_manager_version_data(rest_client=None, refresh=False):
+    """Return the manager's version data.
+
+    The data is cached in the profile, and only fetched from the manager
+    if it's older than MANAGER_VERSION_CACHE_TTL, or if `refresh` is set.
+    If the manager can't be reached, the cached data is returned, even if
+    it's stale.
+    """
+    # Only the version of the profile's manager is cached
+    use_cache = profile and (
+        not rest_client or _is_profile_manager(rest_client.host))
+    cached = profile.manager_version if use_cache else None
+    if cached and not refresh and time.time() - cached['timestamp'] < \
+            constants.MANAGER_VERSION_CACHE_TTL:
+        return dict(cached['data'])
+
     if not rest_client:
-        if not get_profile_context(suppress_error=True):
+        if not (profile and profile.manager_ip):
             return None
         try:
             rest_client = get_rest_client(skip_version_check=True)
         except CloudifyCliError:
             return None
+    # The probe isn't retried, so that it gives up after the timeout (the
+    # client is copied, as it may be shared by other threads)
+    api = copy.copy(rest_client.manager.api)
+    api.retry_policy = None
     try:
-        version_data = rest_client.manager.get_version()
-    except CloudifyClientError:
-        return None
+        version_data = api.get(
+            '/version',
+            versioned_url=False,
+            timeout=constants.MANAGER_VERSION_TIMEOUT)
+    except (CloudifyClientError, requests.exceptions.RequestException):
+        return dict(cached['data']) if cached else None
     version_data['ip'] = rest_client.host
+    if use_cache:
+        _cache_manager_version_data(version_data)
     return version_data
 
 
+_manager_version_lock = threading.Lock()
+
+
+def update_cached_manager_version(host, version):
+    """Update the cached version of the manager at `host`.
+
+    This is called whenever the manager's response includes its version,
+    so that the cache is kept fresh without having to ask for it. The
+    profile is only saved if the version changed, or if the cached data
+    is about to become stale.
+    """
+    if not _is_profile_manager(host):
+        return
+    cached = profile.manager_version
+    if cached and cached['data'].get('version') == version:
+        age = time.time() - cached['timestamp']
+        if age < constants.MANAGER_VERSION_CACHE_TTL / 2:
+            return
+        version_data = dict(cached['data'])
+    else:
+        version_data = {'version': version}
+    version_data['ip'] = host
+    _cache_manager_version_data(version_data)
+
+
+def _cache_manager_version_data(version_data):
+    cached = {'data': version_data, 'timestamp': time.time()}
+    profile.manager_version = cached
+    # The profile may have been changed on disk since it was loaded, so
+    # the version is saved to the profile as it is there (responses may be
+    # handled by several threads, so one saves it at a time)
+    with _manager_version_lock:
+        saved_profile = get_profile_context(profile.manager_ip,
+                                            suppress_error=True)
+        if saved_profile.manager_ip:
+            saved_profile.manager_version = cached
+            saved_profile.save()
+
+
+def _is_profile_manager(host):
+    if not (profile and profile.manager_ip):
+        return False
+    return host == profile.manager_ip or \
+        any(node.get('manager_ip') == host for node in profile.cluster)
+
+
 def get_cli_manager_versions(rest_client):
     manager_version_data = get_manager_version_data(rest_client)
     cli_version = get_version_data().get('version')
@@ -410,6 +642,16 @@ class ProfileContext(yaml.YAMLObject):
     def cluster(self, cluster):
         self._cluster = cluster
 
+    @property
+    def manager_version(self):
+        # The cached version data of the manager (see
+        # `get_manager_version_data`), missing from older profiles
+        return getattr(self, '_manager_version', None)
+
+    @manager_version.setter
+    def manager_version(self, manager_version):
+        self._manager_version = manager_version
+
     def _get_context_path(self):
         init_path = get_profile_dir(self.manager_ip)
         context_path = os.path.join(
@@ -429,8 +671,10 @@ class ProfileContext(yaml.YAMLObject):
             workdir,
             constants.CLOUDIFY_PROFILE_CONTEXT_FILE_NAME)
 
-        with open(target_file_path, 'w') as f:
-            f.write(yaml.dump(self))
+        # Written atomically, as other commands (or threads) may read the
+        # profile, or save it, at the same time
+        _atomic_write(target_file_path, yaml.dump(self))
+        _write_context_cache(target_file_path, self)
 
 
 def get_auth_header(username, password):
@@ -453,14 +697,283 @@ def get_auth_header(username, password):
 # missing, eg. ssh_*), or during a `cfy cluster join`.
 # If a value is missing, we will use the value from the last active manager.
 # Only the IP is required.
+def _get_retry_policy():
+    """Return the policy of retrying requests, as configured, or None if
+    requests aren't retried (i.e. the config has no `retry` section, or
+    it's disabled)
+    """
+    # Imported here, as the config module imports this one
+    from .config import config
+    retry_config = dict(config.get_retry_config())
+    if not retry_config or not retry_config.pop('enabled', True):
+        return None
+    return retry.get_request_retry_policy(retry_config)
+
+
 # Note that not all attributes are allowed - username/password will be
 # the same for every node in the cluster.
 CLUSTER_NODE_ATTRS = ['manager_ip', 'rest_port', 'rest_protocol', 'ssh_port',
                       'ssh_user', 'ssh_key']
 
 
-class ClusterHTTPClient(HTTPClient):
+class SessionHTTPClient(HTTPClient):
+    """An HTTPClient that can send its requests using a `requests.Session`.
+
+    A session keeps the connections to the manager alive, so they can be
+    reused by subsequent requests. Without a session, every request is sent
+    over a new connection, as usual.
+    """
+    session = None
+    # The cache of GET responses (see `http_cache`), if it's enabled
+    http_cache = None
+    # The policy of retrying requests the manager couldn't handle (see
+    # `retry`), if they should be retried
+    retry_policy = None
+    # The `concurrency.TokenBucket` each request (and each retry of it)
+    # waits for a token of, if the rate of requests is limited
+    rate_limiter = None
+    # Whether to decode the JSON bodies of large responses as they're read
+    # (see `json_stream`), rather than after reading all of them
+    stream_json = True
+
+    def do_request(self, requests_method, *args, **kwargs):
+        # if the request might be sent more than once, and the data is a
+        # generator, it has to be replayable
+        if self._may_resend() and \
+                isinstance(kwargs.get('data'), types.GeneratorType):
+            with RetryBody(kwargs.pop('data')) as body:
+                return self._do_request_with_retries(
+                    body, requests_method, *args, **kwargs)
+        return self._do_request_with_retries(
+            None, requests_method, *args, **kwargs)
+
+    def _may_resend(self):
+        return self.retry_policy is not None
+
+    def _do_request_with_retries(self, body, requests_method, *args,
+                                 **kwargs):
+        def send():
+            return self._send_request(body, requests_method, *args, **kwargs)
+
+        if self.retry_policy is None:
+            return send()
+        # Mocked methods have no names
+        method = getattr(requests_method, '__name__', 'request').upper()
+        return self.retry_policy.call(
+            send,
+            is_retryable=partial(retry.is_retryable_request_error, method),
+            name='{0} {1}'.format(method, args[0] if args else ''),
+            logger=self.logger)
+
+    def _send_request(self, body, *args, **kwargs):
+        """Send a request once"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(args[1] if len(args) > 1 else None)
+        if body is not None:
+            kwargs['data'] = iter(body)
+        return super(SessionHTTPClient, self).do_request(*args, **kwargs)
+
+    def _do_request(self, requests_method, *args, **kwargs):
+        if self.session is not None:
+            requests_method = getattr(self.session, requests_method.__name__)
+
+        # Mocked methods have no names
+        method = getattr(requests_method, '__name__', 'request').upper()
+
+        def send(request_url, *request_args, **request_kwargs):
+            name = '{0} {1}'.format(method, urlparse(request_url).path)
+            # the body is read as it's decoded, rather than before
+            stream_json = self.stream_json and method == 'GET' and \
+                not request_kwargs.get('stream')
+            if stream_json:
+                request_kwargs['stream'] = True
+            with timings.span(timings.HTTP, name) as details:
+                response = requests_method(
+                    request_url, *request_args, **request_kwargs)
+                details['status'] = response.status_code
+                details['bytes'] = _get_content_length(
+                    response, request_kwargs.get('stream'))
+            self._update_manager_version(response)
+            if stream_json and isinstance(response, requests.Response):
+                _decode_json_as_read(response, details)
+            return response
+
+        if self.http_cache is not None:
+            send_uncached = send
+
+            def send(request_url, **request_kwargs):
+                return self.http_cache.send(
+                    method, send_uncached, request_url, **request_kwargs)
+
+        return super(SessionHTTPClient, self)._do_request(
+            send, *args, **kwargs)
+
+    def _update_manager_version(self, response):
+        version = response.headers.get(constants.CLOUDIFY_VERSION_HEADER)
+        if isinstance(version, basestring) and \
+                200 <= response.status_code < 300:
+            update_cached_manager_version(self.host, version)
+
+
+def _get_content_length(response, stream):
+    length = response.headers.get('Content-Length')
+    if isinstance(length, basestring) and length.isdigit():
+        return int(length)
+    # Streamed content is yet to be read
+    if not stream and isinstance(response.content, str):
+        return len(response.content)
+    return None
+
+
+def _decode_json_as_read(response, details):
+    """Make `response.json()` decode the body while it's being read.
+
+    Small responses (judging by their Content-Length, unless they're
+    compressed), error responses, and responses whose body was read
+    already (e.g. to be logged), are decoded as usual. The size of the
+    body is added to the `details` of the request's timing once it's read,
+    if it wasn't known.
+    """
+    length = response.headers.get('Content-Length')
+    if response.status_code >= 400 or (
+            not response.headers.get('Content-Encoding') and
+            isinstance(length, basestring) and length.isdigit() and
+            int(length) < constants.JSON_STREAM_MIN_SIZE):
+        return
+
+    def iter_chunks():
+        size = 0
+        for chunk in response.iter_content(constants.JSON_STREAM_CHUNK_SIZE):
+            size += len(chunk)
+            yield chunk
+        if details.get('bytes') is None:
+            details['bytes'] = size
+
+    def decode(**kwargs):
+        if response._content_consumed:
+            return requests.Response.json(response, **kwargs)
+        return json_stream.load(iter_chunks())
+    response.json = decode
+
+
+class CloudifySessionClient(CloudifyClient):
+    """A CloudifyClient which can reuse its connections (see above)"""
+
+    client_class = SessionHTTPClient
+
+
+# The state of the clusters used by this process, by the paths of their
+# state files (see `get_cluster_state`)
+_cluster_states = {}
+# The times this process last wrote each state file
+_cluster_state_writes = {}
+# The state files with changes which weren't written yet
+_unsaved_cluster_states = set()
+_cluster_state_lock = threading.RLock()
+
+
+def get_cluster_state():
+    """Return the last known state of the profile's cluster.
+
+    The state is a dict, with the last known master (`master`), and the
+    last known status of each node (`nodes`, mapping node IPs to whether
+    they were online), each with the time it was known.
+
+    The state is kept in a file of its own, rather than in the profile, so
+    that switching masters doesn't rewrite the profile. The file is written
+    atomically, so it can be shared by several `cfy` processes.
+    """
+    path = _get_cluster_state_path()
+    with _cluster_state_lock:
+        if path not in _cluster_states:
+            _cluster_states[path] = _read_cluster_state(path)
+        return _cluster_states[path]
+
+
+def update_cluster_state(master=None, nodes=None):
+    """Update the state of the profile's cluster.
+
+    :param master: The IP of the node found to be the master.
+    :param nodes: A dict mapping node IPs to whether they're online.
+
+    The state file is only written if the state changed, and at most once
+    per `CLUSTER_STATE_WRITE_INTERVAL`.
+    """
+    now = time.time()
+    with _cluster_state_lock:
+        state = get_cluster_state()
+        changed = False
+        if master is not None and state['master'].get('ip') != master:
+            state['master'] = {'ip': master, 'timestamp': now}
+            changed = True
+        for ip, online in (nodes or {}).items():
+            if state['nodes'].get(ip, {}).get('online') != online:
+                changed = True
+            state['nodes'][ip] = {'online': online, 'timestamp': now}
+        if changed:
+            _save_cluster_state(_get_cluster_state_path())
+
+
+def _get_cluster_state_path():
+    return os.path.join(get_profile_dir(profile.manager_ip,
+                                        suppress_error=True),
+                        constants.CLUSTER_STATE_FILE_NAME)
+
+
+def _read_cluster_state(path):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (IOError, ValueError):
+        state = {}
+    state.setdefault('master', {})
+    state.setdefault('nodes', {})
+    return state
+
+
+def _save_cluster_state(path):
+    last_write = _cluster_state_writes.get(path)
+    if last_write is not None and \
+            time.time() - last_write < constants.CLUSTER_STATE_WRITE_INTERVAL:
+        _unsaved_cluster_states.add(path)
+        return
+    _unsaved_cluster_states.discard(path)
+    _cluster_state_writes[path] = time.time()
+
+    # Other processes may have written the file since it was read, so the
+    # newest of each of its entries is kept
+    state = _cluster_states[path]
+    saved = _read_cluster_state(path)
+    if saved['master'].get('timestamp', 0) > \
+            state['master'].get('timestamp', 0):
+        state['master'] = saved['master']
+    for ip, node in saved['nodes'].items():
+        if node.get('timestamp', 0) > \
+                state['nodes'].get(ip, {}).get('timestamp', 0):
+            state['nodes'][ip] = node
+    try:
+        _atomic_write(path, json.dumps(state))
+    except (IOError, OSError):
+        # The state is only an optimization, same as the context cache
+        pass
+
+
+def _save_unsaved_cluster_states():
+    with _cluster_state_lock:
+        for path in list(_unsaved_cluster_states):
+            if path in _cluster_states:
+                _cluster_state_writes.pop(path, None)
+                _save_cluster_state(path)
+        _unsaved_cluster_states.clear()
+
+
+atexit.register(_save_unsaved_cluster_states)
+
+
+class ClusterHTTPClient(SessionHTTPClient):
     default_timeout_sec = 5
+    # The timeout of the requests probing the nodes for the master
+    discovery_timeout_sec = 2
 
     def __init__(self, *args, **kwargs):
         super(ClusterHTTPClient, self).__init__(*args, **kwargs)
@@ -468,47 +981,116 @@ class ClusterHTTPClient(HTTPClient):
             raise ValueError('Cluster client invoked for an empty cluster!')
         self._cluster = list(profile.cluster)
 
-    def do_request(self, *args, **kwargs):
-        # this request can be retried for each manager - if the data is
-        # a generator, we need to copy it, so we can send it more than once
-        copied_data = None
-        if isinstance(kwargs.get('data'), types.GeneratorType):
-            copied_data = itertools.tee(kwargs.pop('data'),
-                                        len(profile.cluster))
+    def _may_resend(self):
+        # the request can be sent to each of the managers
+        return True
 
+    def _send_request(self, body, *args, **kwargs):
         kwargs.setdefault('timeout', self.default_timeout_sec)
 
-        for node_index, node in enumerate(profile.cluster):
+        for node in self._get_nodes():
             self._use_node(node)
-            if copied_data is not None:
-                kwargs['data'] = copied_data[node_index]
-
             try:
-                return super(ClusterHTTPClient, self).do_request(*args,
-                                                                 **kwargs)
-            except (NotClusterMaster, requests.exceptions.ConnectionError):
+                response = super(ClusterHTTPClient, self)._send_request(
+                    body, *args, **kwargs)
+            except NotClusterMaster:
+                continue
+            except requests.exceptions.ConnectionError:
+                update_cluster_state(nodes={node['manager_ip']: False})
                 continue
+            update_cluster_state(master=node['manager_ip'],
+                                 nodes={node['manager_ip']: True})
+            return response
 
         raise CloudifyClientError('No active node in the cluster!')
 
+    def _get_nodes(self):
+        """Yield the nodes to send a request to, each at most once.
+
+        The last known master (or the first node in the profile, if it's not
+        known) is tried first. If it fails, all other nodes are probed
+        concurrently, and the master found is tried next. Only if that fails
+        as well, the rest of the nodes are tried one after the other, the
+        ones last known to be online first.
+        """
+        state = get_cluster_state()
+        nodes = list(profile.cluster)
+        master_ip = state['master'].get('ip')
+        first = next((node for node in nodes
+                      if node['manager_ip'] == master_ip), nodes[0])
+        nodes.remove(first)
+        yield first
+
+        master = self._discover_master(nodes)
+        if master is not None:
+            nodes.remove(master)
+            yield master
+
+        offline = set(ip for ip, node in state['nodes'].items()
+                      if not node.get('online'))
+        for node in sorted(nodes, key=lambda n: n['manager_ip'] in offline):
+            yield node
+
+    def _discover_master(self, nodes):
+        """Probe `nodes` concurrently, and return the first master found.
+
+        Return None if none of the nodes is the master.
+        """
+        results = Queue.Queue()
+
+        def probe(node):
+            is_master = False
+            try:
+                is_master = self._is_master(node)
+            except Exception:
+                # e.g. a proxy's page, which isn't JSON, rather than the
+                # node's response; such a node isn't usable either way
+                pass
+            finally:
+                results.put(node if is_master else None)
+
+        for node in nodes:
+            thread = threading.Thread(target=probe, args=(node, ))
+            thread.daemon = True
+            thread.start()
+        for _ in nodes:
+            node = concurrency.get_interruptibly(results)
+            if node is not None:
+                return node
+        return None
+
+    def _is_master(self, node):
+        client = SessionHTTPClient(
+            host=node['manager_ip'],
+            port=node.get('rest_port', self.port),
+            protocol=node.get('rest_protocol', self.protocol),
+            headers=self.headers,
+            cert=self.cert,
+            trust_all=self.trust_all)
+        client.session = self.session
+        try:
+            client.get('/status', timeout=self.discovery_timeout_sec)
+        except NotClusterMaster:
+            update_cluster_state(nodes={node['manager_ip']: True})
+            return False
+        except requests.exceptions.RequestException:
+            update_cluster_state(nodes={node['manager_ip']: False})
+            return False
+        except CloudifyClientError as e:
+            # Auth errors (e.g. bad credentials) are only returned by the
+            # master, while any other error (e.g. a 503 from a node which is
+            # restarting) means the node can't be used for now
+            if e.status_code not in (401, 403):
+                update_cluster_state(nodes={node['manager_ip']: False})
+                return False
+        return True
+
     def _use_node(self, node):
         if node['manager_ip'] == self.host:
             return
         self.host = node['manager_ip']
         self.port = node.get('rest_port', self.port)
         self.protocol = node.get('rest_protocol', self.protocol)
-        self._update_profile(node)
-
-    def _update_profile(self, node):
-        """Put the node at the start of the cluster list in profile.
-
-        The client tries nodes in the order of the cluster list, so putting
-        the node first will make the client try it first next time. This makes
-        the client always try the last-known-master first.
-        """
-        profile.cluster.remove(node)
-        profile.cluster = [node] + profile.cluster
-        profile.save()
 
 
 class CloudifyClusterClient(CloudifyClient):
@@ -518,7 +1100,8 @@ class CloudifyClusterClient(CloudifyClient):
     master" error, this will keep trying with every node in the cluster,
     until it finds the cluster master.
 
-    When the master is found, the profile will be updated with its address.
+    When the master is found, the cluster's state will be updated with its
+    address (see `get_cluster_state`), so it's tried first next time.
     """
 
     client_class = ClusterHTTPClient
@@ -15,28 +15,87 @@
 ############
 
 
+import json
 import time
+import heapq
+import hashlib
+from datetime import datetime, timedelta
+from collections import deque
 
 from cloudify_rest_client.executions import Execution
 
-from .exceptions import (ExecutionTimeoutError,
+from . import timings
+from .config import config
+from .exceptions import (CloudifyCliError,
+                         ExecutionTimeoutError,
                          EventProcessingTimeoutError)
 
 
 WAIT_FOR_EXECUTION_SLEEP_INTERVAL = 3
+# The interval between polls of a running execution is this short while its
+# events arrive, and grows up to the max interval while they don't
+WAIT_FOR_EXECUTION_MIN_SLEEP_INTERVAL = 0.1
+WAIT_FOR_EXECUTION_MAX_SLEEP_INTERVAL = 10
 WORKFLOW_END_TYPES = {u'workflow_succeeded', u'workflow_failed',
                       u'workflow_cancelled'}
 
+# Page through the events by their index in the execution's events
+FETCH_BY_OFFSET = 'offset'
+# Fetch the events since the last one fetched (see ExecutionEventsFetcher)
+FETCH_BY_CURSOR = 'cursor'
+FETCH_MODES = (FETCH_BY_OFFSET, FETCH_BY_CURSOR)
+# The events of this many seconds before the last event fetched are
+# fetched again, in case some of them were stored late
+DEFAULT_DEDUP_WINDOW = 5
+# The number of the last events fetched which are remembered, so that they
+# aren't processed again. It has to be more than the number of events in
+# a dedup window.
+MAX_RECENT_EVENTS = 10000
+
+TIMESTAMP_FORMATS = ['%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S']
+
 
 class ExecutionEventsFetcher(object):
+    """Fetch the events of an execution, a batch at a time.
+
+    By default, the events are paged through by their offset, which gets
+    slower as the offset grows, and skips (or repeats) events stored out
+    of order. With the `cursor` fetch mode, each batch is fetched starting
+    at the timestamp of the last event fetched. A cursor at the last
+    timestamp only would repeat the events which share it, so events are
+    told apart by their ids (or their contents, if they have no ids), and
+    the ones seen recently are dropped. Each time all of the events were
+    fetched, the cursor moves `dedup_window` seconds back, so that events
+    which were stored late are fetched as well.
+
+    The fetch mode and the dedup window are taken from the config (see
+    `events`), unless they're passed.
+    """
 
     def __init__(self, client, execution_id, batch_size=100,
-                 include_logs=False):
+                 include_logs=False, fetch_mode=None, dedup_window=None):
         self._client = client
         self._execution_id = execution_id
         self._batch_size = batch_size
         self._from_event = 0
         self._include_logs = include_logs
+        settings = config.get_events_config()
+        self._fetch_mode = \
+            fetch_mode or settings.get('fetch_mode', FETCH_BY_OFFSET)
+        if self._fetch_mode not in FETCH_MODES:
+            raise CloudifyCliError(
+                'Unknown events fetch mode: {0} (expected one of: '
+                '{1})'.format(self._fetch_mode, ', '.join(FETCH_MODES)))
+        self._dedup_window = timedelta(seconds=(
+            dedup_window if dedup_window is not None
+            else settings.get('dedup_window', DEFAULT_DEDUP_WINDOW)))
+        # The timestamp the next batch starts at, and the number of the
+        # events at that timestamp which were fetched already
+        self._cursor = None
+        self._cursor_offset = 0
+        self._last_timestamp = None
+        self._recent_events = _RecentKeys(MAX_RECENT_EVENTS)
+        self._more_events = True
         # make sure execution exists before proceeding
         # a 404 will be raised otherwise
         self._client.executions.get(execution_id)
@@ -49,14 +108,53 @@ class ExecutionEventsFetcher(object):
         return len(events)
 
     def _fetch_events_batch(self):
-        events = self._client.events.list(
+        if self._fetch_mode == FETCH_BY_CURSOR:
+            return self._fetch_events_batch_by_cursor()
+        events = self._list_events(_offset=self._from_event)
+        self._from_event += len(events)
+        # returned less events than allowed by _batch_size,
+        # this means these are the last events found so far
+        self._more_events = len(events) == self._batch_size
+        return events
+
+    def _fetch_events_batch_by_cursor(self):
+        if self._cursor is None:
+            events = self._list_events(_offset=self._cursor_offset)
+        else:
+            events = self._list_events(_offset=self._cursor_offset,
+                                       from_datetime=self._cursor)
+        self._more_events = len(events) == self._batch_size
+        timestamps = [event.get('@timestamp') for event in events]
+        if self._more_events and timestamps[-1] not in (None, self._cursor):
+            self._cursor = timestamps[-1]
+            self._cursor_offset = 0
+        else:
+            # all of the events are at the cursor's timestamp (or have
+            # none), so the next ones are only found by their offset
+            self._cursor_offset += len(events)
+        if timestamps and timestamps[-1] is not None:
+            self._last_timestamp = timestamps[-1]
+        if not self._more_events:
+            self._rewind_cursor()
+        return [event for event in events
+                if self._recent_events.add(_get_event_key(event))]
+
+    def _rewind_cursor(self):
+        """Move the cursor a dedup window before the last event"""
+        timestamp = _parse_timestamp(self._last_timestamp)
+        if timestamp is None:
+            return
+        self._cursor = (timestamp - self._dedup_window).strftime(
+            TIMESTAMP_FORMATS[0])[:-3] + 'Z'
+        self._cursor_offset = 0
+
+    def _list_events(self, **kwargs):
+        return self._client.events.list(
             execution_id=self._execution_id,
-            _offset=self._from_event,
             _size=self._batch_size,
             include_logs=self._include_logs,
-            sort='@timestamp').items
-        self._from_event += len(events)
-        return events
+            sort='@timestamp',
+            **kwargs).items
 
     def fetch_and_process_events(self, events_handler=None, timeout=60):
         total_events_count = 0
@@ -65,20 +163,23 @@ class ExecutionEventsFetcher(object):
         if timeout is not None:
             deadline = time.time() + timeout
 
-        while True:
-            if timeout is not None and time.time() > deadline:
-                raise EventProcessingTimeoutError(
-                    self._execution_id,
-                    'events/log fetching timed out')
+        try:
+            while True:
+                if timeout is not None and time.time() > deadline:
+                    raise EventProcessingTimeoutError(
+                        self._execution_id,
+                        'events/log fetching timed out')
 
-            events_batch_count = self._fetch_and_process_events_batch(
-                events_handler=events_handler)
+                events_batch_count = self._fetch_and_process_events_batch(
+                    events_handler=events_handler)
 
-            total_events_count += events_batch_count
-            if events_batch_count < self._batch_size:
-                # returned less events than allowed by _batch_size,
-                # this means these are the last events found so far
-                break
+                total_events_count += events_batch_count
+                if not self._more_events:
+                    break
+        finally:
+            # the handler may buffer the events (see `EventsRenderer`),
+            # which are written once there are no more of them for now
+            _flush_events(events_handler)
 
         return total_events_count
 
@@ -120,13 +221,100 @@ class EventsWatcher(object):
         """Is event a 'workflow execution finished' event?"""
         return event.get('event_type') in WORKFLOW_END_TYPES
 
+    def flush(self):
+        _flush_events(self._events_handler)
+
+
+class PollInterval(object):
+    """The interval between polls, which adapts to the activity polled.
+
+    The interval is `min_interval` after activity (and at first), and is
+    doubled after each poll which found no activity, up to `max_interval`.
+    """
+
+    def __init__(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._interval = None
+
+    def next(self, active):
+        """Return the interval until the next poll.
+
+        :param active: Whether the last poll found any activity.
+        """
+        if active or self._interval is None:
+            self._interval = self.min_interval
+        else:
+            self._interval = min(self._interval * 2, self.max_interval)
+        return self._interval
+
+
+class ExecutionPoller(object):
+    """Poll an execution's status and events, until it ends.
+
+    The execution and its events are polled often while events arrive
+    (and right after it starts), and less and less often while they don't
+    (see `PollInterval`). While events arrive the execution is evidently
+    running, so its status is only polled when they don't, and once its
+    end event arrived (until the status is updated as well).
+
+    :ivar execution: The execution, as it was when it was last polled.
+    """
+
+    def __init__(self, client, execution, events_handler=None,
+                 include_logs=False):
+        self.execution = execution
+        self._client = client
+        self._include_logs = include_logs
+        self._events_fetcher = None
+        self._events_watcher = EventsWatcher(events_handler)
+        self._interval = PollInterval(WAIT_FOR_EXECUTION_MIN_SLEEP_INTERVAL,
+                                      WAIT_FOR_EXECUTION_MAX_SLEEP_INTERVAL)
+        self._execution_ended = False
+        self._poll_status = True
+
+    def poll(self, timeout=None):
+        """Poll the execution (and its events) once.
+
+        Return the number of seconds until it should be polled again, or
+        None if it ended, and all of its events were fetched.
+
+        :param timeout: The timeout of fetching the events.
+        """
+        if self._events_fetcher is None:
+            self._events_fetcher = ExecutionEventsFetcher(
+                self._client, self.execution.id,
+                include_logs=self._include_logs)
+
+        if self._poll_status and not self._execution_ended:
+            self.execution = self._client.executions.get(self.execution.id)
+            self._execution_ended = \
+                self.execution.status in Execution.END_STATES
+
+        events_count = 0
+        if not self._events_watcher.end_log_received and \
+                self.execution.status != Execution.PENDING:
+            events_count = self._events_fetcher.fetch_and_process_events(
+                events_handler=self._events_watcher, timeout=timeout)
+
+        if self._execution_ended and self._events_watcher.end_log_received:
+            return None
+
+        # the status is about to be updated, if it wasn't yet
+        ending = self._events_watcher.end_log_received
+        self._poll_status = ending or not events_count
+        return self._interval.next(active=ending or events_count > 0)
+
 
 def wait_for_execution(client,
                        execution,
                        events_handler=None,
                        include_logs=False,
                        timeout=900):
+    """Wait for `execution` to end, passing its events to `events_handler`.
 
+    Return the execution, as it was once it ended.
+    """
     # if execution already ended - return without waiting
     if execution.status in Execution.END_STATES:
         return execution
@@ -134,13 +322,11 @@ def wait_for_execution(client,
     if timeout is not None:
         deadline = time.time() + timeout
 
-    events_fetcher = ExecutionEventsFetcher(client, execution.id,
-                                            include_logs=include_logs)
-
     # Poll for execution status and execution logs, until execution ends
     # and we receive an event of type in WORKFLOW_END_TYPES
-    execution_ended = False
-    events_watcher = EventsWatcher(events_handler)
+    poller = ExecutionPoller(client, execution,
+                             events_handler=events_handler,
+                             include_logs=include_logs)
     while True:
         if timeout is not None:
             if time.time() > deadline:
@@ -153,18 +339,104 @@ def wait_for_execution(client,
                 # update the remaining timeout
                 timeout = deadline - time.time()
 
-        if not execution_ended:
-            execution = client.executions.get(execution.id)
-            execution_ended = execution.status in Execution.END_STATES
+        sleep_interval = poller.poll(timeout=timeout)
+        if sleep_interval is None:
+            break
+        if timeout is not None:
+            sleep_interval = min(sleep_interval, deadline - time.time())
+        with timings.span(timings.SLEEP):
+            time.sleep(max(sleep_interval, 0))
 
-        if not events_watcher.end_log_received and \
-                execution.status != Execution.PENDING:
-            events_fetcher.fetch_and_process_events(
-                events_handler=events_watcher, timeout=timeout)
+    return poller.execution
 
-        if execution_ended and events_watcher.end_log_received:
-            break
 
-        time.sleep(WAIT_FOR_EXECUTION_SLEEP_INTERVAL)
+def watch_executions(client,
+                     executions,
+                     get_events_handler=None,
+                     include_logs=False):
+    """Wait for all of `executions` to end, polling them from this thread.
 
-    return execution
+    Each execution is polled at its own interval (see `ExecutionPoller`).
+    The time each one is due to be polled next is kept in a priority
+    queue, and the one due first is polled next, so that when there are
+    more polls due than can be made in time, they're all delayed evenly.
+
+    :param get_events_handler: A function returning the events handler of
+                               an execution, if any.
+
+    Return the executions, as they were once they ended (in the same
+    order).
+    """
+    pollers = []
+    due = []
+    now = time.time()
+    for index, execution in enumerate(executions):
+        events_handler = None
+        if get_events_handler is not None:
+            events_handler = get_events_handler(execution)
+        pollers.append(ExecutionPoller(client, execution,
+                                       events_handler=events_handler,
+                                       include_logs=include_logs))
+        if execution.status not in Execution.END_STATES:
+            heapq.heappush(due, (now, index))
+
+    while due:
+        poll_time, index = heapq.heappop(due)
+        sleep_interval = poll_time - time.time()
+        if sleep_interval > 0:
+            with timings.span(timings.SLEEP):
+                time.sleep(sleep_interval)
+        sleep_interval = pollers[index].poll()
+        if sleep_interval is not None:
+            heapq.heappush(due, (time.time() + sleep_interval, index))
+
+    return [poller.execution for poller in pollers]
+
+
+def _flush_events(events_handler):
+    """Write the events `events_handler` buffered, if it buffers them"""
+    flush = getattr(events_handler, 'flush', None)
+    if flush is not None:
+        flush()
+
+
+def _get_event_key(event):
+    """Return what tells `event` apart from the other events"""
+    event_id = event.get('id') if isinstance(event, dict) else None
+    if event_id is not None:
+        return event_id
+    return hashlib.md5(json.dumps(event, sort_keys=True)).digest()
+
+
+def _parse_timestamp(timestamp):
+    """Return the datetime of an event's `@timestamp` (None if it has none,
+    or if it can't be parsed)
+    """
+    if not timestamp:
+        return None
+    timestamp = timestamp.rstrip('Z').replace(' ', 'T')
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(timestamp, timestamp_format)
+        except ValueError:
+            continue
+    return None
+
+
+class _RecentKeys(object):
+    """The last `size` keys added"""
+
+    def __init__(self, size):
+        self._keys = set()
+        self._order = deque()
+        self._size = size
+
+    def add(self, key):
+        """Add `key`, and return whether it wasn't added already"""
+        if key in self._keys:
+            return False
+        if len(self._order) == self._size:
+            self._keys.discard(self._order.popleft())
+        self._order.append(key)
+        self._keys.add(key)
+        return True
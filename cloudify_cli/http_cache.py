@@ -0,0 +1,220 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""An on-disk cache of the responses of GET requests to the manager.
+
+The cache is opt-in (see `http_cache` in the config file, or the
+`CFY_HTTP_CACHE` env variable), and is kept in the profile's directory,
+with a directory per tenant and resource type (e.g. `blueprints`).
+
+A cached response is used as is while it's fresh, for as long as the TTL
+of its resource type. Once it's stale, it's revalidated with a conditional
+request if the manager returned an `ETag` or a `Last-Modified` header for
+it, or fetched again otherwise. Resources which never change once created
+(e.g. a blueprint, or an execution which ended) are cached indefinitely.
+
+Any other request (e.g. deleting a deployment) removes the cached
+responses of the same resource type. Related resources (e.g. the
+deployment's executions) might still be cached, until their TTL passes.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+from urlparse import urlparse
+
+from requests.models import Request, Response
+from requests.structures import CaseInsensitiveDict
+
+from . import env
+from . import constants
+
+HTTP_CACHE_DIR_NAME = 'http-cache'
+
+# How long responses are fresh, in seconds, by resource type. Responses of
+# resources not listed here (e.g. events) aren't cached.
+DEFAULT_TTLS = {
+    'blueprints': 60,
+    'deployments': 30,
+    'deployment-updates': 30,
+    'executions': 5,
+    'nodes': 30,
+    'node-instances': 10,
+    'plugins': 300,
+    'snapshots': 30,
+    'secrets': 30,
+    'tenants': 300,
+    'users': 300,
+    'user-groups': 300,
+    'provider': 3600,
+}
+
+# The statuses of executions which ended
+EXECUTION_END_STATUSES = ('terminated', 'failed', 'cancelled')
+
+
+class HTTPCache(object):
+    """A cache of GET responses, in `cache_dir`.
+
+    :param ttls: A dict mapping resource types to the number of seconds
+                 their responses are fresh for, overriding `DEFAULT_TTLS`.
+    """
+
+    def __init__(self, cache_dir, ttls=None):
+        self.cache_dir = cache_dir
+        self.ttls = DEFAULT_TTLS.copy()
+        self.ttls.update(ttls or {})
+
+    def send(self, method, send, request_url, **kwargs):
+        """Send a request using `send`, or return its cached response.
+
+        `send` is called with `request_url` and `kwargs`, the same way the
+        rest client calls `requests` methods.
+        """
+        resource_type = _get_resource_type(request_url)
+        if method != 'GET' or kwargs.get('stream'):
+            response = send(request_url, **kwargs)
+            if method != 'GET' and 200 <= response.status_code < 300:
+                self.invalidate(resource_type)
+            return response
+
+        ttl = self.ttls.get(resource_type)
+        if not ttl:
+            return send(request_url, **kwargs)
+
+        path = self._get_path(resource_type, request_url, kwargs)
+        cached = _read(path)
+        if cached is not None and (
+                cached['immutable'] or
+                time.time() - cached['timestamp'] < ttl):
+            return _make_response(cached, request_url, kwargs)
+
+        if cached is not None:
+            kwargs['headers'] = dict(kwargs.get('headers') or {},
+                                     **_get_conditional_headers(cached))
+        response = send(request_url, **kwargs)
+        if cached is not None and response.status_code == 304:
+            cached['timestamp'] = time.time()
+            self._write(path, cached)
+            return _make_response(cached, request_url, kwargs)
+        if response.status_code == 200:
+            # The content is read before anything decodes it, as the
+            # response may be decoded as it's read otherwise (see
+            # `env._decode_json_as_read`), which consumes it
+            content = response.content
+            self._write(path, {
+                'timestamp': time.time(),
+                'immutable': _is_immutable(resource_type, request_url,
+                                           content),
+                'status_code': response.status_code,
+                'reason': response.reason,
+                'headers': _get_cached_headers(response),
+                'content': content.decode('utf-8'),
+            })
+        return response
+
+    def invalidate(self, resource_type):
+        shutil.rmtree(os.path.join(self.cache_dir, resource_type),
+                      ignore_errors=True)
+
+    def _get_path(self, resource_type, request_url, kwargs):
+        # The headers hold the credentials, so users which can see different
+        # resources don't share responses
+        key = json.dumps([request_url,
+                          sorted((kwargs.get('params') or {}).items()),
+                          sorted((kwargs.get('headers') or {}).items())])
+        return os.path.join(self.cache_dir, resource_type,
+                            '{0}.json'.format(hashlib.sha1(key).hexdigest()))
+
+    def _write(self, path, cached):
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            env._atomic_write(path, json.dumps(cached))
+        except (IOError, OSError):
+            # The cache is only an optimization
+            pass
+
+
+def get_cache_dir(profile_name, tenant_name):
+    return os.path.join(env.get_profile_dir(profile_name, suppress_error=True),
+                        HTTP_CACHE_DIR_NAME,
+                        tenant_name or constants.DEFAULT_TENANT_NAME)
+
+
+def _get_resource_type(request_url):
+    # e.g. /api/v3/blueprints/bp1 -> blueprints
+    parts = urlparse(request_url).path.strip('/').split('/')
+    if len(parts) >= 3 and parts[0] == 'api':
+        return parts[2]
+    return None
+
+
+def _is_immutable(resource_type, request_url, content):
+    parts = urlparse(request_url).path.strip('/').split('/')
+    if len(parts) != 4:
+        # Only single resources, rather than lists, may be immutable
+        return False
+    if resource_type == 'blueprints':
+        return True
+    if resource_type == 'executions':
+        try:
+            return json.loads(content).get('status') in \
+                EXECUTION_END_STATUSES
+        except ValueError:
+            return False
+    return False
+
+
+def _get_cached_headers(response):
+    # The content is cached as it was decoded, so the headers describing
+    # how it was sent don't apply to it
+    return dict((key, value) for key, value in response.headers.items()
+                if key.lower() not in ('content-encoding', 'content-length',
+                                       'transfer-encoding'))
+
+
+def _get_conditional_headers(cached):
+    headers = CaseInsensitiveDict(cached['headers'])
+    conditional_headers = {}
+    if 'ETag' in headers:
+        conditional_headers['If-None-Match'] = headers['ETag']
+    if 'Last-Modified' in headers:
+        conditional_headers['If-Modified-Since'] = headers['Last-Modified']
+    return conditional_headers
+
+
+def _make_response(cached, request_url, kwargs):
+    response = Response()
+    response.status_code = cached['status_code']
+    response.reason = cached['reason']
+    response.headers = CaseInsensitiveDict(cached['headers'])
+    response._content = cached['content'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = request_url
+    response.request = Request('GET', request_url,
+                               headers=kwargs.get('headers'),
+                               params=kwargs.get('params')).prepare()
+    return response
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
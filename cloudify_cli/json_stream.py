@@ -0,0 +1,183 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Decode JSON documents as they're read, rather than all at once.
+
+The manager returns lists as an object with an `items` list (and some
+`metadata`). Decoding such a response as it arrives, an item at a time,
+means that the body as a whole is never kept in memory (only the items
+decoded from it), and that the items can be used before the rest of the
+body arrives (see `iter_items`).
+
+Each JSON value is decoded by the `json` module's (C) decoder, once all of
+it has been read. Only the structure of the top-level object, and of its
+`items` list, is parsed here.
+"""
+
+import re
+import json
+import codecs
+
+# Chunks of the body are read until there are at least this many
+# characters to decode. When decoding a value fails because only some of it
+# was read, chunks are read until there's twice as much of it.
+MIN_READ_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Marks the `items` of a document as the ones yielded
+_STREAMED = object()
+_decoder = json.JSONDecoder()
+
+
+def load(chunks):
+    """Return the JSON document read from `chunks`, like `json.loads`.
+
+    :param chunks: An iterable of the (UTF-8 encoded) body's chunks, e.g.
+                   `response.iter_content(chunk_size)`.
+    """
+    reader = _Reader(chunks)
+    if reader.peek() != '{':
+        value = reader.read_value()
+        reader.expect_end()
+        return value
+    document = {}
+    items = list(_iter_object(reader, document))
+    if document.get('items') is _STREAMED:
+        document['items'] = items
+    return document
+
+
+def iter_items(chunks, document=None):
+    """Yield the items of the `items` list of the JSON object in `chunks`.
+
+    Each item is yielded as soon as it's read. The rest of the object's
+    fields (e.g. `metadata`) are added to `document`, if it's passed, once
+    they're read (i.e. they're only known for sure once all of the items
+    were yielded).
+    """
+    reader = _Reader(chunks)
+    for item in _iter_object(reader, {} if document is None else document):
+        yield item
+
+
+def _iter_object(reader, document):
+    """Yield the items of the object's `items`, and add the rest to
+    `document`.
+    """
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+        reader.expect_end()
+        return
+    while True:
+        key = reader.read_value()
+        reader.expect(':')
+        if key == 'items' and reader.peek() == '[':
+            document['items'] = _STREAMED
+            for item in reader.iter_array():
+                yield item
+        else:
+            document[key] = reader.read_value()
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect('}')
+        reader.expect_end()
+        return
+
+
+class _Reader(object):
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = u''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, size):
+        """Read at least one chunk, and then until there are at least
+        `size` characters to decode.
+
+        Return False if all of the chunks were read already.
+        """
+        if self._eof:
+            return False
+        chunks = [self._buffer[self._pos:]]
+        available = len(chunks[0])
+        while len(chunks) == 1 or available < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                chunks.append(self._utf8.decode('', final=True))
+                self._eof = True
+                break
+            chunk = self._utf8.decode(chunk)
+            chunks.append(chunk)
+            available += len(chunk)
+        self._buffer = u''.join(chunks)
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next character which isn't whitespace ('' at EOF)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read(MIN_READ_SIZE):
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError('Expecting {0!r}, found {1!r}'.format(
+                char, found or 'end of data'))
+        self._pos += 1
+
+    def expect_end(self):
+        found = self.peek()
+        if found:
+            raise ValueError('Extra data: {0!r}'.format(found))
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # only some of the value was read
+                if not self._read(2 * (len(self._buffer) - self._pos)):
+                    raise
+                continue
+            # A number might continue in the next chunk
+            if end == len(self._buffer) and not self._eof and \
+                    self._buffer[self._pos] not in '{["':
+                self._read(0)
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.expect(']')
+            return
+        while True:
+            yield self.read_value()
+            if self.peek() == ',':
+                self.expect(',')
+                continue
+            self.expect(']')
+            return
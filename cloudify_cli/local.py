@@ -19,18 +19,14 @@ import os
 import sys
 import tempfile
 
-from cloudify.workflows import local
 from cloudify.utils import LocalCommandRunner
 
-from dsl_parser.parser import parse_from_path
-from dsl_parser import constants as dsl_constants
-
 from . import env
 from . import utils
 from . import constants
 from . import exceptions
 from .logger import get_logger
-from .config.config import CloudifyConfig
+from .config.config import get_config
 
 
 _ENV_NAME = 'local'
@@ -43,13 +39,15 @@ def initialize_blueprint(blueprint_path,
                          install_plugins=False,
                          inputs=None,
                          resolver=None):
+    from cloudify.workflows import local
+
     logger = get_logger()
 
     logger.info('Initializing blueprint...')
     if install_plugins:
         _install_plugins(blueprint_path=blueprint_path)
 
-    config = CloudifyConfig()
+    config = get_config()
     return local.init_env(
         blueprint_path=blueprint_path,
         name=name,
@@ -73,6 +71,8 @@ def storage_dir(blueprint_id=None):
 
 
 def get_storage():
+    from cloudify.workflows import local
+
     return local.FileStorage(storage_dir=storage_dir())
 
 
@@ -81,6 +81,8 @@ def load_env(blueprint_id=None):
         error = exceptions.CloudifyCliError('Please initialize a blueprint')
         error.possible_solutions = ["Run `cfy init BLUEPRINT_PATH`"]
         raise error
+
+    from cloudify.workflows import local
     return local.load_env(name=blueprint_id or 'local', storage=get_storage())
 
 
@@ -109,6 +111,9 @@ def _install_plugins(blueprint_path):
 
 
 def create_requirements(blueprint_path):
+    from dsl_parser.parser import parse_from_path
+    from dsl_parser import constants as dsl_constants
+
     parsed_dsl = parse_from_path(dsl_file_path=blueprint_path)
 
     requirements = _plugins_to_requirements(
@@ -123,6 +128,7 @@ def create_requirements(blueprint_path):
 
 
 def _plugins_to_requirements(blueprint_path, plugins):
+    from dsl_parser import constants as dsl_constants
 
     sources = set()
     for plugin in plugins:
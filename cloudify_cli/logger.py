@@ -16,9 +16,11 @@
 
 
 import os
+import re
 import sys
 import copy
 import json
+import time
 import logging
 import logging.config
 
@@ -27,8 +29,10 @@ import colorama
 from cloudify import logs
 
 from . import env
+from . import timings
+from . import constants
 from .config.config import is_use_colors
-from .config.config import CloudifyConfig
+from .config.config import get_config
 from .colorful_event import ColorfulEvent
 
 DEFAULT_LOG_FILE = os.path.join(env.CLOUDIFY_WORKDIR, 'logs', 'cli.log')
@@ -82,6 +86,7 @@ def all_loggers():
     return _all_loggers
 
 
+@timings.timed(timings.LOGGER)
 def configure_loggers():
     # first off, configure defaults
     # to enable the use of the logger
@@ -126,7 +131,7 @@ def _configure_defaults():
 
 def _configure_from_file():
 
-    config = CloudifyConfig()
+    config = get_config()
     logging_config = config.logging
     loggers_config = logging_config.loggers
     logfile = logging_config.filename
@@ -157,33 +162,232 @@ def _configure_from_file():
     logging.config.dictConfig(logger_dict)
 
 
-def get_events_logger(json_output):
+def get_events_logger(json_output, prefix=''):
+    """Return a function printing events, as JSON or as messages.
 
-    def json_events_logger(events):
-        """The json events logger prints events as consumable JSON formatted
-        entries. Each event appears in its own line.
+    :param prefix: Printed before each message (e.g. the execution's ID,
+                   when showing the events of several executions).
+    """
+    return EventsRenderer(json_output, prefix=prefix)
 
-        :param events: The events to print.
-        :return:
-        """
-        # TODO: Why we're writing directly to stdout here
-        # but use the logger when the --json-output flag isn't passed.
-        for event in events:
-            sys.stdout.write('{}\n'.format(json.dumps(event)))
-            sys.stdout.flush()
 
-    def text_events_logger(events):
-        """The default events logger prints events as short messages.
+class EventsRenderer(object):
+    """Prints events, as JSON or as messages, a batch at a time.
 
-        :param events: The events to print.
-        :return:
-        """
-        for event in events:
-            output = logs.create_event_message_prefix(event)
-            if output:
-                _lgr.info(output)
+    Each batch of events it's called with is rendered as a whole, and
+    added to a buffer. The buffer is written at once (a single write to
+    stdout, or to each of the log's handlers, rather than one per event;
+    see `_log_lines`) when it's grown to
+    `flush_size` bytes, when `flush_interval` seconds passed since it was
+    last written, or when `flush` is called (e.g. by
+    `ExecutionEventsFetcher`, once it fetched all of the events there are
+    for now). The first batch is written right away.
+
+    The messages are rendered as `logs.create_event_message_prefix` renders
+    them, from templates cached per the kind of event (see
+    `_EventTemplates`), rather than by formatting (and coloring) each field
+    of each event anew.
+    """
+
+    def __init__(self,
+                 json_output,
+                 prefix='',
+                 flush_interval=constants.EVENTS_FLUSH_INTERVAL,
+                 flush_size=constants.EVENTS_FLUSH_SIZE):
+        self.json_output = json_output
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._templates = _EventTemplates()
+        self._buffer = []
+        self._buffered_size = 0
+        self._last_flush = 0
+
+    def __call__(self, events):
+        with timings.span(timings.RENDER, 'events'):
+            if self.json_output:
+                lines = [json.dumps(event) for event in events]
+            else:
+                render = self._templates.render
+                prefix = self.prefix
+                lines = [prefix + output for output in
+                         (render(event) for event in events) if output]
+        self._buffer.extend(lines)
+        self._buffered_size += sum(len(line) + 1 for line in lines)
+        if self._buffered_size >= self.flush_size or \
+                time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the events in the buffer, if there are any"""
+        if self._buffer:
+            if self.json_output:
+                # TODO: Why we're writing directly to stdout here
+                # but use the logger when the --json-output flag isn't passed.
+                sys.stdout.write(''.join(line + '\n' for line in self._buffer))
+                sys.stdout.flush()
+            else:
+                _log_lines(_lgr, self._buffer)
+            self._buffer = []
+            self._buffered_size = 0
+        self._last_flush = time.time()
+
+
+def _log_lines(lgr, lines):
+    """Log each of `lines` as a record of its own, at INFO level.
+
+    Each of the handlers the records reach writes all of them at once,
+    formatted as it formats each record (e.g. each line in cli.log is
+    prefixed by its time and level), rather than writing (and flushing)
+    the records one by one.
+    """
+    if not lgr.isEnabledFor(logging.INFO):
+        return
+    records = [lgr.makeRecord(lgr.name, logging.INFO, '(unknown file)', 0,
+                              line, (), None) for line in lines]
+    records = [record for record in records if lgr.filter(record)]
+    while lgr and records:
+        for handler in lgr.handlers:
+            handled = [record for record in records
+                       if record.levelno >= handler.level and
+                       handler.filter(record)]
+            if handled:
+                _emit_batch(handler, handled)
+        lgr = lgr.parent if lgr.propagate else None
+
+
+def _emit_batch(handler, records):
+    """Have `handler` write `records`, as it would write a single record"""
+    handler.acquire()
+    try:
+        formatter = handler.formatter
+        handler.formatter = _BatchFormatter(formatter, records)
+        try:
+            handler.emit(records[-1])
+        finally:
+            handler.formatter = formatter
+    finally:
+        handler.release()
+
+
+class _BatchFormatter(logging.Formatter):
+    """Formats a batch of records, a line each, as `formatter` does"""
+
+    def __init__(self, formatter, records):
+        logging.Formatter.__init__(self)
+        self._formatter = formatter or logging._defaultFormatter
+        self._records = records
+
+    def format(self, record):
+        return '\n'.join(self._formatter.format(batched)
+                         for batched in self._records)
+
+
+class _EventTemplates(object):
+    """Renders events as `logs.create_event_message_prefix` does.
+
+    Events of the same kind (the same type, level, and fields) only differ
+    in the values of their fields, so the message of each kind is rendered
+    once by `logs.EVENT_CLASS` (e.g. `ColorfulEvent`), with markers in
+    place of the values, and kept as a template. The colors (and the rest
+    of the text) around the values are then reused as is.
+
+    Events whose message can't be rendered from a template (e.g. failed
+    tasks, with their causes) are rendered by the event class.
+    """
 
-    return json_events_logger if json_output else text_events_logger
+    # The fields of an event's context which are part of its message, if
+    # they're set
+    CONTEXT_FIELDS = ('operation', 'node_id', 'source_id', 'target_id',
+                      'group', 'policy', 'trigger')
+    # The types of the events whose message depends on the verbosity
+    VERBOSE_EVENT_TYPES = ('task_rescheduled', 'task_failed')
+
+    _MARKER = u'\x00{0}\x01'
+    _MARKER_PATTERN = re.compile(r'\x00(\w+)\x01')
+
+    def __init__(self):
+        self._templates = {}
+
+    def render(self, event):
+        """Return the message of `event`, or None if it isn't shown"""
+        try:
+            key, values = self._parse(event)
+        except (KeyError, TypeError, AttributeError):
+            key = None
+        if key is None:
+            return logs.create_event_message_prefix(event)
+        try:
+            template = self._templates[key]
+        except KeyError:
+            template = self._templates[key] = self._make_template(key)
+        if template is None:
+            return None
+        parts = list(template)
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return ''.join(parts)
+
+    def _parse(self, event):
+        """Return the kind of `event` (None if there's no template for it),
+        and the values of its fields
+        """
+        context = event['context']
+        is_log = 'cloudify_log' in event['type']
+        event_type = event.get('event_type')
+        verbosity = logs.EVENT_VERBOSITY_LEVEL
+        if not is_log and event_type in self.VERBOSE_EVENT_TYPES and \
+                verbosity > NO_VERBOSE:
+            return None, None
+        values = {
+            'timestamp': (event.get('@timestamp') or event['timestamp'])
+            .replace('T', ' ').replace('Z', ''),
+            'deployment_id': context['deployment_id'],
+            'message': event['message']['text'],
+        }
+        fields = tuple(field for field in self.CONTEXT_FIELDS
+                       if context.get(field) is not None)
+        for field in fields:
+            values[field] = context[field]
+        if 'operation' in values:
+            values['operation'] = values['operation'].split('.')[-1]
+        for name, value in values.items():
+            # empty values aren't colored, so they'd differ from the markers
+            if not value:
+                return None, None
+            values[name] = _to_str(value)
+        key = (logs.EVENT_CLASS, verbosity, is_log,
+               event['level'].upper() if is_log else None, event_type, fields)
+        return key, values
+
+    def _make_template(self, key):
+        """Return the literal parts of the message of the events of the kind
+        `key`, and the names of the fields in between, alternately (or None
+        if such events aren't shown)
+        """
+        event_class, verbosity, is_log, level, event_type, fields = key
+        marker = self._MARKER.format
+        event = {
+            'type': 'cloudify_log' if is_log else 'cloudify_event',
+            '@timestamp': marker('timestamp'),
+            'message': {'text': marker('message')},
+            'context': dict((field, marker(field))
+                            for field in fields + ('deployment_id',)),
+        }
+        if is_log:
+            event['level'] = level
+        if event_type is not None:
+            event['event_type'] = event_type
+        rendered = event_class(event, verbosity_level=verbosity)
+        if not rendered.has_output:
+            return None
+        return tuple(self._MARKER_PATTERN.split(str(rendered)))
+
+
+def _to_str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
 
 
 def set_global_verbosity_level(verbose):
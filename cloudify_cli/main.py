@@ -15,44 +15,24 @@
 ############
 
 
+from functools import partial
+
+from . import timings
 from . import env
 from . import logger
 from .cli import cfy
-from .commands import dev
-from .commands import ssh
-from .commands import init
-from .commands import logs
-from .commands import users
-from .commands import nodes
-from .commands import agents
-from .commands import events
-from .commands import groups
-from .commands import status
-from .commands import cluster
-from .commands import install
-from .commands import plugins
-from .commands import recover
-from .commands import upgrade
-from .commands import tenants
-from .commands import teardown
-from .commands import profiles
-from .commands import rollback
-from .commands import bootstrap
-from .commands import snapshots
-from .commands import uninstall
-from .commands import workflows
-from .commands import blueprints
-from .commands import executions
-from .commands import user_groups
-from .commands import deployments
-from .commands import node_instances
-from .commands import maintenance_mode
-
-
-@cfy.group(name='cfy')
+
+
+COMMANDS_PACKAGE = 'cloudify_cli.commands'
+
+
+@cfy.group(name='cfy', cls=cfy.LazyAliasedGroup)
 @cfy.options.verbose(expose_value=True)
 @cfy.options.version
-def _cfy(verbose):
+@cfy.options.refresh_version
+@cfy.options.timings
+@cfy.options.timings_trace
+def _cfy(verbose, version):
     """Cloudify's Command Line Interface
 
     Note that some commands are only available if you're using a manager.
@@ -74,72 +54,105 @@ def _register_commands():
     Here is where we decide which commands register with the cli
     and which don't. We should decide that according to whether
     a manager is currently `use`d or not.
+
+    Commands are registered lazily - a command's module is only imported
+    when the command is actually used.
     """
+    is_manager_active = env.is_manager_active()
+
     # Manager agnostic commands
-    _cfy.add_command(init.init)
-    _cfy.add_command(status.status)
-    _cfy.add_command(recover.recover)  # Recovers a manager. Doesn't require it
-    _cfy.add_command(profiles.profiles)
-    _cfy.add_command(bootstrap.bootstrap)
+    _add_command('init')
+    _add_command('status')
+    _add_command('recover')  # Recovers a manager. Doesn't require it
+    _add_command('profiles')
+    _add_command('bootstrap')
+    _add_command('shell')
+    _add_command('daemon')
 
     # Manager only commands
-    _cfy.add_command(dev.dev)
-    _cfy.add_command(ssh.ssh)
-    _cfy.add_command(logs.logs)
-    _cfy.add_command(users.users)
-    _cfy.add_command(agents.agents)
-    _cfy.add_command(events.events)
-    _cfy.add_command(cluster.cluster)
-    _cfy.add_command(plugins.plugins)
-    _cfy.add_command(upgrade.upgrade)
-    _cfy.add_command(tenants.tenants)
-    _cfy.add_command(teardown.teardown)
-    _cfy.add_command(rollback.rollback)
-    _cfy.add_command(snapshots.snapshots)
-    _cfy.add_command(user_groups.user_groups)
-    _cfy.add_command(maintenance_mode.maintenance_mode)
-
-    _cfy.add_command(nodes.nodes)
-    _cfy.add_command(groups.groups)
-
-    _cfy.add_command(workflows.workflows)
-    _cfy.add_command(blueprints.blueprints)
-    _cfy.add_command(executions.executions)
-    _cfy.add_command(deployments.deployments)
-
-    deployments.deployments.add_command(deployments.manager_create)
-    deployments.deployments.add_command(deployments.manager_delete)
-    deployments.deployments.add_command(deployments.manager_update)
-    deployments.deployments.add_command(deployments.manager_list)
-
-    executions.executions.add_command(executions.manager_cancel)
-    executions.executions.add_command(executions.manager_list)
-    executions.executions.add_command(executions.manager_get)
+    _add_command('dev')
+    _add_command('ssh')
+    _add_command('logs')
+    _add_command('users')
+    _add_command('agents')
+    _add_command('events')
+    _add_command('cluster')
+    _add_command('plugins')
+    _add_command('upgrade')
+    _add_command('tenants')
+    _add_command('teardown')
+    _add_command('rollback')
+    _add_command('snapshots')
+    _add_command('user-groups')
+    _add_command('maintenance-mode')
+
+    _add_command('nodes')
+    _add_command('groups')
+
+    _add_command('workflows')
+    _add_command('blueprints')
+    _add_command(
+        'executions',
+        callback=partial(_register_executions_commands, is_manager_active))
+    _add_command(
+        'deployments',
+        callback=partial(_register_deployments_commands, is_manager_active))
 
     # Commands which should be both in manager and local context
     # But change depending on the context.
-    if env.is_manager_active():
-        _cfy.add_command(install.manager)
-        _cfy.add_command(uninstall.manager)
-        _cfy.add_command(node_instances.manager)
+    context = 'manager' if is_manager_active else 'local'
+    _add_command('install', context)
+    _add_command('uninstall', context)
+    _add_command('node-instances', context)
+
 
-        deployments.deployments.add_command(deployments.manager_inputs)
-        deployments.deployments.add_command(deployments.manager_outputs)
+def _add_command(name, attribute=None, callback=None):
+    """Lazily register a command from the module of the same name.
 
-        executions.executions.add_command(executions.manager_start)
+    `attribute` is the name of the command within its module, which
+    defaults to the name of the module itself.
+    """
+    module_name = name.replace('-', '_')
+    _cfy.add_lazy_command(
+        name,
+        '{0}.{1}:{2}'.format(
+            COMMANDS_PACKAGE, module_name, attribute or module_name),
+        callback=callback)
+
+
+def _register_deployments_commands(is_manager_active, deployments_group):
+    from .commands import deployments
+
+    deployments_group.add_command(deployments.manager_create)
+    deployments_group.add_command(deployments.manager_delete)
+    deployments_group.add_command(deployments.manager_update)
+    deployments_group.add_command(deployments.manager_list)
+
+    if is_manager_active:
+        deployments_group.add_command(deployments.manager_inputs)
+        deployments_group.add_command(deployments.manager_outputs)
     else:
-        _cfy.add_command(install.local)
-        _cfy.add_command(uninstall.local)
-        _cfy.add_command(node_instances.local)
+        deployments_group.add_command(deployments.local_inputs)
+        deployments_group.add_command(deployments.local_outputs)
+
 
-        deployments.deployments.add_command(deployments.local_inputs)
-        deployments.deployments.add_command(deployments.local_outputs)
+def _register_executions_commands(is_manager_active, executions_group):
+    from .commands import executions
 
-        executions.executions.add_command(executions.local_start)
+    executions_group.add_command(executions.manager_cancel)
+    executions_group.add_command(executions.manager_list)
+    executions_group.add_command(executions.manager_get)
+
+    if is_manager_active:
+        executions_group.add_command(executions.manager_start)
+        executions_group.add_command(executions.manager_watch)
+    else:
+        executions_group.add_command(executions.local_start)
 
 
 _register_commands()
 logger.configure_loggers()
+timings.record(timings.IMPORTS, timings.get_start_time(), __name__)
 
 
 if __name__ == '__main__':
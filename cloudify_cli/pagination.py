@@ -0,0 +1,173 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Fetch a list of resources from the manager a page at a time.
+
+Listing all of the resources in one request means waiting for the manager
+to serialize all of them, and keeping all of them in memory, before any of
+them is shown. Instead, the list commands fetch the resources in pages
+(using the `_offset` and `_size` query parameters), and show each page as
+soon as it arrives. The next page may be fetched in the background, while
+the current one is shown.
+
+Only the fields which are shown are fetched (using `_include`), and the
+resources are filtered by the manager where possible. Filters by fields
+the manager can't filter by are applied to each page as it arrives.
+
+Note that pages are fetched by offset, so resources created or deleted
+while listing may be shown twice, or not at all.
+"""
+
+import sys
+import Queue
+import threading
+
+from . import constants
+from .concurrency import get_interruptibly
+
+
+def list_pages(list_func,
+               page_size=constants.DEFAULT_PAGE_SIZE,
+               prefetch=True,
+               include=None,
+               filters=None,
+               server_filter_fields=(),
+               **kwargs):
+    """Return an iterator over the pages of a rest client's list call.
+
+    :param list_func: The rest client's list method (e.g.
+                      `client.deployments.list`).
+    :param page_size: The number of resources per page.
+    :param prefetch: Whether to fetch the next page in the background,
+                     while the current one is being used.
+    :param include: The fields to fetch (e.g. the columns to be shown). All
+                    of the fields are fetched if it's None.
+    :param filters: A dict mapping fields to the values the resources
+                    listed must have.
+    :param server_filter_fields: The fields the manager can filter by.
+                                 Filters by any other field are applied
+                                 locally, to each page.
+    :param kwargs: Passed to `list_func` as is.
+
+    The first page is fetched right away, so that errors (e.g. listing the
+    executions of a deployment which doesn't exist) are raised by this
+    call, rather than while iterating.
+    """
+    server_filters, local_filters = _split_filters(
+        filters or {}, server_filter_fields)
+    kwargs.update(server_filters)
+    if include is not None and not local_filters:
+        # The fields filtered by locally might not be fields the manager
+        # can include, so everything is fetched when there are any
+        kwargs['_include'] = list(include)
+
+    def fetch(offset):
+        return list_func(_offset=offset, _size=page_size, **kwargs)
+
+    first_page = fetch(0)
+    pages = _iter_pages(fetch, first_page, page_size)
+    if prefetch:
+        pages = _prefetch(pages)
+    if local_filters:
+        pages = _filter_pages(pages, local_filters)
+    return pages
+
+
+def _split_filters(filters, server_filter_fields):
+    server_filters = {}
+    local_filters = {}
+    for key, value in filters.items():
+        if key in server_filter_fields:
+            server_filters[key] = value
+        else:
+            local_filters[key] = value
+    return server_filters, local_filters
+
+
+def _filter_pages(pages, filters):
+    for page in pages:
+        yield [item for item in page if all(
+            _matches(item.get(key), value) for key, value in filters.items())]
+
+
+def _matches(field_value, value):
+    if field_value is None:
+        return value in ('', 'None', 'null')
+    if isinstance(field_value, bool):
+        return str(field_value).lower() == value.lower()
+    return unicode(field_value) == value
+
+
+def _iter_pages(fetch, page, page_size):
+    offset = 0
+    while True:
+        yield page
+        offset += len(page)
+        if _is_last_page(page, offset, page_size):
+            return
+        page = fetch(offset)
+
+
+def _is_last_page(page, offset, page_size):
+    if len(page) < page_size:
+        return True
+    # Responses without pagination metadata (e.g. of older managers, which
+    # ignore `_offset`) hold all of the resources
+    metadata = getattr(page, 'metadata', None) or {}
+    total = metadata.get('pagination', {}).get('total')
+    return total is None or offset >= int(total)
+
+
+def _prefetch(pages):
+    """Fetch each page of `pages` while the previous one is being used.
+
+    If the iteration stops early, no more pages are fetched.
+    """
+    results = Queue.Queue(maxsize=1)
+    stopped = threading.Event()
+    done = object()
+
+    def put(result):
+        """Return whether `result` was put, before the iteration stopped"""
+        while not stopped.is_set():
+            try:
+                results.put(result, timeout=1)
+                return True
+            except Queue.Full:
+                continue
+        return False
+
+    def fetch_pages():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+            put((done, None))
+        except BaseException:
+            put((None, sys.exc_info()))
+
+    thread = threading.Thread(target=fetch_pages)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            page, exc_info = get_interruptibly(results)
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            if page is done:
+                return
+            yield page
+    finally:
+        stopped.set()
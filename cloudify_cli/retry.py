@@ -0,0 +1,246 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Retry failed requests, and poll the manager, with exponential backoff.
+
+The delay before each retry is random, between 0 and an exponentially
+growing cap ("full jitter"), so that the clients which failed together
+(e.g. when the manager restarted) don't all retry together as well.
+
+Requests to the manager are retried when the manager couldn't handle them
+(a connection error, or a 502, 503 or 504 response without an error code,
+as returned by the proxy in front of the REST service). Requests which
+aren't safe to send twice (e.g. creating a deployment) are only retried if
+they failed to connect, as otherwise the manager might have handled them.
+
+All of the requests a command sends share a retry budget, which limits
+the number of retries to a ratio of the number of requests, so that when
+the manager is down, retrying doesn't multiply the load on it. They share
+a deadline as well, counted from the start of the command, so that the
+time a command spends retrying doesn't grow with the number of requests
+it sends. The number of requests retried is reported by `--timings`.
+
+See `retry` in the config file for the settings of retrying requests.
+"""
+
+import sys
+import time
+import errno
+import random
+import threading
+
+import requests
+from cloudify_rest_client.exceptions import CloudifyClientError
+
+from . import timings
+
+# The default settings of retrying requests (see `retry` in the config file)
+DEFAULT_REQUEST_RETRY = {
+    'max_attempts': 4,
+    'base_delay': 0.5,
+    'max_delay': 10,
+    'deadline': 60,
+    'budget_ratio': 0.2,
+    'budget_min_retries': 10,
+}
+
+# Responses with these statuses are returned by the proxy in front of the
+# REST service, when the service is unavailable
+RETRYABLE_STATUSES = (502, 503, 504)
+# The methods of requests which are safe to send again, even if they might
+# have been handled already
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RetryBudget(object):
+    """The number of retries allowed, shared by several retry policies.
+
+    Each request adds `ratio` retries to the budget, on top of the
+    `min_retries` it starts with. The number of requests, retries, and
+    retries denied, are kept for reporting.
+    """
+
+    def __init__(self, ratio, min_retries):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.requests += 1
+        timings.count(timings.RETRY_REQUESTS)
+
+    def withdraw(self):
+        """Return whether a retry is allowed, and count it if it is"""
+        with self._lock:
+            allowed = \
+                self.retries < self.min_retries + self.ratio * self.requests
+            if allowed:
+                self.retries += 1
+            else:
+                self.denied += 1
+        timings.count(timings.RETRIES if allowed else timings.RETRIES_DENIED)
+        return allowed
+
+
+class RetryPolicy(object):
+    """When to try something again, and how long to wait before that.
+
+    :param max_attempts: The number of attempts to make, at most (None
+                         means there's no limit).
+    :param base_delay: The cap of the delay before the first retry, in
+                       seconds. It's doubled for each retry after that.
+    :param max_delay: The cap of the delay before any retry, in seconds.
+    :param deadline: The number of seconds since `start_time` after which
+                     no more attempts are made (None means there's no
+                     deadline).
+    :param budget: The `RetryBudget` retries are withdrawn from, if any.
+    :param start_time: The time the deadline is counted from (e.g. the time
+                       the command started). If it's None, it's counted
+                       from the first attempt of each call.
+    """
+
+    def __init__(self,
+                 max_attempts=None,
+                 base_delay=1,
+                 max_delay=30,
+                 deadline=None,
+                 budget=None,
+                 start_time=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget
+        self.start_time = start_time
+
+    def get_delay(self, attempt):
+        """Return the delay after the `attempt`th attempt (starting at 1)"""
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    def attempts(self, name=None):
+        """Yield the number of each attempt, sleeping between attempts.
+
+        Stop when all of the attempts were made, or when the deadline
+        passed. The last delay is shortened so that the last attempt is
+        made at the deadline.
+        """
+        start = self.start_time if self.start_time is not None \
+            else time.time()
+        attempt = 1
+        while True:
+            yield attempt
+            if self.max_attempts is not None and \
+                    attempt >= self.max_attempts:
+                return
+            delay = self.get_delay(attempt)
+            if self.deadline is not None:
+                remaining = start + self.deadline - time.time()
+                if remaining <= 0:
+                    return
+                delay = min(delay, remaining)
+            if self.budget is not None and not self.budget.withdraw():
+                return
+            with timings.span(timings.RETRY, name, attempt=attempt):
+                time.sleep(delay)
+            attempt += 1
+
+    def call(self, func, is_retryable=None, name=None, logger=None):
+        """Return what `func` returns, calling it again if it fails.
+
+        :param is_retryable: A function which is passed the error `func`
+                             raised, and returns whether to call it again.
+                             All errors are retried if it's None.
+        :param logger: Logs each failure which is retried, if it's passed.
+
+        Once no more attempts are allowed, the last error is raised.
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+        exc_info = None
+        for attempt in self.attempts(name):
+            try:
+                return func()
+            except Exception as e:
+                if is_retryable is not None and not is_retryable(e):
+                    raise
+                exc_info = sys.exc_info()
+                if logger is not None:
+                    logger.debug('Attempt {0} of {1} failed: {2}'.format(
+                        attempt, name or 'call', e))
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+
+_request_budget = None
+
+
+def get_request_retry_policy(settings=None):
+    """Return the policy of retrying requests to the manager.
+
+    The deadline of retrying is counted from the start of the command.
+
+    :param settings: A dict overriding `DEFAULT_REQUEST_RETRY`.
+    """
+    global _request_budget
+    settings = dict(DEFAULT_REQUEST_RETRY, **(settings or {}))
+    if _request_budget is None:
+        _request_budget = RetryBudget(settings['budget_ratio'],
+                                      settings['budget_min_retries'])
+    return RetryPolicy(max_attempts=settings['max_attempts'],
+                       base_delay=settings['base_delay'],
+                       max_delay=settings['max_delay'],
+                       deadline=settings['deadline'],
+                       budget=_request_budget,
+                       start_time=timings.get_start_time())
+
+
+def reset_request_budget():
+    """Start counting the requests and their retries anew"""
+    global _request_budget
+    _request_budget = None
+
+
+def is_retryable_request_error(method, error):
+    """Return whether a request which raised `error` should be retried"""
+    idempotent = method in IDEMPOTENT_METHODS
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return idempotent or _failed_to_connect(error)
+    if isinstance(error, requests.exceptions.Timeout):
+        return idempotent
+    if isinstance(error, CloudifyClientError):
+        # Errors the REST service returns on purpose (e.g. when the manager
+        # is in maintenance mode) have an error code
+        return idempotent and \
+            error.status_code in RETRYABLE_STATUSES and \
+            not getattr(error, 'error_code', None)
+    return False
+
+
+def _failed_to_connect(error):
+    """Return whether the request of a ConnectionError was never sent"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    # e.g. ProtocolError('Connection aborted.', error(111, ...)), or
+    # MaxRetryError(reason=NewConnectionError(...)) by newer versions
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', None) or reason
+    if type(reason).__name__ == 'NewConnectionError':
+        return True
+    return any(getattr(arg, 'errno', None) == errno.ECONNREFUSED
+               for arg in getattr(reason, 'args', ()))
@@ -0,0 +1,113 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Request bodies which can be sent more than once, in constant memory.
+
+A request to a cluster may have to be sent to several nodes, until the
+master is found. Uploads (e.g. of blueprints or snapshots) are sent as
+generators, which can only be iterated once, and may be too large to be
+kept in memory. A `RetryBody` replays such a body as many times as needed:
+
+- Generators reading a file (see `request_data_file_stream_gen`) are
+  simply recreated, so the file is read again.
+- Any other generator is spooled to a temporary file while it's sent, so
+  that it can be read from there when it's sent again.
+"""
+
+import tempfile
+import types
+
+from cloudify_rest_client.bytes_stream_utils import \
+    request_data_file_stream_gen
+
+# The size of the chunks spooled data is sent in
+CHUNK_SIZE = 64 * 1024
+
+
+class RetryBody(object):
+    """A request body which can be iterated over more than once.
+
+    Every iteration yields the whole body from its start. Use as a context
+    manager, or call `close`, to remove the spooled data, if any.
+    """
+
+    def __init__(self, data):
+        self._source = data
+        self._file_args = _get_file_args(data)
+        self._spool = None
+        self._spooled_size = 0
+
+    def __iter__(self):
+        if self._file_args is not None:
+            return request_data_file_stream_gen(*self._file_args)
+        return self._iter_spooled()
+
+    def _iter_spooled(self):
+        # Only one iteration may be running at a time, as the spool's
+        # position is shared (a failed request abandons its iteration
+        # before the body is sent again)
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile(prefix='cfy-body-')
+        offset = 0
+        while offset < self._spooled_size:
+            self._spool.seek(offset)
+            chunk = self._spool.read(
+                min(CHUNK_SIZE, self._spooled_size - offset))
+            offset += len(chunk)
+            yield chunk
+
+        # The rest of the body wasn't read from the source yet
+        for chunk in self._source:
+            self._spool.seek(self._spooled_size)
+            self._spool.write(chunk)
+            self._spooled_size += len(chunk)
+            yield chunk
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+            self._spooled_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _is_file_stream_gen(data):
+    return isinstance(data, types.GeneratorType) and \
+        data.gi_frame is not None and \
+        data.gi_frame.f_lasti == -1 and \
+        data.gi_code is request_data_file_stream_gen.func_code
+
+
+def _get_file_args(data):
+    """Return the arguments `data` was created with, if it's a generator
+    reading a file, which can be recreated from them (or None)
+    """
+    if not _is_file_stream_gen(data):
+        return None
+    # The generator wasn't started yet, so its arguments are all that's
+    # needed to recreate it
+    local_vars = data.gi_frame.f_locals
+    try:
+        return (local_vars['file_path'],
+                local_vars['buffer_size'],
+                local_vars['progress_callback'])
+    except KeyError:
+        # The rest client's arguments changed, so the body is spooled
+        return None
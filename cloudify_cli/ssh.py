@@ -16,26 +16,29 @@
 
 import os
 
-import fabric.api as fab
-
 from .logger import get_global_verbosity
 from .exceptions import CloudifyCliError
-from .env import profile, build_manager_host_string
+from . import env
+from .env import build_manager_host_string
 
 
 def get_manager_date():
+    import fabric.api as fab
+
     # output here should be hidden anyway.
     with fab.settings(fab.hide('running', 'stdout')):
         return run_command_on_manager('date +%Y%m%dT%H%M%S').stdout
 
 
 def get_file_from_manager(remote_source_path, destination_path):
-    key_filename = os.path.expanduser(profile.ssh_key)
+    import fabric.api as fab
+
+    key_filename = os.path.expanduser(env.profile.ssh_key)
     with fab.settings(
             fab.hide('running', 'stdout'),
             host_string=build_manager_host_string(),
             key_filename=key_filename,
-            port=profile.ssh_port):
+            port=env.profile.ssh_port):
         fab.get(remote_source_path, destination_path)
 
 
@@ -45,9 +48,11 @@ def put_file_in_manager(source_path,
                         key_filename=None,
                         user=None,
                         port=''):
-    port = port or profile.ssh_port
+    import fabric.api as fab
+
+    port = port or env.profile.ssh_port
     if not key_filename:
-        key_filename = os.path.expanduser(profile.ssh_key)
+        key_filename = os.path.expanduser(env.profile.ssh_key)
     with fab.settings(
             fab.hide('running', 'stdout'),
             host_string=build_manager_host_string(ssh_user=user),
@@ -69,13 +74,15 @@ def run_command_on_manager(command,
     `host_string` can be explicitly provided to save on REST calls.
     `force_output` forces all output as if running in verbose.
     """
+    import fabric.api as fab
+
     test_profile()
 
     host_string = host_string or build_manager_host_string()
-    port = int(profile.ssh_port)
+    port = int(env.profile.ssh_port)
 
     def execute():
-        key_filename = os.path.expanduser(profile.ssh_key)
+        key_filename = os.path.expanduser(env.profile.ssh_key)
         with fab.settings(
                 host_string=host_string,
                 key_filename=key_filename,
@@ -106,13 +113,13 @@ def test_profile():
     missing_config = False
     missing_part = ''
 
-    if not profile.ssh_user:
+    if not env.profile.ssh_user:
         missing_config = True
         missing_part = 'User'
-    elif not profile.ssh_key:
+    elif not env.profile.ssh_key:
         missing_config = True
         missing_part = 'Key'
-    elif not profile.ssh_port:
+    elif not env.profile.ssh_port:
         missing_config = True
         missing_part = 'Port'
 
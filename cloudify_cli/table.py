@@ -17,6 +17,7 @@
 import os
 from datetime import datetime
 
+from . import timings
 from .logger import get_logger
 
 from prettytable import PrettyTable
@@ -24,6 +25,28 @@ from prettytable import PrettyTable
 from cloudify_rest_client.responses import ListResponse
 
 
+class _PageTable(PrettyTable):
+    """A table whose columns are at least as wide as given.
+
+    Used for printing a table a page at a time, so that the columns of
+    each page line up with those of the pages before it.
+    """
+
+    def __init__(self, field_names, min_widths=None, **kwargs):
+        super(_PageTable, self).__init__(field_names, **kwargs)
+        self.min_widths = min_widths or [0] * len(field_names)
+
+    def _compute_widths(self, rows, options):
+        super(_PageTable, self)._compute_widths(rows, options)
+        self._widths = [max(width, min_width) for width, min_width in
+                        zip(self._widths, self.min_widths)]
+
+    @property
+    def widths(self):
+        """The widths of the columns, as of the last time it was printed"""
+        return self._widths
+
+
 def generate(cols, data, defaults=None):
     """
     Return a new PrettyTable instance representing the list.
@@ -66,7 +89,7 @@ def generate(cols, data, defaults=None):
         else:
             return defaults[column]
 
-    pt = PrettyTable([col for col in cols])
+    pt = _PageTable([col for col in cols])
 
     for d in data:
         values_row = []
@@ -82,6 +105,7 @@ def log(title, tb):
     logger.info('{0}{1}{0}{2}{0}'.format(os.linesep, title, tb))
 
 
+@timings.timed(timings.RENDER)
 def print_data(columns, items, header_text, max_width=None, defaults=None):
     if items is None:
         items = []
@@ -92,3 +116,34 @@ def print_data(columns, items, header_text, max_width=None, defaults=None):
     if max_width:
         pt.max_width = max_width
     log(header_text, pt)
+
+
+def print_pages(columns, pages, header_text, max_width=None, defaults=None):
+    """Print the items of each of `pages`, as one table.
+
+    Each page is printed as soon as it's available (e.g. as soon as it's
+    fetched from the manager, see `pagination.list_pages`), so the items
+    of all the pages are never held at once. The pages are separated by
+    a horizontal line, and the columns are widened as needed to fit each
+    page, so their widths might change between pages.
+    """
+    logger = get_logger()
+    widths = None
+    for page in pages:
+        if widths is not None and not page:
+            continue
+        with timings.span(timings.RENDER, 'print_pages'):
+            pt = generate(columns, data=page, defaults=defaults)
+            if max_width:
+                pt.max_width = max_width
+            if widths is None:
+                logger.info('{0}{1}{0}{2}'.format(
+                    os.linesep, header_text, pt.get_string()))
+            else:
+                # The bottom border of the previous page is the top
+                # border of this one
+                pt.header = False
+                pt.min_widths = widths
+                logger.info(pt.get_string().split('\n', 1)[1])
+            widths = pt.widths
+    logger.info('')
@@ -0,0 +1,153 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Measure the number of events per second the events logger prints.
+
+The events (and logs) of a fake manager's executions are printed in
+batches of 100, as they're fetched, by:
+
+- `per-event`: the events logger as it was, which printed (and, as JSON,
+  flushed) each event separately, rendering it with `logs.EVENT_CLASS`.
+- `batched`: `logger.EventsRenderer`, which renders a batch into a buffer,
+  from cached templates, and writes it at once.
+
+Each is run with plain and with colored messages, and as JSON. The output
+is written to /dev/null (both stdout and the log file), so only the time
+spent rendering and writing is measured.
+
+Run with: `python -m cloudify_cli.tests.benchmarks.events_render
+[-n RUNS] [-e EVENTS]`
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+from cloudify import logs
+
+from ... import logger
+from ...colorful_event import ColorfulEvent
+from ..fake_manager import make_dataset
+
+BATCH_SIZE = 100
+FORMATS = ['text', 'colors', 'json']
+
+
+def get_per_event_logger(json_output, lgr):
+    """Return the events logger as it was before events were batched"""
+
+    def json_events_logger(events):
+        for event in events:
+            sys.stdout.write('{}\n'.format(json.dumps(event)))
+            sys.stdout.flush()
+
+    def text_events_logger(events):
+        for event in events:
+            output = logs.create_event_message_prefix(event)
+            if output:
+                lgr.info(output)
+
+    return json_events_logger if json_output else text_events_logger
+
+
+def get_batched_logger(json_output, lgr):
+    logger._lgr = lgr
+    return logger.EventsRenderer(json_output)
+
+
+MODES = [('per-event', get_per_event_logger),
+         ('batched', get_batched_logger)]
+
+
+def _make_logger(stream):
+    lgr = logging.getLogger('cloudify.cli.benchmark')
+    lgr.handlers = []
+    lgr.propagate = False
+    lgr.setLevel(logging.INFO)
+    for formatter in ['%(message)s',
+                      '%(asctime)s [%(levelname)s] %(message)s']:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(formatter))
+        lgr.addHandler(handler)
+    return lgr
+
+
+def _run(get_events_logger, output_format, batches, devnull):
+    """Return the number of seconds printing all of `batches` took"""
+    event_class = ColorfulEvent if output_format == 'colors' \
+        else logs.EVENT_CLASS
+    original_stdout, original_event_class = sys.stdout, logs.EVENT_CLASS
+    sys.stdout, logs.EVENT_CLASS = devnull, event_class
+    try:
+        events_logger = get_events_logger(output_format == 'json',
+                                          _make_logger(devnull))
+        start = time.time()
+        for batch in batches:
+            events_logger(batch)
+        getattr(events_logger, 'flush', lambda: None)()
+        return time.time() - start
+    finally:
+        sys.stdout, logs.EVENT_CLASS = original_stdout, original_event_class
+
+
+def measure(events_count=20000, runs=3):
+    """Return a list of (format, mode, events per second) tuples.
+
+    Each is of the run which took the median time.
+    """
+    events = make_dataset(size=events_count // 10,
+                          events_per_execution=10)['events']
+    batches = [events[i:i + BATCH_SIZE]
+               for i in range(0, len(events), BATCH_SIZE)]
+    original_lgr = logger._lgr
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        try:
+            for output_format in FORMATS:
+                for mode, get_events_logger in MODES:
+                    seconds = sorted(
+                        _run(get_events_logger, output_format, batches,
+                             devnull) for _ in range(runs))[runs // 2]
+                    results.append((output_format, mode,
+                                    len(events) / seconds))
+        finally:
+            logger._lgr = original_lgr
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=3,
+                        help='Number of runs per mode (default: 3)')
+    parser.add_argument('-e', '--events', type=int, default=20000,
+                        help='The number of events printed per run '
+                             '(default: 20000)')
+    options = parser.parse_args()
+
+    row = '{0:<8} {1:<10} {2:>12} {3:>8}'
+    print(row.format('format', 'mode', 'events/sec', 'speedup'))
+    baseline = None
+    for output_format, mode, rate in measure(options.events, options.runs):
+        if mode == MODES[0][0]:
+            baseline = rate
+        print(row.format(output_format, mode, '{0:.0f}'.format(rate),
+                         '{0:.1f}x'.format(rate / baseline)))
+
+
+if __name__ == '__main__':
+    main()
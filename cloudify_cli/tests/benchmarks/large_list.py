@@ -0,0 +1,193 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Measure fetching and decoding a large list response.
+
+A local fake manager serves a list of node instances (100MB of JSON by
+default), and it's fetched by the CLI's HTTP client in several modes:
+
+- `buffered`: the body is read as a whole, then decoded.
+- `streamed`: the body is decoded as it's read (see `json_stream`).
+- `items`: the items are iterated over as they're decoded, as a command
+  rendering them as they arrive would.
+
+Each mode is run with and without gzip compression, in a fresh
+interpreter, so that the peak memory use (max RSS) of each is reported.
+
+Run with: `python -m cloudify_cli.tests.benchmarks.large_list [-n RUNS]
+[-s SIZE_MB]`
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+
+from ..fake_manager import FakeManager, gzip_compress
+from .suite import Workdir
+
+URI = '/node-instances'
+# The size of the runtime properties of each node instance
+ITEM_PADDING = 1024
+
+MODES = ['buffered', 'streamed', 'items']
+
+# Fetches the list once in the given mode, and prints the time it took, the
+# time until the first item was decoded, and the peak memory use
+RUNNER = """
+import sys
+import json
+import time
+import resource
+
+from cloudify_cli import env
+from cloudify_cli import json_stream
+from cloudify_cli import constants
+
+host, port, uri, mode, encoding = sys.argv[1:]
+client = env.SessionHTTPClient(host=host, port=int(port),
+                               headers={'Accept-Encoding': encoding})
+client.session = env.get_session()
+client.stream_json = mode == 'streamed'
+
+start = time.time()
+first_item = None
+if mode == 'items':
+    response = client.get(uri, stream=True)
+    count = 0
+    for _ in json_stream.iter_items(
+            response.bytes_stream(constants.JSON_STREAM_CHUNK_SIZE)):
+        if first_item is None:
+            first_item = time.time() - start
+        count += 1
+else:
+    count = len(client.get(uri)['items'])
+    first_item = time.time() - start
+print(json.dumps({
+    'seconds': time.time() - start,
+    'first_item': first_item,
+    'items': count,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+}))
+"""
+
+
+class LargeListManager(FakeManager):
+    """A fake manager serving a single, pre-encoded, large list"""
+
+    def __init__(self, size_mb):
+        super(LargeListManager, self).__init__(dataset={}, compress=True)
+        self.body = make_body(size_mb)
+        self.compressed_body = gzip_compress(self.body, level=1)
+
+    def __call__(self, environ, start_response):
+        if environ['PATH_INFO'] != '/api/v3' + URI:
+            return super(LargeListManager, self).__call__(
+                environ, start_response)
+        self.requests.append((environ['REQUEST_METHOD'],
+                              environ['PATH_INFO']))
+        headers = [('Content-Type', 'application/json')]
+        body = self.body
+        if 'gzip' in environ.get('HTTP_ACCEPT_ENCODING', ''):
+            body = self.compressed_body
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Length', str(len(body))))
+        start_response('200 OK', headers)
+        return [body]
+
+
+def make_body(size_mb):
+    """Return a list response of about `size_mb` MB of node instances"""
+    items = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        i = len(items)
+        item = json.dumps({
+            'id': 'node{0}_{1:06x}'.format(i % 10, i),
+            'node_id': 'node{0}'.format(i % 10),
+            'deployment_id': 'dep{0}'.format(i % 100),
+            'host_id': 'host_{0:06x}'.format(i),
+            'state': 'started',
+            'version': 1,
+            'relationships': [],
+            'runtime_properties': {
+                'ip': '10.0.{0}.{1}'.format(i // 256 % 256, i % 256),
+                'padding': '{0:x}'.format(i) * (ITEM_PADDING // 6)},
+            'created_by': 'admin',
+            'tenant_name': 'default_tenant',
+        })
+        items.append(item)
+        size += len(item) + 1
+    metadata = {'pagination': {'total': len(items),
+                               'offset': 0,
+                               'size': len(items)}}
+    return '{{"items": [{0}], "metadata": {1}}}'.format(
+        ','.join(items), json.dumps(metadata))
+
+
+def _run(workdir, manager, mode, encoding):
+    output = subprocess.check_output(
+        [sys.executable, '-c', RUNNER, manager.host, str(manager.port), URI,
+         mode, encoding],
+        env=workdir.environ,
+        cwd=workdir.path)
+    return json.loads(output)
+
+
+def measure(size_mb=100, runs=3):
+    """Return a list of (mode, encoding, result) tuples.
+
+    Each result is the run of the mode which took the median time.
+    """
+    manager = LargeListManager(size_mb)
+    manager.start()
+    results = []
+    try:
+        with Workdir() as workdir:
+            for mode in MODES:
+                for encoding in ('identity', 'gzip'):
+                    mode_runs = sorted(
+                        (_run(workdir, manager, mode, encoding)
+                         for _ in range(runs)),
+                        key=lambda result: result['seconds'])
+                    results.append((mode, encoding,
+                                    mode_runs[len(mode_runs) // 2]))
+    finally:
+        manager.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=3,
+                        help='Number of runs per mode (default: 3)')
+    parser.add_argument('-s', '--size', type=int, default=100,
+                        metavar='SIZE_MB',
+                        help='The size of the list response, in MB '
+                             '(default: 100)')
+    options = parser.parse_args()
+
+    row = '{0:<10} {1:<10} {2:>10} {3:>12} {4:>14}'
+    print(row.format('mode', 'encoding', 'total [s]', 'first item [s]',
+                     'max RSS [MB]'))
+    for mode, encoding, result in measure(options.size, options.runs):
+        print(row.format(mode, encoding,
+                         '{0:.2f}'.format(result['seconds']),
+                         '{0:.2f}'.format(result['first_item']),
+                         '{0:.0f}'.format(result['max_rss_mb'])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Measure the start up time of common `cfy` commands.
+
+Every command is run in a fresh interpreter (so that nothing is cached
+between runs) against a temporary, uninitialized working directory.
+Each command is timed twice: once as it runs normally (lazy command
+registration) and once after eagerly importing all command modules first,
+which is what the CLI used to do before dispatching any command.
+
+Run with: `python -m cloudify_cli.tests.benchmarks.startup [-n RUNS]`
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+
+COMMON_COMMANDS = [
+    ['--help'],
+    ['--version'],
+    ['profiles', 'list'],
+    ['blueprints', 'list', '--help'],
+    ['deployments', 'list', '--help'],
+    ['executions', 'list', '--help'],
+]
+
+# Runs the CLI the same way the `cfy` entry point does. When `eager` is
+# passed, all command modules are imported before `cloudify_cli.main`,
+# mimicking the old eager command registration.
+RUNNER = """
+import sys
+import pkgutil
+eager = sys.argv.pop(1) == 'eager'
+if eager:
+    import cloudify_cli.commands
+    for _, name, _ in pkgutil.iter_modules(cloudify_cli.commands.__path__):
+        __import__('cloudify_cli.commands.' + name)
+from cloudify_cli.main import _cfy
+_cfy(prog_name='cfy')
+"""
+
+
+def _time_command(args, mode, workdir):
+    env = os.environ.copy()
+    env['CFY_WORKDIR'] = workdir
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        subprocess.call(
+            [sys.executable, '-c', RUNNER, mode] + args,
+            stdout=devnull,
+            stderr=devnull,
+            env=env)
+    return time.time() - start
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def measure(commands=None, runs=5):
+    """Return a list of (command, eager_seconds, lazy_seconds) tuples.
+
+    The time reported for each mode is the median of `runs` runs.
+    """
+    workdir = tempfile.mkdtemp(prefix='cfy-startup-benchmark-')
+    try:
+        results = []
+        for args in commands or COMMON_COMMANDS:
+            timings = {}
+            for mode in ('eager', 'lazy'):
+                timings[mode] = _median(
+                    [_time_command(args, mode, workdir)
+                     for _ in range(runs)])
+            results.append((args, timings['eager'], timings['lazy']))
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help='Number of runs per command (default: 5)')
+    options = parser.parse_args()
+
+    row = '{0:<32} {1:>10} {2:>10} {3:>9}'
+    print(row.format('command', 'eager [s]', 'lazy [s]', 'speedup'))
+    for args, eager, lazy in measure(runs=options.runs):
+        print(row.format(
+            'cfy ' + ' '.join(args),
+            '{0:.3f}'.format(eager),
+            '{0:.3f}'.format(lazy),
+            '{0:.2f}x'.format(eager / lazy)))
+
+
+if __name__ == '__main__':
+    main()
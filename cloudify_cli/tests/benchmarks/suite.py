@@ -0,0 +1,362 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Measure the latency of `cfy` commands and of the CLI's start up steps.
+
+Two kinds of benchmarks are run, both in fresh interpreters, against a
+temporary working directory with a profile of a local fake manager (see
+`cloudify_cli.tests.fake_manager`), so that no network access is needed:
+
+- Commands (`cfy.*`) are timed from the interpreter's start to its exit.
+- Functions (e.g. `env.get_profile_context`) are timed in-process, after
+  being called once to warm up.
+
+The fake manager's dataset size, latency, and failure rate can be set,
+to see how the commands scale with the number of resources, and how they
+cope with a remote or an unreliable manager.
+
+The results are written as JSON, and can be compared to the results of
+an earlier run (e.g. of another commit) with `--compare`.
+
+Run with:
+`python -m cloudify_cli.tests.benchmarks.suite [-n RUNS] [-o OUTPUT.json]
+[--compare BASELINE.json] [-b PATTERN] [--dataset-size SIZE]
+[--latency SECONDS] [--failure-rate RATIO]`
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import platform
+import tempfile
+import argparse
+import subprocess
+
+import cloudify_cli
+
+from ..fake_manager import FakeManager, make_dataset
+
+RESULTS_FORMAT_VERSION = 2
+# How many items of each resource the fake manager lists
+DATASET_SIZE = 100
+# Relative slow downs greater than this are reported as regressions
+REGRESSION_THRESHOLD = 0.1
+# The settings of the fake manager the commands are run against
+DEFAULT_MANAGER_SETTINGS = {
+    'dataset_size': DATASET_SIZE,
+    # Delay each response by this many seconds
+    'latency': 0,
+    # The ratio of requests which fail as if the manager was unavailable
+    'failure_rate': 0,
+}
+
+# Runs the CLI the same way the `cfy` entry point does
+COMMAND_RUNNER = """
+from cloudify_cli.daemon import launch
+launch()
+"""
+
+# Calls a function `number` times per run, and prints the time per call of
+# each run, in seconds
+FUNCTION_RUNNER = """
+import sys
+import json
+import timeit
+setup, statement, runs, number = sys.argv[1:]
+timer = timeit.Timer(statement, setup)
+timer.timeit(number=1)
+print(json.dumps([t / int(number) for t in
+                  timer.repeat(repeat=int(runs), number=int(number))]))
+"""
+
+COMMANDS = [
+    ('cfy.help', ['--help']),
+    ('cfy.version', ['--version']),
+    ('cfy.blueprints_list', ['blueprints', 'list']),
+    ('cfy.deployments_list', ['deployments', 'list']),
+    ('cfy.executions_list', ['executions', 'list']),
+    ('cfy.executions_get', ['executions', 'get', 'exec0']),
+    ('cfy.executions_start', ['executions', 'start', 'install',
+                              '-d', 'dep0']),
+    ('cfy.events_list', ['events', 'list', '-e', 'exec0', '--include-logs']),
+    ('cfy.nodes_list', ['nodes', 'list']),
+    ('cfy.node_instances_list', ['node-instances', 'list']),
+    ('cfy.maintenance_mode_status', ['maintenance-mode', 'status']),
+    ('cfy.cluster_status', ['cluster', 'status']),
+]
+
+# (name, setup, statement, calls per run)
+FUNCTIONS = [
+    ('env.get_profile_context',
+     'from cloudify_cli import env',
+     'env.get_profile_context()',
+     100),
+    ('logger.configure_loggers',
+     'from cloudify_cli import logger',
+     'logger.configure_loggers()',
+     100),
+    ('main.register_commands',
+     'from cloudify_cli import main',
+     'main._register_commands()',
+     100),
+]
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Workdir(object):
+    """A temporary CLI working directory, using a fake manager.
+
+    :param manager_settings: The settings of the fake manager (see
+                             `DEFAULT_MANAGER_SETTINGS`).
+    """
+
+    def __init__(self, **manager_settings):
+        self.path = None
+        self.manager = None
+        self.manager_settings = dict(DEFAULT_MANAGER_SETTINGS,
+                                     **manager_settings)
+
+    def __enter__(self):
+        self.path = tempfile.mkdtemp(prefix='cfy-benchmark-')
+        settings = self.manager_settings
+        self.manager = FakeManager(make_dataset(settings['dataset_size']))
+        self.manager.start()
+        try:
+            self.run_command(['profiles', 'use', self.manager.host,
+                              '--rest-port', str(self.manager.port),
+                              '-u', 'admin', '-p', 'admin',
+                              '-t', 'default_tenant'])
+        except BaseException:
+            self.__exit__()
+            raise
+        # only the measured commands are slowed down, or fail
+        self.manager.latency = settings['latency']
+        self.manager.failure_rate = settings['failure_rate']
+        return self
+
+    def __exit__(self, *_):
+        self.manager.stop()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @property
+    def environ(self):
+        environ = os.environ.copy()
+        environ['CFY_WORKDIR'] = self.path
+        # The commands are run in the working directory, so the CLI has to
+        # be importable from anywhere (e.g. when run from a source checkout)
+        environ['PYTHONPATH'] = os.pathsep.join(
+            [_get_source_root()] + filter(None, [environ.get('PYTHONPATH')]))
+        # Make sure that the commands are run by the measured process
+        environ.pop('CFY_DAEMON', None)
+        return environ
+
+    def run_command(self, args):
+        return self._run([sys.executable, '-c', COMMAND_RUNNER] + args)
+
+    def run_function(self, setup, statement, runs, number):
+        return json.loads(self._run([sys.executable, '-c', FUNCTION_RUNNER,
+                                     setup, statement, str(runs),
+                                     str(number)]))
+
+    def _run(self, command):
+        process = subprocess.Popen(command,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT,
+                                   env=self.environ,
+                                   cwd=self.path)
+        output = process.communicate()[0]
+        if process.returncode != 0:
+            raise BenchmarkError('`{0}` failed:\n{1}'.format(
+                ' '.join(command[3:]), output))
+        return output
+
+
+def _get_source_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(
+        cloudify_cli.__file__)))
+
+
+def _time_command(workdir, args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.time()
+        workdir.run_command(args)
+        timings.append(time.time() - start)
+    return timings
+
+
+def _summarize(timings):
+    timings = sorted(timings)
+    count = len(timings)
+    mean = sum(timings) / count
+    middle = count // 2
+    median = timings[middle] if count % 2 else \
+        (timings[middle - 1] + timings[middle]) / 2.0
+    return {
+        'unit': 'seconds',
+        'runs': timings,
+        'min': timings[0],
+        'median': median,
+        'mean': mean,
+        'stdev': (sum((t - mean) ** 2 for t in timings) / count) ** 0.5,
+    }
+
+
+def run(runs=5, pattern='*', **manager_settings):
+    """Run the benchmarks whose names match `pattern`.
+
+    Return a dict mapping the names of the benchmarks to a summary of
+    their timings.
+
+    :param manager_settings: The settings of the fake manager (see
+                             `DEFAULT_MANAGER_SETTINGS`).
+    """
+    results = {}
+    with Workdir(**manager_settings) as workdir:
+        for name, args in COMMANDS:
+            if fnmatch.fnmatch(name, pattern):
+                results[name] = _summarize(
+                    _time_command(workdir, args, runs))
+        for name, setup, statement, number in FUNCTIONS:
+            if fnmatch.fnmatch(name, pattern):
+                results[name] = _summarize(
+                    workdir.run_function(setup, statement, runs, number))
+    return results
+
+
+def _get_commit():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=devnull).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(results, runs, manager_settings=None):
+    return {
+        'version': RESULTS_FORMAT_VERSION,
+        'manager': dict(DEFAULT_MANAGER_SETTINGS, **(manager_settings or {})),
+        'commit': _get_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs,
+        'benchmarks': results,
+    }
+
+
+def compare(baseline, results):
+    """Return (name, baseline median, median, ratio) tuples.
+
+    Only the benchmarks present in both `baseline` and `results` are
+    compared.
+    """
+    comparison = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        before = baseline[name]['median']
+        after = results[name]['median']
+        comparison.append((name, before, after, after / before))
+    return comparison
+
+
+def _format_seconds(seconds):
+    if seconds < 0.001:
+        return '{0:.1f}us'.format(seconds * 10 ** 6)
+    if seconds < 1:
+        return '{0:.1f}ms'.format(seconds * 1000)
+    return '{0:.2f}s'.format(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help='Number of runs per benchmark (default: 5)')
+    parser.add_argument('-o', '--output',
+                        help='Write the results to this JSON file')
+    parser.add_argument('-c', '--compare', metavar='BASELINE',
+                        help='Compare the results to the results in this '
+                             'JSON file (e.g. of another commit)')
+    parser.add_argument('-b', '--bench', default='*', metavar='PATTERN',
+                        help='Only run the benchmarks matching this glob '
+                             'pattern (e.g. `cfy.*`)')
+    parser.add_argument('--dataset-size', type=int, default=DATASET_SIZE,
+                        metavar='SIZE',
+                        help='Number of items of each resource the fake '
+                             'manager has (default: {0})'.format(
+                                 DATASET_SIZE))
+    parser.add_argument('--latency', type=float, default=0,
+                        metavar='SECONDS',
+                        help='Delay each of the fake manager\'s responses '
+                             'by this many seconds (default: 0)')
+    parser.add_argument('--failure-rate', type=float, default=0,
+                        metavar='RATIO',
+                        help='Ratio of the requests to the fake manager '
+                             'which fail as if it was unavailable '
+                             '(default: 0)')
+    options = parser.parse_args()
+
+    manager_settings = {'dataset_size': options.dataset_size,
+                        'latency': options.latency,
+                        'failure_rate': options.failure_rate}
+    results = run(runs=options.runs, pattern=options.bench,
+                  **manager_settings)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(make_report(results, options.runs, manager_settings),
+                      f, indent=2, sort_keys=True)
+
+    row = '{0:<28} {1:>10} {2:>10} {3:>10}'
+    print(row.format('benchmark', 'median', 'min', 'stdev'))
+    for name in sorted(results):
+        print(row.format(name, *[_format_seconds(results[name][key])
+                                 for key in ('median', 'min', 'stdev')]))
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline_report = json.load(f)
+        baseline = baseline_report['benchmarks']
+        baseline_settings = baseline_report.get('manager')
+        if baseline_settings and baseline_settings != manager_settings:
+            print('Warning: the baseline was measured against a fake '
+                  'manager with other settings: {0}'.format(', '.join(
+                      '{0}={1}'.format(key, value) for key, value in
+                      sorted(baseline_settings.items()))))
+        regressions = 0
+        print('')
+        print(row.format('benchmark', 'baseline', 'current', 'ratio'))
+        for name, before, after, ratio in compare(baseline, results):
+            regressed = ratio > 1 + REGRESSION_THRESHOLD
+            regressions += regressed
+            print(row.format(name,
+                             _format_seconds(before),
+                             _format_seconds(after),
+                             '{0:.2f}x'.format(ratio)) +
+                  (' REGRESSION' if regressed else ''))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -65,7 +65,7 @@ def invoke(command, capture, context=None):
     if lexed_command[0] == 'cfy':
         del lexed_command[0]
     # For commands which contain a dash (like maintenance-mode)
-    if lexed_command[0] == '--version':
+    if '--version' in lexed_command:
         func = lexed_command[0]
         is_version = True
     else:
@@ -79,8 +79,13 @@ def invoke(command, capture, context=None):
     # init module from `commands` and then get the `init` command
     # from that module, hence the attribute getting.
     if is_version:
-        outcome = cfy.invoke(getattr(main, '_cfy'), ['--version'])
+        outcome = cfy.invoke(getattr(main, '_cfy'), lexed_command)
     else:
+        # Commands are registered lazily, so resolve the command through
+        # the CLI first. This imports its module and attaches any context
+        # specific subcommands, just like running `cfy` would.
+        if lexed_command[0] in main._cfy.list_commands(None):
+            main._cfy.get_command(None, lexed_command[0])
         outcome = cfy.invoke(getattr(
             getattr(commands, func), sub_func), params)
     outcome.command = command
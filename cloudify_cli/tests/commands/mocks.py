@@ -133,10 +133,6 @@ def mock_activated_status():
     return Maintenance({'status': 'activated'})
 
 
-def mock_is_timeout(*_):
-    return True
-
-
 def node_instance_get_mock():
     return NodeInstance({
         'id': uuid4(),
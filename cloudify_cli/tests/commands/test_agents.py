@@ -0,0 +1,125 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from mock import patch
+
+from ... import env
+from ..fake_manager import FakeManager, make_dataset
+from .test_base import CliCommandTest
+from ...exceptions import SuppressedCloudifyCliError
+
+
+class AgentsInstallTest(CliCommandTest):
+
+    def setUp(self):
+        super(AgentsInstallTest, self).setUp()
+        dataset = make_dataset(size=10)
+        # dep3 isn't installed
+        dataset['node-instances'][3]['state'] = 'created'
+        self.manager = FakeManager(dataset, execution_duration=0.1)
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.use_manager(manager_ip=self.manager.host,
+                         rest_port=self.manager.port)
+        # the command is run against the fake manager, rather than a mock
+        env.get_rest_client = self.original_utils_get_rest_client
+
+    def _started_executions(self):
+        return [execution for execution in self.manager.dataset['executions']
+                if execution['workflow_id'] == 'install_new_agents']
+
+    def test_install_all(self):
+        outcome = self.invoke('cfy agents install')
+        started = sorted(execution['deployment_id']
+                         for execution in self._started_executions())
+        self.assertEqual(['dep{0}'.format(i) for i in range(10) if i != 3],
+                         started)
+        self.assertIn('[9/9]', outcome.logs)
+        self.assertIn('Installed agents on 9 of 9 deployment(s)',
+                      outcome.logs)
+
+    def test_installed_state_checked_in_one_batch(self):
+        self.invoke('cfy agents install')
+        listings = [path for method, path in self.manager.requests
+                    if method == 'GET' and
+                    path.endswith(('/deployments', '/node-instances'))]
+        self.assertEqual(2, len(listings))
+
+    def test_concurrency(self):
+        running = []
+        post_execution = self.manager._post_execution
+
+        def record_running(*args, **kwargs):
+            running.append(len(self.manager._running))
+            return post_execution(*args, **kwargs)
+
+        self.manager._post_execution = record_running
+        self.invoke('cfy agents install --concurrency 2')
+        self.assertEqual(9, len(running))
+        self.assertLessEqual(max(running), 2)
+
+    def test_requests_rate_limited(self):
+        with patch('cloudify_cli.concurrency.TokenBucket.acquire') as acquire:
+            self.invoke('cfy agents install --max-request-rate 5')
+        self.assertEqual(len(self.manager.requests), acquire.call_count)
+        # the client is reused by later commands, which aren't limited
+        self.assertIsNone(env.get_rest_client()._client.rate_limiter)
+
+    def test_install_one(self):
+        outcome = self.invoke('cfy agents install dep5')
+        self.assertEqual(['dep5'], [execution['deployment_id'] for execution
+                                    in self._started_executions()])
+        self.assertIn('Installed agents on 1 of 1 deployment(s)',
+                      outcome.logs)
+
+    def test_not_installed(self):
+        outcome = self.invoke('cfy agents install dep3',
+                              err_str_segment='',
+                              exception=SuppressedCloudifyCliError)
+        self.assertIn("Deployment 'dep3' is not installed", outcome.logs)
+        self.assertEqual([], self._started_executions())
+
+    def test_not_found(self):
+        outcome = self.invoke('cfy agents install no-such-dep',
+                              err_str_segment='',
+                              exception=SuppressedCloudifyCliError)
+        self.assertIn('Could not find deployment', outcome.logs)
+
+    def test_failures_summarized(self):
+        post_execution = self.manager._post_execution
+
+        def fail_dep1(parts, data):
+            if data.get('deployment_id') == 'dep1':
+                return '500 INTERNAL SERVER ERROR', {
+                    'message': 'failed to start',
+                    'error_code': 'internal_server_error',
+                    'server_traceback': None}
+            return post_execution(parts, data)
+
+        self.manager._post_execution = fail_dep1
+        outcome = self.invoke('cfy agents install',
+                              err_str_segment='',
+                              exception=SuppressedCloudifyCliError)
+        self.assertIn('Installed agents on 8 of 9 deployment(s)',
+                      outcome.logs)
+        self.assertIn('1 failed', outcome.logs)
+        self.assertIn("deployment 'dep1': 500: failed to start",
+                      outcome.logs)
+
+    def test_invalid_request_rate(self):
+        outcome = self.invoke('cfy agents install --max-request-rate 0',
+                              err_str_segment='2',
+                              exception=SystemExit)
+        self.assertIn('must be positive', outcome.output)
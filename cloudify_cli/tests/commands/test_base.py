@@ -39,6 +39,7 @@ class CliCommandTest(testtools.TestCase):
         super(CliCommandTest, self).setUp()
         logdir = os.path.dirname(env.DEFAULT_LOG_FILE)
         env.profile = env.ProfileContext()
+        env.clear_rest_clients()
         cfy.invoke('init -r')
         # create log folder
         if not os.path.exists(logdir):
@@ -23,8 +23,8 @@ from cloudify_rest_client.exceptions import NotClusterMaster
 from ... import env
 from .test_base import CliCommandTest
 from ...exceptions import CloudifyCliError
-from ...commands.cluster import _wait_for_cluster_initialized
-from ...execution_events_fetcher import WAIT_FOR_EXECUTION_SLEEP_INTERVAL
+from ...commands.cluster import (_wait_for_cluster_initialized,
+                                 CLUSTER_STATUS_MAX_POLL_INTERVAL)
 
 
 class WaitForClusterTest(unittest.TestCase):
@@ -39,7 +39,7 @@ class WaitForClusterTest(unittest.TestCase):
             side_effect=[ClusterState({'initialized': False})] * 4 +
                         [ClusterState({'initialized': True})])
 
-        with mock.patch('cloudify_cli.commands.cluster.time') as mock_time:
+        with mock.patch('cloudify_cli.retry.time') as mock_time:
             mock_time.time.return_value = 0
             status = _wait_for_cluster_initialized(client)
         self.assertEqual(5, len(client.cluster.status.mock_calls))
@@ -59,7 +59,7 @@ class WaitForClusterTest(unittest.TestCase):
         def _mock_time():
             return clock['time']
 
-        with mock.patch('cloudify_cli.commands.cluster.time') as mock_time:
+        with mock.patch('cloudify_cli.retry.time') as mock_time:
             mock_time.sleep = mock.Mock(side_effect=_mock_sleep)
             mock_time.time = _mock_time
 
@@ -67,10 +67,15 @@ class WaitForClusterTest(unittest.TestCase):
                 _wait_for_cluster_initialized(client, timeout=timeout)
 
         self.assertIn('timed out', cm.exception.message.lower())
-        # there should be (timeout//interval) time.sleep(interval) calls,
-        # so the total time waited is equal to timeout
-        self.assertEqual(timeout // WAIT_FOR_EXECUTION_SLEEP_INTERVAL,
-                         len(mock_time.sleep.mock_calls))
+        # the total time waited is equal to timeout, and the status was
+        # polled once more at the timeout
+        self.assertEqual(1000 + timeout, clock['time'])
+        self.assertEqual(len(mock_time.sleep.mock_calls) + 1,
+                         len(client.cluster.status.mock_calls))
+        # the intervals between polls are random, and capped
+        for sleep_call in mock_time.sleep.mock_calls:
+            self.assertLessEqual(sleep_call[1][0],
+                                 CLUSTER_STATUS_MAX_POLL_INTERVAL)
 
     def test_passes_log_cursor(self):
         # prepare mock status responses containing logs. The first status
@@ -97,7 +102,7 @@ class WaitForClusterTest(unittest.TestCase):
         client = mock.Mock()
         client.cluster.status = mock.Mock(side_effect=status_responses)
 
-        with mock.patch('cloudify_cli.commands.cluster.time') as mock_time:
+        with mock.patch('cloudify_cli.retry.time') as mock_time:
             mock_time.time.return_value = 1000
             _wait_for_cluster_initialized(client, logger=mock.Mock())
         self.assertEqual(4, len(client.cluster.status.mock_calls))
@@ -139,7 +144,7 @@ class ClusterStartTest(CliCommandTest):
             ClusterState({'initialized': True}),
         ])
         self.client.cluster.start = mock.Mock()
-        with mock.patch('cloudify_cli.commands.cluster.time') as mock_time:
+        with mock.patch('cloudify_cli.retry.time') as mock_time:
             mock_time.time.return_value = 1000
             outcome = self.invoke(
                 'cfy cluster start --cluster-host-ip 1.2.3.4')
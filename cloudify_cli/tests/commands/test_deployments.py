@@ -238,10 +238,17 @@ class DeploymentsTest(CliCommandTest):
             }
         ]
 
-        self.client.deployments.list = MagicMock(return_value=deps)
+        def list_deployments(blueprint_id, **kwargs):
+            return [dep for dep in deps if dep['blueprint_id'] == blueprint_id]
+
+        self.client.deployments.list = MagicMock(side_effect=list_deployments)
         outcome = self.invoke('cfy deployments list -b b1_blueprint -v')
         self.assertNotIn('b2_blueprint', outcome.logs)
         self.assertIn('b1_blueprint', outcome.logs)
+        # the deployments are filtered by the manager
+        self.assertEqual(
+            'b1_blueprint',
+            self.client.deployments.list.call_args[1]['blueprint_id'])
 
     def test_deployments_execute_nonexistent_operation(self):
         # Verifying that the CLI allows for arbitrary operation names,
@@ -2,11 +2,16 @@ import os
 
 from mock import MagicMock, patch
 
+from cloudify_rest_client import CloudifyClient
+
+from ... import env
 from .. import cfy
+from ..fake_manager import FakeManager, make_dataset
 from .mocks import execution_mock
 from .constants import BLUEPRINTS_DIR, DEFAULT_BLUEPRINT_FILE_NAME
 from .test_base import CliCommandTest
 from ...commands import executions
+from ...exceptions import SuppressedCloudifyCliError
 from cloudify_rest_client.exceptions import \
     DeploymentEnvironmentCreationPendingError, \
     DeploymentEnvironmentCreationInProgressError
@@ -133,3 +138,73 @@ class ExecutionsTest(CliCommandTest):
 
         self.invoke('cfy init {0}'.format(blueprint_path))
         cfy.register_commands()
+
+
+class ExecutionsWatchTest(CliCommandTest):
+
+    def setUp(self):
+        super(ExecutionsWatchTest, self).setUp()
+        self.manager = FakeManager(make_dataset(size=10),
+                                   execution_duration=0.2)
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.use_manager(manager_ip=self.manager.host,
+                         rest_port=self.manager.port)
+        # the command is run against the fake manager, rather than a mock
+        env.get_rest_client = self.original_utils_get_rest_client
+        self.manager_client = CloudifyClient(host=self.manager.host,
+                                             port=self.manager.port)
+        self.started = [
+            self.manager_client.executions.start('dep{0}'.format(i),
+                                                 'install')
+            for i in range(3)]
+
+    def test_watch_running_executions(self):
+        outcome = self.invoke('cfy executions watch')
+        self.assertIn('Watching 3 executions', outcome.logs)
+        for execution in self.started:
+            self.assertIn('{0}  '.format(execution.id), outcome.logs)
+            self.assertEqual('terminated', self.manager_client.executions.get(
+                execution.id).status)
+        self.assertIn("'install' workflow execution succeeded",
+                      outcome.logs)
+        # the events of all of the executions are shown as they arrive,
+        # rather than the events of one execution after the other's
+        start_events = [outcome.logs.index(
+            '{0}  '.format(execution.id)) for execution in self.started]
+        self.assertLess(max(start_events), outcome.logs.index('succeeded'))
+
+    def test_watch_by_id(self):
+        execution_id = self.started[1].id
+        outcome = self.invoke('cfy executions watch {0}'.format(
+            execution_id))
+        self.assertIn('Watching 1 executions', outcome.logs)
+        self.assertNotIn(self.started[0].id, outcome.logs)
+        self.assertIn(execution_id, outcome.logs)
+
+    def test_watch_by_deployment_id_pattern(self):
+        outcome = self.invoke("cfy executions watch -d 'dep[12]'")
+        self.assertIn('Watching 2 executions', outcome.logs)
+        self.assertNotIn(self.started[0].id, outcome.logs)
+
+    def test_unsuccessful_executions(self):
+        self.manager_client.executions.cancel(self.started[0].id)
+        self.invoke('cfy executions watch --status cancelled '
+                    '--status started',
+                    err_str_segment='',
+                    exception=SuppressedCloudifyCliError)
+
+    def test_no_executions(self):
+        outcome = self.invoke('cfy executions watch -w uninstall')
+        self.assertIn('No executions to watch', outcome.logs)
+
+    def test_execution_not_found(self):
+        self.invoke('cfy executions watch no-such-execution',
+                    err_str_segment='Execution no-such-execution not found')
+
+    def test_system_workflow_not_matched_by_deployment_id(self):
+        execution = self.manager.dataset['executions'][-1]
+        execution['deployment_id'] = None
+        outcome = self.invoke("cfy executions watch {0} -d 'dep*'".format(
+            execution['id']))
+        self.assertIn('No executions to watch', outcome.logs)
@@ -1,7 +1,9 @@
-from mock import MagicMock, patch, call
+from mock import MagicMock, patch
+
+from cloudify_rest_client.maintenance import Maintenance
 
 from .test_base import CliCommandTest
-from .mocks import mock_activated_status, mock_is_timeout
+from .mocks import mock_activated_status
 
 
 class MaintenanceModeTest(CliCommandTest):
@@ -27,14 +29,27 @@ class MaintenanceModeTest(CliCommandTest):
                 self.invoke('cfy maintenance-mode activate --wait')
                 self.invoke('cfy maintenance-mode '
                             'activate --wait --timeout 20')
-                sleep_mock.assert_has_calls([call(5), call(5)])
+                # the status is polled after a random interval, of up to
+                # 5 seconds at first
+                self.assertEqual(2, sleep_mock.call_count)
+                for sleep_call in sleep_mock.mock_calls:
+                    self.assertLessEqual(sleep_call[1][0], 5)
 
     def test_activate_maintenance_timeout(self):
-        with patch('cloudify_cli.commands.maintenance_mode._is_timeout',
-                   new=mock_is_timeout):
+        clock = {'time': 1000}
+
+        def _mock_sleep(n):
+            clock['time'] += n
+
+        self.client.maintenance_mode.status = MagicMock(
+            return_value=Maintenance({'status': 'activating'}))
+        with patch('cloudify_cli.retry.time') as mock_time:
+            mock_time.time = lambda: clock['time']
+            mock_time.sleep = MagicMock(side_effect=_mock_sleep)
             self.invoke(
-                'cfy maintenance-mode activate --wait',
+                'cfy maintenance-mode activate --wait --timeout 60',
                 err_str_segment='Timed out while entering maintenance mode')
+        self.assertEqual(1060, clock['time'])
 
     def test_activate_maintenance_timeout_no_wait(self):
         self.invoke('cfy maintenance-mode activate --timeout 5',
@@ -0,0 +1,82 @@
+import sys
+
+from mock import MagicMock
+
+from ... import env
+from ... import main
+from ... import logger
+from .test_base import CliCommandTest
+from ...commands import install
+from ...commands.shell import Session
+
+
+class ShellTest(CliCommandTest):
+
+    def setUp(self):
+        super(ShellTest, self).setUp()
+        self.addCleanup(setattr, sys, 'excepthook', sys.excepthook)
+
+    def test_run_command(self):
+        self.assertEqual(0, Session().run('profiles list'))
+
+    def test_cfy_prefix(self):
+        self.assertEqual(0, Session().run('cfy profiles list'))
+
+    def test_empty_line(self):
+        self.assertEqual(0, Session().run('   '))
+
+    def test_no_such_command(self):
+        self.assertEqual(2, Session().run('no-such-command'))
+
+    def test_invalid_quoting(self):
+        self.assertEqual(2, Session().run('blueprints upload "path'))
+
+    def test_failed_command(self):
+        session = Session()
+        self.assertEqual(1, session.run('status'))
+        self.assertEqual(1, session.status)
+
+    def test_help(self):
+        self.assertEqual(0, Session().run('profiles --help'))
+
+    def test_verbosity_is_reset(self):
+        Session().run('profiles list -vvv')
+        self.assertEqual(logger.NO_VERBOSE, logger.get_global_verbosity())
+
+    def test_command_uses_manager_client(self):
+        self.use_manager()
+        self.client.blueprints.list = MagicMock(return_value=[])
+        session = Session()
+        self.assertEqual(0, session.run('blueprints list'))
+        self.assertEqual(0, session.run('blueprints list'))
+        self.assertEqual(2, self.client.blueprints.list.call_count)
+
+    def test_profile_reloaded_when_changed(self):
+        session = Session()
+        self.use_manager()
+        # A stale profile, which should be replaced with the active one
+        env.profile = env.ProfileContext()
+
+        session.run('profiles list')
+        self.assertEqual('10.10.1.10', env.profile.manager_ip)
+        self.assertIs(install.manager, main._cfy.get_command(None, 'install'))
+
+    def test_profile_not_reloaded_when_unchanged(self):
+        self.use_manager()
+        session = Session()
+        profile = env.profile
+
+        session.run('profiles list')
+        self.assertIs(profile, env.profile)
+
+    def test_clients_not_reused_by_next_command(self):
+        self.use_manager()
+        env.get_rest_client = self.original_utils_get_rest_client
+        session = Session()
+        client = env.get_rest_client()
+        http_session = env.get_session()
+        session.run('profiles list')
+        # the next command's client is configured anew, but its
+        # connections are kept alive
+        self.assertIsNot(client, env.get_rest_client())
+        self.assertIs(http_session, env.get_session())
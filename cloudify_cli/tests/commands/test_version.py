@@ -1,5 +1,11 @@
+import time
+import threading
+
 import mock
+import requests
 
+from ... import env
+from ... import constants
 from .test_base import CliCommandTest
 
 
@@ -18,10 +24,116 @@ class VersionTest(CliCommandTest):
         outcome = self.invoke('cfy --version')
         self.assertIn('Cloudify CLI', outcome.logs)
 
-    @mock.patch('cloudify_cli.env.is_manager_active', return_value=True)
     @mock.patch('cloudify_cli.env.get_manager_version_data',
                 return_value=manager_data())
     def test_version_with_manager(self, *_):
+        self.use_manager()
         outcome = self.invoke('cfy --version')
         self.assertIn('Cloudify Manager', outcome.logs)
         self.assertIn('ip=10.10.1.10', outcome.logs)
+
+
+class ManagerVersionCacheTest(CliCommandTest):
+
+    def setUp(self):
+        super(ManagerVersionCacheTest, self).setUp()
+        self.use_manager()
+        self.client.manager.api.get = mock.MagicMock(
+            side_effect=lambda *_, **__: manager_data())
+
+    def _cache(self, version, age=0):
+        env.profile.manager_version = {
+            'data': {'version': version, 'ip': '10.10.1.10'},
+            'timestamp': time.time() - age
+        }
+
+    def test_version_is_cached(self):
+        self.invoke('cfy --version')
+        outcome = self.invoke('cfy --version')
+        self.assertIn('Cloudify Manager 3.4.0', outcome.logs)
+        self.assertEqual(1, self.client.manager.api.get.call_count)
+        self.assertEqual(
+            '3.4.0',
+            env.get_profile_context().manager_version['data']['version'])
+
+    def test_short_timeout(self):
+        self.invoke('cfy --version')
+        _, kwargs = self.client.manager.api.get.call_args
+        self.assertEqual(constants.MANAGER_VERSION_TIMEOUT, kwargs['timeout'])
+
+    def test_stale_version_is_fetched(self):
+        self._cache('3.3.0', age=constants.MANAGER_VERSION_CACHE_TTL + 1)
+        outcome = self.invoke('cfy --version')
+        self.assertIn('Cloudify Manager 3.4.0', outcome.logs)
+
+    def test_refresh(self):
+        self._cache('3.3.0')
+        outcome = self.invoke('cfy --version')
+        self.assertIn('Cloudify Manager 3.3.0', outcome.logs)
+        outcome = self.invoke('cfy --version --refresh')
+        self.assertIn('Cloudify Manager 3.4.0', outcome.logs)
+        outcome = self.invoke('cfy --refresh --version')
+        self.assertIn('Cloudify Manager 3.4.0', outcome.logs)
+
+    def test_unreachable_manager(self):
+        self._cache('3.3.0', age=constants.MANAGER_VERSION_CACHE_TTL + 1)
+        self.client.manager.api.get.side_effect = \
+            requests.exceptions.ConnectTimeout()
+        outcome = self.invoke('cfy --version')
+        self.assertIn('Cloudify Manager 3.3.0', outcome.logs)
+
+    def test_version_header_updates_cache(self):
+        client = env.CloudifySessionClient(host='10.10.1.10')
+        response = mock.Mock(
+            status_code=200,
+            headers={constants.CLOUDIFY_VERSION_HEADER: '4.0.1'})
+        response.json.return_value = {}
+        with mock.patch('requests.get', return_value=response):
+            client.blueprints.api.get('/blueprints')
+        self.assertEqual('4.0.1', env.get_manager_version_data()['version'])
+        self.assertEqual(
+            '4.0.1',
+            env.get_profile_context().manager_version['data']['version'])
+
+    def test_unchanged_version_header_not_saved(self):
+        self._cache('4.0.1')
+        with mock.patch('cloudify_cli.env.ProfileContext.save') as save:
+            env.update_cached_manager_version('10.10.1.10', '4.0.1')
+            self.assertFalse(save.called)
+            env.update_cached_manager_version('10.10.1.10', '4.0.2')
+            self.assertTrue(save.called)
+
+    def test_other_managers_not_cached(self):
+        env.update_cached_manager_version('10.10.1.11', '4.0.1')
+        self.assertIsNone(env.profile.manager_version)
+
+    def test_saved_by_one_thread_at_a_time(self):
+        lock = threading.Lock()
+        saving = [0]
+        max_saving = [0]
+        save = env.ProfileContext.save
+
+        def record_saving(profile, *args, **kwargs):
+            with lock:
+                saving[0] += 1
+                max_saving[0] = max(max_saving[0], saving[0])
+            time.sleep(0.01)
+            try:
+                return save(profile, *args, **kwargs)
+            finally:
+                with lock:
+                    saving[0] -= 1
+
+        threads = [threading.Thread(
+            target=env.update_cached_manager_version,
+            args=('10.10.1.10', '4.0.{0}'.format(i))) for i in range(5)]
+        with mock.patch('cloudify_cli.env.ProfileContext.save',
+                        record_saving):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(1, max_saving[0])
+        self.assertIn(
+            env.get_profile_context().manager_version['data']['version'],
+            ['4.0.{0}'.format(i) for i in range(5)])
@@ -0,0 +1,538 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""A fake Cloudify manager, serving the REST API over real HTTP.
+
+Unlike the mocked rest client used by most of the tests, this lets the CLI
+run as it would against a manager, so that it can be timed end to end,
+offline. Only the endpoints the CLI uses are implemented, over an
+in-memory dataset.
+
+To see how the CLI copes with a slow or a failing manager, each response
+can be delayed (`latency`), and some of them can fail as they would if the
+REST service was unavailable (`failure_rate`, `fail_next`). A manager which
+isn't the master of its cluster (`master=False`) fails all requests with
+a "not cluster master" error, as a cluster's replicas do.
+
+Executions started on the fake manager run for `execution_duration`
+seconds, and then succeed, adding the events a workflow would.
+"""
+
+import json
+import time
+import uuid
+import random
+import threading
+from gzip import GzipFile
+from StringIO import StringIO
+from urlparse import parse_qs
+from datetime import datetime, timedelta
+from SocketServer import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+API_PREFIX = '/api/v3'
+MANAGER_VERSION = '4.0.0'
+TENANT_NAME = 'default_tenant'
+TIMESTAMP = '2017-01-01 00:00:00.000000'
+# The time of the first event in the dataset
+EVENTS_START = datetime(2017, 1, 1)
+ENCRYPTION_KEY = 'ZmFrZS1lbmNyeXB0aW9uLWtleQ=='
+
+# The endpoints which are served while maintenance mode is active
+MAINTENANCE_MODE_PATHS = ['/api/version',
+                          API_PREFIX + '/status',
+                          API_PREFIX + '/maintenance']
+
+# The body of the errors returned by the proxy in front of the REST service
+PROXY_ERROR_BODY = '<html><body><h1>{0}</h1></body></html>'
+
+
+def make_dataset(size=100, events_per_execution=10):
+    """Return a dataset with `size` items of each of the resources.
+
+    Each of the executions has `events_per_execution` events (and logs),
+    from `workflow_started` to `workflow_succeeded`.
+    """
+    common = {'created_at': TIMESTAMP,
+              'updated_at': TIMESTAMP,
+              'permission': 'creator',
+              'tenant_name': TENANT_NAME}
+
+    def items(make_item):
+        return [dict(common, **make_item(i)) for i in range(size)]
+
+    def events():
+        for i in range(size):
+            for j in range(events_per_execution):
+                if j == 0:
+                    event_type = 'workflow_started'
+                elif j == events_per_execution - 1:
+                    event_type = 'workflow_succeeded'
+                elif j % 2:
+                    event_type = None
+                else:
+                    event_type = 'task_succeeded'
+                yield make_event(
+                    EVENTS_START + timedelta(
+                        milliseconds=i * events_per_execution + j),
+                    event_type=event_type,
+                    execution_id='exec{0}'.format(i),
+                    deployment_id='dep{0}'.format(i),
+                    workflow_id='install',
+                    node_id='node{0}'.format(i),
+                    message='{0} number {1} of exec{2}'.format(
+                        'Event' if event_type else 'Log', j, i))
+
+    return {
+        'blueprints': items(lambda i: {
+            'id': 'bp{0}'.format(i),
+            'description': 'Blueprint number {0}'.format(i),
+            'main_file_name': 'blueprint.yaml',
+            'plan': {}}),
+        'deployments': items(lambda i: {
+            'id': 'dep{0}'.format(i),
+            'blueprint_id': 'bp{0}'.format(i),
+            'inputs': {},
+            'outputs': {},
+            'workflows': []}),
+        'executions': items(lambda i: {
+            'id': 'exec{0}'.format(i),
+            'workflow_id': 'install',
+            'deployment_id': 'dep{0}'.format(i),
+            'blueprint_id': 'bp{0}'.format(i),
+            'status': 'terminated',
+            'error': '',
+            'parameters': {},
+            'is_system_workflow': False}),
+        'events': list(events()),
+        'nodes': items(lambda i: {
+            'id': 'node{0}'.format(i),
+            'deployment_id': 'dep{0}'.format(i),
+            'blueprint_id': 'bp{0}'.format(i),
+            'host_id': 'node{0}'.format(i),
+            'type': 'cloudify.nodes.Compute',
+            'type_hierarchy': ['cloudify.nodes.Root',
+                               'cloudify.nodes.Compute'],
+            'number_of_instances': 1,
+            'planned_number_of_instances': 1,
+            'deploy_number_of_instances': 1,
+            'properties': {},
+            'operations': {},
+            'plugins': [],
+            'relationships': []}),
+        'node-instances': items(lambda i: {
+            'id': 'node{0}_{1:06x}'.format(i, i),
+            'node_id': 'node{0}'.format(i),
+            'deployment_id': 'dep{0}'.format(i),
+            'host_id': 'node{0}_{1:06x}'.format(i, i),
+            'state': 'started',
+            'version': 1,
+            'relationships': [],
+            'runtime_properties': {
+                'ip': '10.0.{0}.{1}'.format(i // 256 % 256, i % 256)}}),
+        'plugins': items(lambda i: {
+            'id': 'plugin{0}'.format(i),
+            'package_name': 'plugin{0}'.format(i),
+            'package_version': '1.0',
+            'supported_platform': 'any',
+            'distribution': None,
+            'distribution_release': None,
+            'uploaded_at': TIMESTAMP}),
+    }
+
+
+def make_event(timestamp, execution_id, deployment_id, message,
+               event_type=None, **context):
+    """Return an event, or a log if it has no `event_type`"""
+    event = {
+        '@timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:23] + 'Z',
+        'type': 'cloudify_event' if event_type else 'cloudify_log',
+        'message': {'text': message, 'arguments': None},
+        'context': dict(context,
+                        execution_id=execution_id,
+                        deployment_id=deployment_id),
+    }
+    if event_type:
+        event['event_type'] = event_type
+    else:
+        event['level'] = 'info'
+    return event
+
+
+def make_cluster_nodes(count, master=0):
+    """Return the nodes of a cluster of `count` managers"""
+    return [{'name': 'manager{0}'.format(i),
+             'host_ip': '10.0.0.{0}'.format(i + 1),
+             'master': i == master,
+             'online': True,
+             'initialized': True,
+             'credentials': None} for i in range(count)]
+
+
+class FakeManager(object):
+    """A WSGI application acting as a manager, and the server running it.
+
+    :param dataset: A dict mapping resource names to lists of items
+                    (see `make_dataset`).
+    :param compress: Whether to gzip the responses to requests which
+                     accept it, as a manager's proxy might.
+    :param latency: The number of seconds each response is delayed by.
+    :param failure_rate: The ratio of requests (chosen at random) which
+                         fail with `failure_status`, as they would if the
+                         REST service was unavailable.
+    :param failure_status: The status of the failed responses.
+    :param seed: The seed of the random choice of the failed requests, so
+                 that the same ones fail in each run.
+    :param cluster_nodes: The nodes of the cluster the manager belongs to
+                          (see `make_cluster_nodes`), if any.
+    :param master: Whether the manager is the master of its cluster.
+    :param execution_duration: The number of seconds the executions
+                               started on the manager run for.
+    """
+
+    def __init__(self, dataset=None, host='127.0.0.1', port=0,
+                 compress=False, latency=0, failure_rate=0,
+                 failure_status='503 Service Unavailable', seed=0,
+                 cluster_nodes=None, master=True, execution_duration=0):
+        self.dataset = dataset if dataset is not None else make_dataset()
+        self.compress = compress
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.cluster_nodes = cluster_nodes
+        self.master = master
+        self.execution_duration = execution_duration
+        self.maintenance_status = 'deactivated'
+        self.requests = []
+        self._random = random.Random(seed)
+        self._failures = []
+        self._running = {}
+        self._lock = threading.Lock()
+        self._server = make_server(host, port, self,
+                                   server_class=_ThreadingWSGIServer,
+                                   handler_class=_QuietRequestHandler)
+        self._thread = None
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        # a short poll interval, so that stopping the server is quick
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def fail_next(self, count=1, status=None):
+        """Fail the next `count` requests with `status` (by default, with
+        `failure_status`)
+        """
+        with self._lock:
+            self._failures.extend([status or self.failure_status] * count)
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ['PATH_INFO']
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        self.requests.append((method, path))
+        if self.latency:
+            time.sleep(self.latency)
+
+        failure = self._get_failure()
+        if failure:
+            start_response(failure, [('Content-Type', 'text/html')])
+            return [PROXY_ERROR_BODY.format(failure)]
+        if not self.master:
+            status, body = _error('400 Bad Request',
+                                  'This node is not the cluster master',
+                                  error_code='not_cluster_master')
+        elif self.maintenance_status == 'activated' and \
+                not any(path.startswith(allowed)
+                        for allowed in MAINTENANCE_MODE_PATHS):
+            status, body = _error('503 Service Unavailable',
+                                  'Your request was rejected since Cloudify '
+                                  'manager is currently in maintenance mode',
+                                  error_code='maintenance_mode_active')
+        else:
+            with self._lock:
+                self._finish_executions()
+                status, body = self._handle(method, path, query,
+                                            _read_body(environ))
+        return self._respond(environ, start_response, status,
+                             '' if body is None else json.dumps(body))
+
+    def _get_failure(self):
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+            if self.failure_rate and \
+                    self._random.random() < self.failure_rate:
+                return self.failure_status
+        return None
+
+    def _respond(self, environ, start_response, status, body):
+        headers = [('Content-Type', 'application/json')]
+        if self.compress and body and \
+                'gzip' in environ.get('HTTP_ACCEPT_ENCODING', ''):
+            body = gzip_compress(body)
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Length', str(len(body))))
+        start_response(status, headers)
+        return [body]
+
+    def _handle(self, method, path, query, data):
+        if path == '/api/version':
+            return '200 OK', {'version': MANAGER_VERSION,
+                              'edition': 'community',
+                              'build': None, 'date': None, 'commit': None}
+        if not path.startswith(API_PREFIX):
+            return _not_found(path)
+        parts = path[len(API_PREFIX):].strip('/').split('/')
+        if method == 'POST':
+            if parts[0] == 'executions':
+                return self._post_execution(parts, data)
+            if parts[0] == 'maintenance':
+                return self._post_maintenance(parts)
+        if method != 'GET':
+            return _error('405 Method Not Allowed',
+                          'Method {0} is not supported'.format(method),
+                          error_code='method_not_allowed_error')
+
+        if parts == ['status']:
+            return '200 OK', {'status': 'running', 'services': []}
+        if parts == ['provider', 'context']:
+            return '200 OK', {'name': 'provider', 'context': {}}
+        if parts == ['maintenance']:
+            return '200 OK', self._get_maintenance_state()
+        if parts[0] == 'cluster':
+            return self._get_cluster(parts)
+        if parts[0] not in self.dataset:
+            return _not_found(path)
+        items = self.dataset[parts[0]]
+        if len(parts) == 1:
+            return '200 OK', _list(items, query)
+        return _get(items, parts[0], parts[1], query)
+
+    def _post_execution(self, parts, data):
+        if len(parts) == 2:
+            for execution in self.dataset['executions']:
+                if execution['id'] == parts[1]:
+                    return self._cancel_execution(execution)
+            return _not_found_resource('executions', parts[1])
+
+        for deployment in self.dataset['deployments']:
+            if deployment['id'] == data['deployment_id']:
+                break
+        else:
+            return _not_found_resource('deployments', data['deployment_id'])
+        now = datetime.utcnow()
+        execution = {
+            'id': str(uuid.uuid4()),
+            'workflow_id': data['workflow_id'],
+            'deployment_id': deployment['id'],
+            'blueprint_id': deployment['blueprint_id'],
+            'status': 'started',
+            'error': '',
+            'parameters': data.get('parameters') or {},
+            'is_system_workflow': False,
+            'created_at': now.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            'permission': 'creator',
+            'tenant_name': TENANT_NAME}
+        self.dataset['executions'].append(execution)
+        self._add_event(execution, 'workflow_started',
+                        "Starting '{0}' workflow execution")
+        self._running[execution['id']] = \
+            (time.time() + self.execution_duration, execution)
+        return '201 CREATED', execution
+
+    def _cancel_execution(self, execution):
+        if execution['status'] in ('terminated', 'failed', 'cancelled'):
+            return _error('400 Bad Request',
+                          "Can't cancel execution {0} in status {1}".format(
+                              execution['id'], execution['status']),
+                          error_code='invalid_execution_update_status_error')
+        self._running.pop(execution['id'], None)
+        execution['status'] = 'cancelled'
+        self._add_event(execution, 'workflow_cancelled',
+                        "'{0}' workflow execution cancelled")
+        return '200 OK', execution
+
+    def _finish_executions(self):
+        now = time.time()
+        for execution_id, (end, execution) in self._running.items():
+            if end <= now:
+                del self._running[execution_id]
+                execution['status'] = 'terminated'
+                self._add_event(execution, 'workflow_succeeded',
+                                "'{0}' workflow execution succeeded")
+
+    def _add_event(self, execution, event_type, message):
+        self.dataset.setdefault('events', []).append(make_event(
+            datetime.utcnow(),
+            event_type=event_type,
+            execution_id=execution['id'],
+            deployment_id=execution['deployment_id'],
+            workflow_id=execution['workflow_id'],
+            message=message.format(execution['workflow_id'])))
+
+    def _get_maintenance_state(self):
+        return {'status': self.maintenance_status,
+                'activated_at': '',
+                'activation_requested_at': '',
+                'remaining_executions': None,
+                'requested_by': ''}
+
+    def _post_maintenance(self, parts):
+        status = {'activate': 'activated',
+                  'deactivate': 'deactivated'}.get(parts[-1])
+        if status is None or len(parts) != 2:
+            return _not_found(API_PREFIX + '/' + '/'.join(parts))
+        if status == self.maintenance_status:
+            return '304 Not Modified', None
+        self.maintenance_status = status
+        return '200 OK', self._get_maintenance_state()
+
+    def _get_cluster(self, parts):
+        nodes = self.cluster_nodes or []
+        if parts == ['cluster']:
+            return '200 OK', {
+                'initialized': bool(nodes),
+                'encryption_key': ENCRYPTION_KEY if nodes else None,
+                'logs': [],
+                'error': None}
+        if parts[1:2] != ['nodes']:
+            return _not_found(API_PREFIX + '/' + '/'.join(parts))
+        if len(parts) == 2:
+            return '200 OK', _list(nodes, {})
+        for node in nodes:
+            if node['name'] == parts[2]:
+                return '200 OK', node
+        return _not_found_resource('cluster nodes', parts[2])
+
+
+def gzip_compress(data, level=6):
+    compressed = StringIO()
+    with GzipFile(fileobj=compressed, mode='wb', compresslevel=level) as f:
+        f.write(data)
+    return compressed.getvalue()
+
+
+def _read_body(environ):
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    if not length:
+        return {}
+    return json.loads(environ['wsgi.input'].read(length))
+
+
+def _get(items, resource, item_id, query):
+    for item in items:
+        if item['id'] == item_id:
+            return '200 OK', _project(item, query)
+    return _not_found_resource(resource, item_id)
+
+
+def _list(items, query):
+    """Return a page of the items matching the query.
+
+    Besides filtering by a field's values, the items can be filtered by a
+    range of a field's values (e.g. `_range=@timestamp,FROM,TO`). Events are
+    filtered by the fields of their context as well (e.g. `execution_id`).
+    """
+    filters = dict((key, values) for key, values in query.items()
+                   if not key.startswith('_'))
+    items = [item for item in items
+             if all(_matches(item, key, values)
+                    for key, values in filters.items()) and
+             all(_in_range(item, value) for value in query.get('_range', []))]
+    sort = _get_param(query, '_sort')
+    if sort:
+        items = sorted(items, key=lambda item: item.get(sort.lstrip('-')),
+                       reverse=sort.startswith('-'))
+    offset = int(_get_param(query, '_offset', 0))
+    size = int(_get_param(query, '_size', 1000))
+    return {
+        'items': [_project(item, query)
+                  for item in items[offset:offset + size]],
+        'metadata': {'pagination': {'total': len(items),
+                                    'offset': offset,
+                                    'size': size}}
+    }
+
+
+def _get_param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+def _matches(item, key, values):
+    if key in item:
+        value = item[key]
+    else:
+        value = item.get('context', {}).get(key)
+    return str(value) in values
+
+
+def _in_range(item, range_filter):
+    key, start, end = range_filter.split(',')
+    value = item.get(key)
+    return (not start or value >= start) and (not end or value <= end)
+
+
+def _project(item, query):
+    include = _get_param(query, '_include')
+    if not include:
+        return item
+    return dict((key, item.get(key)) for key in include.split(','))
+
+
+def _not_found(path):
+    return _error('404 Not Found', 'No such endpoint: {0}'.format(path))
+
+
+def _not_found_resource(resource, item_id):
+    return _error('404 Not Found', 'Requested `{0}` with ID `{1}` '
+                                   'was not found'.format(resource, item_id))
+
+
+def _error(status, message, error_code='not_found_error'):
+    return status, {'message': message,
+                    'error_code': error_code,
+                    'server_traceback': None}
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,133 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+import os
+import json
+import time
+
+from mock import MagicMock, patch
+
+from ..cli import completion_cache
+from .commands.test_base import CliCommandTest
+
+
+class CompletionCacheTest(CliCommandTest):
+
+    def setUp(self):
+        super(CompletionCacheTest, self).setUp()
+        self.use_manager()
+        self.fetch = MagicMock(return_value=['dep1', 'dep2', 'other'])
+
+    def _write_cache(self, cache_name, ids, age=0, tenant_name=None):
+        path = completion_cache.get_cache_path(cache_name)
+        if tenant_name:
+            path = os.path.join(os.path.dirname(os.path.dirname(path)),
+                                tenant_name,
+                                os.path.basename(path))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            json.dump({'timestamp': time.time() - age, 'ids': ids}, f)
+        return path
+
+    def test_ids_are_fetched_once(self):
+        self.assertEqual(['dep1', 'dep2'], completion_cache.get_ids(
+            'deployments', self.fetch, 'dep'))
+        self.assertEqual(['other'], completion_cache.get_ids(
+            'deployments', self.fetch, 'o'))
+        self.assertEqual(1, self.fetch.call_count)
+
+    def test_cache_per_name(self):
+        completion_cache.get_ids('deployments', self.fetch)
+        completion_cache.get_ids('blueprints', self.fetch)
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_stale_ids_returned_and_refreshed(self):
+        self._write_cache('deployments', ['stale'],
+                          age=completion_cache.CACHE_TTL + 1)
+        with patch.object(completion_cache,
+                          '_refresh_in_background') as refresh:
+            self.assertEqual(['stale'], completion_cache.get_ids(
+                'deployments', self.fetch))
+        self.assertTrue(refresh.called)
+        self.assertFalse(self.fetch.called)
+
+    def test_fresh_ids_not_refreshed(self):
+        self._write_cache('deployments', ['fresh'])
+        with patch.object(completion_cache,
+                          '_refresh_in_background') as refresh:
+            completion_cache.get_ids('deployments', self.fetch)
+        self.assertFalse(refresh.called)
+
+    def test_refresh_in_background(self):
+        path = self._write_cache('deployments', ['stale'],
+                                 age=completion_cache.CACHE_TTL + 1)
+        completion_cache._refresh_in_background(path, self.fetch)
+
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            ids = completion_cache._read(path)['ids']
+            if ids != ['stale']:
+                break
+            time.sleep(0.05)
+        self.assertEqual(['dep1', 'dep2', 'other'], ids)
+
+    def test_single_refresh_at_a_time(self):
+        path = completion_cache.get_cache_path('deployments')
+        os.makedirs(os.path.dirname(path))
+        self.assertTrue(completion_cache._acquire_refresh_lock(path))
+        self.assertFalse(completion_cache._acquire_refresh_lock(path))
+        completion_cache._release_refresh_lock(path)
+        self.assertTrue(completion_cache._acquire_refresh_lock(path))
+
+    def test_abandoned_refresh_lock(self):
+        path = completion_cache.get_cache_path('deployments')
+        os.makedirs(os.path.dirname(path))
+        self.assertTrue(completion_cache._acquire_refresh_lock(path))
+        abandoned = time.time() - completion_cache.REFRESH_TIMEOUT - 1
+        os.utime(path + '.lock', (abandoned, abandoned))
+        self.assertTrue(completion_cache._acquire_refresh_lock(path))
+
+    def test_invalidate_all_tenants(self):
+        paths = [self._write_cache('deployments', ['dep']),
+                 self._write_cache('deployments', ['dep'], tenant_name='t2')]
+        blueprints_path = self._write_cache('blueprints', ['bp'])
+
+        completion_cache.invalidate('deployments')
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertTrue(os.path.exists(blueprints_path))
+
+    def test_local_profile_not_cached(self):
+        self.invoke('cfy profiles use local')
+        completion_cache.get_ids('deployments', self.fetch)
+        completion_cache.get_ids('deployments', self.fetch)
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_blueprint_delete_invalidates_cache(self):
+        path = self._write_cache('blueprints', ['bp'])
+        self.client.blueprints.delete = MagicMock()
+        self.invoke('cfy blueprints delete bp')
+        self.assertFalse(os.path.exists(path))
+
+    def test_deployment_delete_invalidates_cache(self):
+        paths = [
+            self._write_cache('deployments', ['dep']),
+            self._write_cache(
+                completion_cache.workflows_cache_name('dep'), ['install'])
+        ]
+        self.client.deployments.delete = MagicMock()
+        self.invoke('cfy deployments delete dep')
+        self.assertFalse(any(os.path.exists(path) for path in paths))
@@ -0,0 +1,123 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import threading
+import unittest
+
+from mock import patch
+
+from .. import concurrency
+from .test_retry import _FakeClock
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        patcher = patch('cloudify_cli.concurrency.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_allowed(self):
+        bucket = concurrency.TokenBucket(rate=10)
+        for _ in range(10):
+            bucket.acquire()
+        self.assertEqual([], self.clock.sleeps)
+        self.assertEqual(0, bucket.waits)
+
+    def test_rate_limited_once_empty(self):
+        bucket = concurrency.TokenBucket(rate=10, capacity=2)
+        for _ in range(12):
+            bucket.acquire()
+        self.assertEqual(10, len(self.clock.sleeps))
+        # 10 more requests, at 10 per second
+        self.assertAlmostEqual(1, sum(self.clock.sleeps))
+        self.assertEqual(10, bucket.waits)
+
+    def test_refilled_over_time(self):
+        bucket = concurrency.TokenBucket(rate=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 10
+        # the bucket holds no more than its capacity
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual([], self.clock.sleeps)
+        bucket.acquire()
+        self.assertEqual([0.5], self.clock.sleeps)
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, concurrency.TokenBucket, 0)
+
+
+class ImapUnorderedTest(unittest.TestCase):
+
+    def test_results(self):
+        results = concurrency.imap_unordered(lambda x: x * 2, range(20), 4)
+        self.assertEqual(
+            [(i, i * 2, None) for i in range(20)],
+            sorted(results))
+
+    def test_errors_returned(self):
+        def func(x):
+            if x == 3:
+                raise ValueError('bad item')
+            return x
+
+        results = dict((item, (result, exc_info)) for item, result, exc_info
+                       in concurrency.imap_unordered(func, range(5), 2))
+        self.assertEqual(5, len(results))
+        self.assertEqual((2, None), results[2])
+        result, exc_info = results[3]
+        self.assertIsNone(result)
+        self.assertIsInstance(exc_info[1], ValueError)
+
+    def test_pool_size(self):
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def func(x):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        list(concurrency.imap_unordered(func, range(30), 3))
+        self.assertEqual(3, max_running[0])
+
+    def test_returned_as_completed(self):
+        def func(x):
+            time.sleep(x)
+            return x
+
+        results = concurrency.imap_unordered(func, [0.2, 0], 2)
+        self.assertEqual(0, next(results)[0])
+
+    def test_rest_not_called_once_stopped(self):
+        calls = []
+
+        def func(x):
+            calls.append(x)
+            time.sleep(0.01)
+
+        results = concurrency.imap_unordered(func, range(100), 1)
+        next(results)
+        results.close()
+        time.sleep(0.05)
+        self.assertLess(len(calls), 5)
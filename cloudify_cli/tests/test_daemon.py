@@ -0,0 +1,250 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+import os
+import sys
+import json
+import shutil
+import socket
+import signal
+import tempfile
+import threading
+from StringIO import StringIO
+
+from mock import patch
+
+from .. import env
+from .. import daemon
+from .. import logger
+from .commands.test_base import CliCommandTest
+
+
+class DaemonTest(CliCommandTest):
+
+    def setUp(self):
+        super(DaemonTest, self).setUp()
+        # Commands are run in the launcher's working directory, which is the
+        # test's working directory. That's removed after the test, so we have
+        # to go back to where we were (os.getcwd is patched by the tests)
+        cwd = os.open(os.curdir, os.O_RDONLY)
+        self.addCleanup(os.close, cwd)
+        self.addCleanup(os.fchdir, cwd)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.socket_path = os.path.join(tmpdir, daemon.SOCKET_FILE_NAME)
+        self.server = daemon.Server(
+            socket_path=self.socket_path,
+            pid_file_path=os.path.join(tmpdir, daemon.PID_FILE_NAME))
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def _forward(self, command, stdin=''):
+        thread = threading.Thread(target=self._serve_once)
+        thread.start()
+        stdout, stderr = StringIO(), StringIO()
+        try:
+            exit_code = daemon.forward(command.split(),
+                                       socket_path=self.socket_path,
+                                       stdin=StringIO(stdin),
+                                       stdout=stdout,
+                                       stderr=stderr)
+        finally:
+            thread.join()
+        return exit_code, stdout.getvalue(), stderr.getvalue()
+
+    def _serve_once(self):
+        connection, _ = self.server._socket.accept()
+        try:
+            self.server.handle(connection)
+        finally:
+            connection.close()
+
+    def test_forward_command(self):
+        exit_code, stdout, _ = self._forward('profiles list')
+        self.assertEqual(0, exit_code)
+        self.assertIn('No profiles found', stdout)
+
+    def test_forward_failed_command(self):
+        exit_code, stdout, _ = self._forward('status')
+        self.assertEqual(1, exit_code)
+        self.assertIn('only available when using a manager', stdout)
+
+    def test_forward_usage_error(self):
+        exit_code, _, stderr = self._forward('no-such-command')
+        self.assertEqual(2, exit_code)
+        self.assertIn('No such command', stderr)
+
+    def test_globals_restored(self):
+        profile = env.profile
+        excepthook = sys.excepthook
+        stdout = sys.stdout
+        cwd = os.getcwd()
+
+        self.assertEqual(0, self._forward('profiles list -vvv')[0])
+        self.assertIs(profile, env.profile)
+        self.assertIs(excepthook, sys.excepthook)
+        self.assertIs(stdout, sys.stdout)
+        self.assertEqual(cwd, os.getcwd())
+        self.assertEqual(logger.NO_VERBOSE, logger.get_global_verbosity())
+
+    def test_environment_is_forwarded(self):
+        os.environ['CFY_DAEMON_TEST'] = 'forwarded'
+        self.addCleanup(os.environ.pop, 'CFY_DAEMON_TEST', None)
+        environ = {}
+
+        def run_command(args, prog_name):
+            environ.update(os.environ)
+
+        with patch('cloudify_cli.main._cfy.main', side_effect=run_command):
+            self._forward('profiles list')
+        self.assertEqual('forwarded', environ.get('CFY_DAEMON_TEST'))
+        # The daemon's own environment is restored after the command (the
+        # test shares it with the launcher, which is why it's gone)
+        self.assertNotIn('CFY_DAEMON_TEST', os.environ)
+
+    def test_stdin_is_forwarded(self):
+        def run_command(args, prog_name):
+            sys.stdout.write(sys.stdin.readline().upper())
+            sys.stdout.write(sys.stdin.read())
+
+        with patch('cloudify_cli.main._cfy.main', side_effect=run_command):
+            exit_code, stdout, _ = self._forward(
+                'profiles list', stdin='first\nsecond\n')
+        self.assertEqual(0, exit_code)
+        self.assertEqual('FIRST\nsecond\n', stdout)
+
+    def test_fallback_on_import_time_env(self):
+        os.environ['CFY_MULTIPLE_BLUEPRINTS'] = 'true'
+        self.addCleanup(os.environ.pop, 'CFY_MULTIPLE_BLUEPRINTS')
+        self.assertEqual((None, '', ''), self._forward('profiles list'))
+
+    def test_forward_without_daemon(self):
+        self.server.stop()
+        self.assertIsNone(daemon.forward(['profiles', 'list'],
+                                         socket_path=self.socket_path))
+
+    def test_commands_run_concurrently(self):
+        def run_command(args, prog_name):
+            if args[-1] == 'wait':
+                sys.stdout.write(sys.stdin.readline())
+            else:
+                sys.stdout.write('done\n')
+
+        # the server is run by a process of its own, as it forks (and sets
+        # signal handlers, which only the main thread may)
+        with patch('cloudify_cli.main._cfy.main', side_effect=run_command):
+            pid = os.fork()
+            if not pid:
+                try:
+                    self.server.serve_forever()
+                finally:
+                    os._exit(0)
+        self.addCleanup(os.waitpid, pid, 0)
+        self.addCleanup(os.kill, pid, signal.SIGTERM)
+
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, write_fd)
+        results = {}
+
+        def forward(name, stdin):
+            stdout = StringIO()
+            exit_code = daemon.forward(['profiles', name],
+                                       socket_path=self.socket_path,
+                                       stdin=stdin,
+                                       stdout=stdout,
+                                       stderr=StringIO())
+            results[name] = exit_code, stdout.getvalue()
+
+        with os.fdopen(read_fd) as stdin:
+            waiting = threading.Thread(target=forward, args=('wait', stdin))
+            waiting.daemon = True
+            waiting.start()
+            # the second command doesn't wait for the first one to end
+            other = threading.Thread(target=forward,
+                                     args=('other', StringIO()))
+            other.daemon = True
+            other.start()
+            other.join(10)
+            self.assertEqual((0, 'done\n'), results.get('other'))
+            self.assertNotIn('wait', results)
+
+            os.write(write_fd, 'line\n')
+            waiting.join(10)
+        self.assertEqual((0, 'line\n'), results.get('wait'))
+
+    def test_socket_only_accessible_by_user(self):
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+    def test_is_running(self):
+        self.assertTrue(daemon.is_running(self.socket_path))
+        self.server.stop()
+        self.assertFalse(daemon.is_running(self.socket_path))
+
+
+class FramesTest(CliCommandTest):
+
+    def test_frames(self):
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+        self.addCleanup(right.close)
+
+        daemon._send_frame(left, daemon.REQUEST, json.dumps({'a': 1}))
+        daemon._send_frame(left, daemon.STDIN)
+        self.assertEqual((daemon.REQUEST, '{"a": 1}'),
+                         daemon._receive_frame(right))
+        self.assertEqual((daemon.STDIN, ''), daemon._receive_frame(right))
+        left.close()
+        self.assertEqual((None, None), daemon._receive_frame(right))
+
+    def test_frames_sent_by_threads_not_interleaved(self):
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+        self.addCleanup(right.close)
+        stdout = daemon._OutputProxy(daemon._Connection(left), daemon.STDOUT,
+                                     {'isatty': False, 'encoding': None})
+        payloads = [str(i) * 100000 for i in range(8)]
+        threads = [threading.Thread(target=stdout.write, args=(payload,))
+                   for payload in payloads]
+        for thread in threads:
+            thread.start()
+        received = [daemon._receive_frame(right) for _ in payloads]
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted((daemon.STDOUT, payload)
+                                for payload in payloads),
+                         sorted(received))
+
+
+class ShouldForwardTest(CliCommandTest):
+
+    def setUp(self):
+        super(ShouldForwardTest, self).setUp()
+        stdin_patcher = patch('sys.stdin', StringIO())
+        stdin_patcher.start()
+        self.addCleanup(stdin_patcher.stop)
+
+    def test_disabled_by_default(self):
+        with patch.dict(os.environ, clear=True):
+            self.assertFalse(daemon._should_forward(['profiles', 'list']))
+
+    def test_enabled(self):
+        with patch.dict(os.environ, {daemon.DAEMON_ENV: 'true'}):
+            self.assertTrue(daemon._should_forward(['profiles', 'list']))
+
+    def test_daemon_commands_not_forwarded(self):
+        with patch.dict(os.environ, {daemon.DAEMON_ENV: 'true'}):
+            self.assertFalse(daemon._should_forward(['daemon', 'stop']))
+            self.assertFalse(daemon._should_forward(['-v', 'daem', 'stop']))
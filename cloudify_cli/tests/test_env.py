@@ -18,6 +18,7 @@ import os
 import sys
 import mock
 import json
+import time
 import yaml
 import shutil
 import logging
@@ -25,10 +26,13 @@ import tarfile
 import zipfile
 import requests
 import tempfile
+import threading
+from datetime import datetime
 from contextlib import closing
 from cStringIO import StringIO
 from mock import MagicMock, patch
 from itertools import chain, repeat, count
+from urlparse import urlparse
 
 import cloudify
 from cloudify import logs
@@ -60,12 +64,14 @@ from ..colorful_event import ColorfulEvent
 from ..exceptions import ExecutionTimeoutError
 from ..exceptions import EventProcessingTimeoutError
 from ..execution_events_fetcher import wait_for_execution
+from ..execution_events_fetcher import WAIT_FOR_EXECUTION_MIN_SLEEP_INTERVAL
 from ..execution_events_fetcher import ExecutionEventsFetcher
 
 from . import cfy
+from .fake_manager import FakeManager, make_dataset, make_event
 
 from .commands.test_base import CliCommandTest
-from .commands.mocks import mock_logger, mock_stdout, MockListResponse
+from .commands.mocks import mock_stdout, MockListResponse
 from .commands.constants import BLUEPRINTS_DIR, SAMPLE_BLUEPRINT_PATH
 
 
@@ -272,6 +278,44 @@ class CliEnvTests(CliCommandTest):
         context = env.get_profile_context(manager_ip)
         self.assertEqual(context.manager_ip, manager_ip)
 
+    def test_save_profile_context_writes_cache(self):
+        profile = self.use_manager()
+        cache_path = os.path.join(
+            env.get_profile_dir(profile.manager_ip),
+            constants.CLOUDIFY_PROFILE_CONTEXT_CACHE_FILE_NAME)
+        self.assertTrue(os.path.isfile(cache_path))
+
+    def test_get_profile_context_from_cache(self):
+        self.use_manager(ssh_user='cached')
+        with patch('cloudify_cli.env.yaml.load') as mock_load:
+            context = env.get_profile_context()
+        self.assertFalse(mock_load.called)
+        self.assertEqual('cached', context.ssh_user)
+
+    def test_get_profile_context_cache_invalidated(self):
+        profile = self.use_manager()
+        context_path = env.get_context_path(profile.manager_ip)
+        with open(context_path) as f:
+            content = f.read()
+        with open(context_path, 'w') as f:
+            f.write(content.replace('ssh_user: test',
+                                    'ssh_user: changed_user'))
+        self.assertEqual('changed_user', env.get_profile_context().ssh_user)
+        # The cache was rebuilt from the new content
+        with patch('cloudify_cli.env.yaml.load') as mock_load:
+            self.assertEqual('changed_user',
+                             env.get_profile_context().ssh_user)
+        self.assertFalse(mock_load.called)
+
+    def test_get_profile_context_corrupt_cache(self):
+        profile = self.use_manager()
+        cache_path = os.path.join(
+            env.get_profile_dir(profile.manager_ip),
+            constants.CLOUDIFY_PROFILE_CONTEXT_CACHE_FILE_NAME)
+        with open(cache_path, 'w') as f:
+            f.write('not a pickle')
+        self.assertEqual('10.10.1.10', env.get_profile_context().manager_ip)
+
     def test_raise_uninitialized(self):
         ex = self.assertRaises(
             CloudifyCliError,
@@ -494,8 +538,37 @@ class TestProgressBar(CliCommandTest):
             sys.stdout = sys.__stdout__
 
 
+class _CountingStream(object):
+    """A StringIO which counts the writes to it"""
+
+    def __init__(self):
+        self.writes = 0
+        self._output = StringIO()
+
+    def write(self, data):
+        self._output.write(data)
+        self.writes += 1
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return self._output.getvalue()
+
+
 class TestLogger(CliCommandTest):
 
+    def _make_logger(self, log_format='%(message)s'):
+        """Return a logger for the events, and the stream it writes to"""
+        output = _CountingStream()
+        handler = logging.StreamHandler(output)
+        handler.setFormatter(logging.Formatter(log_format))
+        lgr = logging.getLogger('cloudify.cli.test_events')
+        lgr.handlers = [handler]
+        lgr.propagate = False
+        lgr.setLevel(logging.INFO)
+        return lgr, output
+
     def test_text_events_logger(self):
         events_logger = logger.get_events_logger(json_output=False)
         events = [{'key': 'output'}, {'key': 'hide'}]
@@ -503,11 +576,12 @@ class TestLogger(CliCommandTest):
         def mock_create_message(event):
             return None if event['key'] == 'hide' else event['key']
 
-        with mock_logger('cloudify_cli.logger._lgr') as output:
+        lgr, output = self._make_logger()
+        with patch('cloudify_cli.logger._lgr', lgr):
             with patch('cloudify.logs.create_event_message_prefix',
                        mock_create_message):
                 events_logger(events)
-        self.assertEqual(events[0]['key'], output.getvalue())
+        self.assertEqual(events[0]['key'] + '\n', output.getvalue())
 
     def test_json_events_logger(self):
         events_logger = logger.get_events_logger(json_output=True)
@@ -518,6 +592,130 @@ class TestLogger(CliCommandTest):
                                              json.dumps(events[1])),
                          output.getvalue())
 
+    def _make_events(self):
+        timestamp = datetime(2017, 1, 2, 3, 4, 5, 678000)
+        events = [
+            make_event(timestamp, 'exec1', 'dep1', 'Starting',
+                       event_type='workflow_started'),
+            make_event(timestamp, 'exec1', 'dep1', u'Unicode \u05d0 log',
+                       node_id='node1'),
+            make_event(timestamp, 'exec1', 'dep1', 'Creating',
+                       event_type='task_started', node_id='node1_abc',
+                       operation='cloudify.interfaces.lifecycle.create'),
+            make_event(timestamp, 'exec1', 'dep1', 'Establishing',
+                       event_type='sending_task', source_id='node1',
+                       target_id='node2',
+                       operation='cloudify.interfaces.relationship.establish'),
+            make_event(timestamp, 'exec1', 'dep1', 'Policy',
+                       event_type='unknown_type', group='group1',
+                       policy='policy1', trigger='trigger1'),
+            make_event(timestamp, 'exec1', 'dep1', 'Failed',
+                       event_type='task_failed', node_id='node1',
+                       task_error_causes=[{'traceback': 'Traceback...'}]),
+            make_event(timestamp, 'exec1', 'dep1', 'Empty node ID',
+                       event_type='task_succeeded', node_id=''),
+            make_event(timestamp, 'exec1', 'dep1', 'Finished',
+                       event_type='workflow_succeeded'),
+        ]
+        for level in ['debug', 'warning', 'error']:
+            log = make_event(timestamp, 'exec1', 'dep1', 'A log',
+                             node_id='node1', operation='op')
+            log['level'] = level
+            events.append(log)
+        return events
+
+    def test_events_rendered_as_event_class_renders(self):
+        events = self._make_events()
+        for event_class in [logs.EVENT_CLASS, ColorfulEvent]:
+            for verbosity in [logger.NO_VERBOSE, logger.HIGH_VERBOSE]:
+                with patch('cloudify.logs.EVENT_CLASS', event_class), \
+                        patch('cloudify.logs.EVENT_VERBOSITY_LEVEL',
+                              verbosity):
+                    expected = ''.join(
+                        output + '\n' for output in
+                        (logs.create_event_message_prefix(event)
+                         for event in events) if output)
+                    events_logger = logger.get_events_logger(
+                        json_output=False)
+                    lgr, output = self._make_logger()
+                    with patch('cloudify_cli.logger._lgr', lgr):
+                        # twice, as the second time templates are used
+                        events_logger(events)
+                        events_logger.flush()
+                        events_logger(events)
+                        events_logger.flush()
+                self.assertEqual(expected * 2, output.getvalue())
+
+    def test_events_written_once_per_batch(self):
+        events_logger = logger.get_events_logger(json_output=False)
+        lgr, output = self._make_logger()
+        with patch('cloudify_cli.logger._lgr', lgr):
+            events_logger(self._make_events())
+        self.assertEqual(1, output.writes)
+
+    def test_events_logged_a_record_per_line(self):
+        events_logger = logger.get_events_logger(json_output=False)
+        lgr, output = self._make_logger('[%(levelname)s] %(message)s')
+        with patch('cloudify_cli.logger._lgr', lgr):
+            events_logger(self._make_events())
+        lines = output.getvalue().splitlines()
+        self.assertGreater(len(lines), 1)
+        for line in lines:
+            self.assertTrue(line.startswith('[INFO] '), line)
+
+    def test_events_buffered_until_flushed(self):
+        events_logger = logger.EventsRenderer(json_output=True,
+                                              flush_interval=60,
+                                              flush_size=1024)
+        events = self._make_events()
+        with mock_stdout() as output:
+            events_logger(events[:1])
+            # written right away, as it's the first batch
+            first = output.getvalue()
+            self.assertEqual(json.dumps(events[0]) + '\n', first)
+            events_logger(events[1:2])
+            self.assertEqual(first, output.getvalue())
+            events_logger.flush()
+        self.assertEqual(
+            ''.join(json.dumps(event) + '\n' for event in events[:2]),
+            output.getvalue())
+
+    def test_events_flushed_by_size(self):
+        events_logger = logger.EventsRenderer(json_output=True,
+                                              flush_interval=60,
+                                              flush_size=1024)
+        with mock_stdout() as output:
+            events_logger([{'key': 'first'}])
+            events_logger([{'key': 'x' * 100}] * 5)
+            self.assertNotIn('x' * 100, output.getvalue())
+            events_logger([{'key': 'x' * 100}] * 5)
+            self.assertEqual(11, output.getvalue().count('\n'))
+
+    def test_events_flushed_by_time(self):
+        events_logger = logger.EventsRenderer(json_output=True,
+                                              flush_interval=0.05)
+        with mock_stdout() as output:
+            events_logger([{'key': 'first'}])
+            events_logger([{'key': 'second'}])
+            self.assertNotIn('second', output.getvalue())
+            time.sleep(0.05)
+            events_logger([{'key': 'third'}])
+        self.assertEqual(3, output.getvalue().count('\n'))
+
+    def test_fetcher_flushes_events(self):
+        client = CloudifyClient()
+        client.executions.get = MagicMock()
+        client.events.list = MagicMock(return_value=MockListResponse(
+            self._make_events(), None))
+        events_logger = logger.EventsRenderer(json_output=True,
+                                              flush_interval=60)
+        events_logger.flush()
+        fetcher = ExecutionEventsFetcher(client, 'exec1', batch_size=100)
+        with mock_stdout() as output:
+            fetcher.fetch_and_process_events(events_handler=events_logger)
+        self.assertEqual(len(self._make_events()),
+                         output.getvalue().count('\n'))
+
 
 class ExecutionEventsFetcherTest(CliCommandTest):
 
@@ -669,6 +867,83 @@ class ExecutionEventsFetcherTest(CliCommandTest):
                           timeout=2)
 
 
+class CursorEventsFetcherTest(CliCommandTest):
+
+    def setUp(self):
+        super(CursorEventsFetcherTest, self).setUp()
+        self.manager = FakeManager(make_dataset(size=1,
+                                                events_per_execution=1000))
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.client = CloudifyClient(host=self.manager.host,
+                                     port=self.manager.port)
+        self.events = self.manager.dataset['events']
+        self.list_events = self.client.events.list = \
+            MagicMock(wraps=self.client.events.list)
+
+    def _fetcher(self, **kwargs):
+        return ExecutionEventsFetcher(self.client, 'exec0',
+                                      include_logs=True,
+                                      fetch_mode='cursor',
+                                      **kwargs)
+
+    def _fetch(self, fetcher):
+        fetched = []
+        fetcher.fetch_and_process_events(events_handler=fetched.extend)
+        return fetched
+
+    def _add_event(self, timestamp, message):
+        self.events.append(make_event(timestamp, 'exec0', 'dep0', message))
+
+    def test_events_fetched_once(self):
+        fetcher = self._fetcher(dedup_window=0.01)
+        self.assertEqual(self.events, self._fetch(fetcher))
+        # the batches start at the last event fetched, rather than at an
+        # offset which grows with the number of events
+        self.assertTrue(all(call[1]['_offset'] == 0
+                            for call in self.list_events.call_args_list))
+        self.assertEqual([], self._fetch(fetcher))
+
+    def test_events_at_the_same_time(self):
+        for i in range(250):
+            self._add_event(datetime(2017, 1, 2), 'At once {0}'.format(i))
+        fetcher = self._fetcher()
+        self.assertEqual(self.events, self._fetch(fetcher))
+        self.assertEqual([], self._fetch(fetcher))
+
+    def test_events_stored_late(self):
+        fetcher = self._fetcher()
+        self._fetch(fetcher)
+        self.list_events.reset_mock()
+        late_event = make_event(datetime(2017, 1, 1, 0, 0, 0, 500000),
+                                'exec0', 'dep0', 'Stored late')
+        self.events.insert(500, late_event)
+        self._add_event(datetime(2017, 1, 1, 0, 0, 1), 'New')
+        fetched = self._fetch(fetcher)
+        self.assertEqual([late_event, self.events[-1]], fetched)
+
+    def test_repeats_window_bounded(self):
+        fetcher = self._fetcher(dedup_window=0.05)
+        self._fetch(fetcher)
+        self.list_events.reset_mock()
+        self._add_event(datetime(2017, 1, 1, 0, 0, 1), 'New')
+        self.assertEqual([self.events[-1]], self._fetch(fetcher))
+        # only the events of the last 0.05 seconds were fetched again
+        self.assertEqual(1, self.list_events.call_count)
+
+    def test_fetch_mode_from_config(self):
+        with patch('cloudify_cli.config.config.get_events_config',
+                   return_value={'fetch_mode': 'cursor'}):
+            fetcher = ExecutionEventsFetcher(self.client, 'exec0',
+                                             batch_size=100)
+        self._fetch(fetcher)
+        self.assertIn('from_datetime', self.list_events.call_args[1])
+
+    def test_unknown_fetch_mode(self):
+        self.assertRaises(CloudifyCliError, ExecutionEventsFetcher,
+                          self.client, 'exec0', fetch_mode='random')
+
+
 class WaitForExecutionTests(CliCommandTest):
 
     def setUp(self):
@@ -742,6 +1017,45 @@ class WaitForExecutionTests(CliCommandTest):
             polling the execution status after it received a workflow_succeeded
             event (expected 101 calls, got %d)""" % calls_count)
 
+    def _sleeps(self):
+        return [call[0][0] for call in self.time.sleep.call_args_list]
+
+    def test_polling_backs_off_while_idle(self):
+        events = chain(
+            repeat(MockListResponse([], 0), 9),
+            [MockListResponse([{'event_type': 'task_succeeded'}], 1)],
+            repeat(MockListResponse([], 0), 2),
+            [MockListResponse([{'event_type': 'workflow_succeeded'}], 1)])
+        self.client.events.list = MagicMock(side_effect=events)
+        self.client.executions.get = MagicMock(side_effect=chain(
+            repeat(MagicMock(status=Execution.STARTED), 13),
+            repeat(MagicMock(status=Execution.TERMINATED))))
+
+        wait_for_execution(self.client, MagicMock(status=Execution.STARTED),
+                           timeout=None)
+        self.assertEqual([0.1, 0.2, 0.4, 0.8, 1.6, 3.2, 6.4, 10, 10,
+                          0.1, 0.2, 0.4, 0.1], self._sleeps())
+
+    def test_status_not_polled_while_events_arrive(self):
+        events = chain(
+            repeat(MockListResponse([{'event_type': 'task_succeeded'}], 1),
+                   50),
+            [MockListResponse([{'event_type': 'workflow_succeeded'}], 1)])
+        self.client.events.list = MagicMock(side_effect=events)
+        self.client.executions.get = MagicMock(side_effect=[
+            MagicMock(status=Execution.STARTED),
+            MagicMock(status=Execution.STARTED),
+            MagicMock(status=Execution.TERMINATED)])
+
+        execution = wait_for_execution(
+            self.client, MagicMock(status=Execution.STARTED), timeout=None)
+        self.assertEqual(Execution.TERMINATED, execution.status)
+        # once when the fetcher was created, once before the events
+        # arrived, and once after the end event arrived
+        self.assertEqual(3, self.client.executions.get.call_count)
+        self.assertEqual(
+            [WAIT_FOR_EXECUTION_MIN_SLEEP_INTERVAL] * 51, self._sleeps())
+
 
 @mock.patch('cloudify_cli.env.is_initialized', lambda: True)
 class TestCLIConfig(CliCommandTest):
@@ -781,6 +1095,26 @@ class TestCLIConfig(CliCommandTest):
             yaml.dump({}, f)
         self.assertFalse(config.is_auto_generate_ids())
 
+    def test_config_parsed_once(self):
+        config.get_config()
+        with mock.patch('cloudify_cli.config.config.yaml.safe_load') as m:
+            self.assertTrue(config.is_use_colors())
+            self.assertTrue(config.is_auto_generate_ids())
+            self.assertTrue(config.is_validate_definitions_version())
+        self.assertFalse(m.called)
+
+    def test_config_reloaded_on_change(self):
+        self.assertTrue(config.is_use_colors())
+        with open(self.config_file_path, 'w') as f:
+            yaml.dump({'colors': False}, f)
+        self.assertFalse(config.is_use_colors())
+
+    def test_import_resolver_reused(self):
+        with mock.patch('dsl_parser.utils.create_import_resolver') as m:
+            resolver = config.get_import_resolver()
+            self.assertIs(resolver, config.get_import_resolver())
+        self.assertEqual(1, m.call_count)
+
 
 @mock.patch('cloudify_cli.env.is_initialized', lambda: True)
 class TestCLIColors(CliCommandTest):
@@ -937,10 +1271,9 @@ class ImportResolverLocalUseTests(CliCommandTest):
         cfy.purge_dot_cloudify()
 
     def test_validate_blueprint_uses_import_resolver(self):
-        from cloudify_cli.commands import blueprints
         blueprint_path = '{0}/local/blueprint.yaml'.format(BLUEPRINTS_DIR)
         self._test_using_import_resolver(
-            'blueprints validate', blueprint_path, blueprints)
+            'blueprints validate', blueprint_path, dsl_parser.parser)
 
     @mock.patch.object(local._Environment, 'execute')
     @mock.patch.object(dsl_parser.tasks, 'prepare_deployment_plan')
@@ -965,7 +1298,7 @@ class ImportResolverLocalUseTests(CliCommandTest):
         def mock_init(self, name, plan, nodes, node_instances, blueprint_path,
                       provider_context):
             return 'mock init'
-        bootstrap.local.FileStorage.init = mock_init
+        cloudify.workflows.local.FileStorage.init = mock_init
 
         def mock_get_nodes(self):
             return [
@@ -993,7 +1326,7 @@ class ImportResolverLocalUseTests(CliCommandTest):
         finally:
             bootstrap.validate_manager_deployment_size = old_validate_dep_size
             bootstrap.load_env = old_load_env
-            bootstrap.local.FileStorage.init = old_init
+            cloudify.workflows.local.FileStorage.init = old_init
             cloudify.workflows.local.FileStorage.get_nodes = old_get_nodes
             cloudify.workflows.local.FileStorage.get_node_instances = \
                 old_get_node_instances
@@ -1059,6 +1392,50 @@ class TestGetRestClient(CliCommandTest):
             rest_protocol, host, port, DEFAULT_API_VERSION),
             client._client.url)
 
+    def test_rest_clients_reused(self):
+        client = self.original_utils_get_rest_client(rest_host='localhost')
+        self.assertIs(
+            client,
+            self.original_utils_get_rest_client(rest_host='localhost'))
+        self.assertIsNot(
+            client,
+            self.original_utils_get_rest_client(rest_host='10.0.0.1'))
+        self.assertIsNot(
+            client,
+            self.original_utils_get_rest_client(rest_host='localhost',
+                                                tenant_name='other'))
+
+    def test_session_shared_by_clients(self):
+        clients = [
+            self.original_utils_get_rest_client(rest_host='localhost'),
+            self.original_utils_get_rest_client(rest_host='10.0.0.1',
+                                                tenant_name='other')
+        ]
+        self.assertIsInstance(env.get_session(), requests.Session)
+        for client in clients:
+            self.assertIs(env.get_session(), client._client.session)
+        adapter = env.get_session().get_adapter('https://10.0.0.1')
+        self.assertEqual(constants.REST_CONNECTION_POOL_SIZE,
+                         adapter._pool_maxsize)
+
+    def test_clear_rest_clients(self):
+        client = self.original_utils_get_rest_client(rest_host='localhost')
+        session = env.get_session()
+        env.clear_rest_clients()
+        self.assertIsNot(
+            client,
+            self.original_utils_get_rest_client(rest_host='localhost'))
+        self.assertIsNot(session, env.get_session())
+
+    def test_session_used_for_requests(self):
+        client = self.original_utils_get_rest_client(rest_host='localhost')
+        client._client.session = mock.Mock()
+        client._client.session.get.return_value.status_code = 200
+        client._client.session.get.return_value.json.return_value = {}
+
+        client.manager.get_status()
+        self.assertEqual(1, client._client.session.get.call_count)
+
 
 class TestUtils(CliCommandTest):
     _TAR_TYPES_TO_FLAGS = {'tar': 'w', 'tar.gz': 'w:gz', 'tar.bz2': 'w:bz2'}
@@ -1232,8 +1609,10 @@ class TestClusterRestClient(CliCommandTest):
             response = c.blueprints.list()
 
         self.assertEqual([], list(response))
-        self.assertEqual(2, len(mocked_get.mock_calls))
-        self.assertEqual('127.0.0.2', env.profile.cluster[0]['manager_ip'])
+        # the failed request to .1, the probe of .2, and the request to .2
+        self.assertEqual(3, len(mocked_get.mock_calls))
+        self.assertEqual('127.0.0.2',
+                         env.get_cluster_state()['master']['ip'])
 
     def test_master_changed(self):
         env.profile.manager_ip = '127.0.0.1'
@@ -1241,8 +1620,6 @@ class TestClusterRestClient(CliCommandTest):
             {'manager_ip': '127.0.0.1'},
             {'manager_ip': '127.0.0.2'},
             {'manager_ip': '127.0.0.3'},
-            # only those two will be called (because .4 will be the new master)
-            # for a total of 3 calls (original failed .1, then .5, then .4)
             {'manager_ip': '127.0.0.4'},
             {'manager_ip': '127.0.0.5'}
         ]
@@ -1255,5 +1632,238 @@ class TestClusterRestClient(CliCommandTest):
             response = c.blueprints.list()
 
         self.assertEqual([], list(response))
+        # the other nodes are probed concurrently, and the probes still
+        # running when .4 answers are left behind, so only the requests
+        # themselves are asserted
+        self.assertEqual(['127.0.0.1', '127.0.0.4'], [
+            urlparse(call[1][0]).hostname
+            for call in mocked_get.mock_calls if '/status' not in call[1][0]])
+        self.assertEqual('127.0.0.4',
+                         env.get_cluster_state()['master']['ip'])
+
+    def test_master_remembered(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [
+            {'manager_ip': '127.0.0.1'},
+            {'manager_ip': '127.0.0.2'}
+        ]
+        with self._mock_get('127.0.0.2', ['127.0.0.1'], []):
+            env.CloudifyClusterClient(host='127.0.0.1').blueprints.list()
+
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with self._mock_get('127.0.0.2', ['127.0.0.1'], []) as mocked_get:
+            c.blueprints.list()
+        self.assertEqual(1, len(mocked_get.mock_calls))
+
+    def test_nodes_probed_concurrently(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [{'manager_ip': '127.0.0.{0}'.format(i)}
+                               for i in range(1, 6)]
+        # the other offline nodes only time out once the master is found,
+        # which would never happen if they were probed one by one
+        master_found = threading.Event()
+        self.addCleanup(master_found.set)
+
+        def _mocked_get(request_url, *args, **kwargs):
+            if '127.0.0.5' in request_url:
+                master_found.set()
+                response = mock.Mock(status_code=200)
+                response.json.return_value = {'items': [], 'metadata': {}}
+                return response
+            if '127.0.0.1' not in request_url:
+                master_found.wait(10)
+            raise requests.exceptions.ConnectTimeout()
+
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with mock.patch('cloudify_rest_client.client.requests.get',
+                        side_effect=_mocked_get):
+            self.assertEqual([], list(c.blueprints.list()))
+        self.assertEqual('127.0.0.5', c._client.host)
+
+    def test_server_error_not_taken_for_master(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [{'manager_ip': '127.0.0.{0}'.format(i)}
+                               for i in range(1, 4)]
+        # .2 is restarting, and answers before the master does
+        restarting_probed = threading.Event()
+        self.addCleanup(restarting_probed.set)
+
+        def _mocked_get(request_url, *args, **kwargs):
+            if '127.0.0.2' in request_url:
+                restarting_probed.set()
+                response = mock.Mock(status_code=503)
+                response.json.return_value = {
+                    'message': 'restarting',
+                    'error_code': 'internal_server_error',
+                    'server_traceback': None}
+                return response
+            if '127.0.0.3' in request_url:
+                restarting_probed.wait(10)
+                response = mock.Mock(status_code=200)
+                response.json.return_value = {'items': [], 'metadata': {}}
+                return response
+            raise requests.exceptions.ConnectionError()
+
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with mock.patch('cloudify_rest_client.client.requests.get',
+                        side_effect=_mocked_get):
+            self.assertEqual([], list(c.blueprints.list()))
+        self.assertEqual('127.0.0.3', c._client.host)
+        self.assertEqual('127.0.0.3',
+                         env.get_cluster_state()['master']['ip'])
+
+    def test_probe_error_not_waited_for(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [{'manager_ip': '127.0.0.{0}'.format(i)}
+                               for i in range(1, 4)]
+
+        def _mocked_get(request_url, *args, **kwargs):
+            if '127.0.0.2' in request_url:
+                if '/status' in request_url:
+                    # e.g. a proxy's page, which isn't JSON
+                    raise ValueError('No JSON object could be decoded')
+                response = mock.Mock(status_code=200)
+                response.json.return_value = {'items': [], 'metadata': {}}
+                return response
+            raise requests.exceptions.ConnectionError()
+
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        result = []
+        with mock.patch('cloudify_rest_client.client.requests.get',
+                        side_effect=_mocked_get):
+            thread = threading.Thread(
+                target=lambda: result.append(list(c.blueprints.list())))
+            thread.daemon = True
+            thread.start()
+            thread.join(10)
+        # no master was found, so each of the nodes was tried in turn
+        self.assertEqual([[]], result)
+        self.assertEqual('127.0.0.2', c._client.host)
+
+    def test_large_upload_retried(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [
+            {'manager_ip': '127.0.0.1'},
+            {'manager_ip': '127.0.0.2'}
+        ]
+        # 64MB, which .1 fails to receive halfway through
+        chunks = 1024
+        chunk = 'x' * 64 * 1024
+        received = {}
+
+        def _mocked_put(request_url, data, *args, **kwargs):
+            host = urlparse(request_url).hostname
+            received[host] = 0
+            for i, sent_chunk in enumerate(data):
+                if host == '127.0.0.1' and i == chunks // 2:
+                    raise requests.exceptions.ConnectionError()
+                self.assertEqual(chunk, sent_chunk)
+                received[host] += len(sent_chunk)
+            response = mock.Mock(status_code=201)
+            response.json.return_value = {}
+            return response
+
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with self._mock_get('127.0.0.2', [], ['127.0.0.1']):
+            with mock.patch('cloudify_rest_client.client.requests.put',
+                            side_effect=_mocked_put):
+                c._client.put('/blueprints/bp',
+                              data=(chunk for _ in range(chunks)),
+                              expected_status_code=201)
+        self.assertEqual({'127.0.0.1': len(chunk) * (chunks // 2),
+                          '127.0.0.2': len(chunk) * chunks}, received)
+
+    def test_sequential_fallback(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [
+            {'manager_ip': '127.0.0.1'},
+            {'manager_ip': '127.0.0.2'},
+            {'manager_ip': '127.0.0.3'}
+        ]
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with mock.patch.object(env.ClusterHTTPClient, '_discover_master',
+                               return_value=None):
+            with self._mock_get('127.0.0.3', ['127.0.0.1'], ['127.0.0.2']) \
+                    as mocked_get:
+                self.assertEqual([], list(c.blueprints.list()))
         self.assertEqual(3, len(mocked_get.mock_calls))
-        self.assertEqual('127.0.0.4', env.profile.cluster[0]['manager_ip'])
+
+    def test_offline_nodes_tried_last(self):
+        env.profile.manager_ip = '127.0.0.1'
+        env.profile.cluster = [
+            {'manager_ip': '127.0.0.1'},
+            {'manager_ip': '127.0.0.2'},
+            {'manager_ip': '127.0.0.3'}
+        ]
+        env.update_cluster_state(nodes={'127.0.0.2': False})
+        c = env.CloudifyClusterClient(host='127.0.0.1')
+        with mock.patch.object(env.ClusterHTTPClient, '_discover_master',
+                               return_value=None):
+            with self._mock_get('127.0.0.3', ['127.0.0.1'], ['127.0.0.2']) \
+                    as mocked_get:
+                self.assertEqual([], list(c.blueprints.list()))
+        self.assertEqual(2, len(mocked_get.mock_calls))
+
+
+class TestClusterState(CliCommandTest):
+    def setUp(self):
+        super(TestClusterState, self).setUp()
+        self.use_manager()
+        env.profile.cluster = [
+            {'manager_ip': env.profile.manager_ip},
+            {'manager_ip': '127.0.0.2'}
+        ]
+        self.state_path = os.path.join(env.get_profile_dir(),
+                                       constants.CLUSTER_STATE_FILE_NAME)
+
+    def _read_state_file(self):
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def test_master_switch_does_not_save_profile(self):
+        with patch.object(env.ProfileContext, 'save') as save:
+            env.update_cluster_state(master='127.0.0.2')
+        self.assertFalse(save.called)
+        self.assertEqual('127.0.0.2',
+                         self._read_state_file()['master']['ip'])
+
+    def test_state_loaded_by_other_processes(self):
+        env.update_cluster_state(master='127.0.0.2',
+                                 nodes={env.profile.manager_ip: False})
+        # a new process only has the state file
+        env.clear_rest_clients()
+        state = env.get_cluster_state()
+        self.assertEqual('127.0.0.2', state['master']['ip'])
+        self.assertFalse(state['nodes'][env.profile.manager_ip]['online'])
+
+    def test_unchanged_state_not_written(self):
+        env.update_cluster_state(master='127.0.0.2')
+        os.remove(self.state_path)
+        env.update_cluster_state(master='127.0.0.2')
+        self.assertFalse(os.path.exists(self.state_path))
+
+    def test_writes_debounced(self):
+        env.update_cluster_state(master='127.0.0.2')
+        env.update_cluster_state(master=env.profile.manager_ip)
+        self.assertEqual('127.0.0.2',
+                         self._read_state_file()['master']['ip'])
+
+        # the last change is written on exit
+        env._save_unsaved_cluster_states()
+        self.assertEqual(env.profile.manager_ip,
+                         self._read_state_file()['master']['ip'])
+
+    def test_newer_changes_by_others_kept(self):
+        env.update_cluster_state(master='127.0.0.2')
+        # another process found .2 offline since
+        with open(self.state_path, 'w') as f:
+            json.dump({'master': {'ip': '127.0.0.2', 'timestamp': 0},
+                       'nodes': {'127.0.0.2': {'online': False,
+                                               'timestamp': time.time() + 1}}
+                       }, f)
+        env._cluster_state_writes.clear()
+        env.update_cluster_state(master=env.profile.manager_ip)
+
+        state = self._read_state_file()
+        self.assertEqual(env.profile.manager_ip, state['master']['ip'])
+        self.assertFalse(state['nodes']['127.0.0.2']['online'])
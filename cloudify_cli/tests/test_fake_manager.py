@@ -0,0 +1,190 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+
+import requests
+import testtools
+
+from cloudify_rest_client import CloudifyClient
+from cloudify_rest_client.exceptions import (CloudifyClientError,
+                                             NotClusterMaster,
+                                             NotModifiedError,
+                                             MaintenanceModeActiveError)
+
+from .. import env
+from .commands.test_base import CliCommandTest
+from .fake_manager import FakeManager, make_dataset, make_cluster_nodes
+
+
+class FakeManagerTest(testtools.TestCase):
+
+    def setUp(self):
+        super(FakeManagerTest, self).setUp()
+        self.manager = FakeManager(make_dataset(size=10))
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.client = CloudifyClient(host=self.manager.host,
+                                     port=self.manager.port)
+
+    def test_list(self):
+        deployments = self.client.deployments.list(
+            _include=['id', 'blueprint_id'], blueprint_id='bp3')
+        self.assertEqual([{'id': 'dep3', 'blueprint_id': 'bp3'}],
+                         list(deployments))
+        self.assertEqual(1, deployments.metadata.pagination.total)
+
+    def test_pagination(self):
+        executions = self.client.executions.list(
+            _offset=4, _size=3, sort='id', is_descending=True)
+        self.assertEqual(['exec5', 'exec4', 'exec3'],
+                         [execution.id for execution in executions])
+        self.assertEqual(10, executions.metadata.pagination.total)
+
+    def test_get(self):
+        self.assertEqual('bp1', self.client.blueprints.get('bp1').id)
+        self.assertEqual('4.0.0', self.client.manager.get_version()['version'])
+        self.assertEqual(('GET', '/api/v3/blueprints/bp1'),
+                         self.manager.requests[0])
+
+    def test_not_found(self):
+        error = self.assertRaises(CloudifyClientError,
+                                  self.client.blueprints.get, 'no-such-bp')
+        self.assertEqual(404, error.status_code)
+
+    def test_compressed(self):
+        self.manager.compress = True
+        response = requests.get('http://{0}:{1}/api/v3/blueprints'.format(
+            self.manager.host, self.manager.port))
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertEqual(10, len(response.json()['items']))
+
+    def test_events(self):
+        events = self.client.events.list(execution_id='exec3',
+                                         sort='@timestamp')
+        self.assertEqual(
+            ['workflow_started'] + ['task_succeeded'] * 4 +
+            ['workflow_succeeded'],
+            [event['event_type'] for event in events])
+        self.assertEqual(10, len(self.client.events.list(
+            execution_id='exec3', include_logs=True)))
+        later_events = self.client.events.list(
+            execution_id='exec3', include_logs=True,
+            from_datetime=events[2]['@timestamp'])
+        self.assertEqual(events[2]['@timestamp'],
+                         later_events[0]['@timestamp'])
+        self.assertEqual(6, len(later_events))
+
+    def test_node_instances(self):
+        instances = self.client.node_instances.list(deployment_id='dep2')
+        self.assertEqual(['node2'], [i.node_id for i in instances])
+        self.assertEqual('started', self.client.node_instances.get(
+            instances[0].id).state)
+
+    def test_latency(self):
+        self.manager.latency = 0.2
+        start = time.time()
+        self.client.blueprints.list()
+        self.assertGreaterEqual(time.time() - start, 0.2)
+
+    def test_fail_next(self):
+        self.manager.fail_next(2)
+        for _ in range(2):
+            error = self.assertRaises(CloudifyClientError,
+                                      self.client.blueprints.list)
+            self.assertEqual(503, error.status_code)
+            self.assertIsNone(error.error_code)
+        self.assertEqual(10, len(self.client.blueprints.list()))
+
+    def test_failure_rate(self):
+        self.manager.failure_rate = 0.5
+        self.manager.failure_status = '502 Bad Gateway'
+        failures = 0
+        for _ in range(50):
+            try:
+                self.client.manager.get_status()
+            except CloudifyClientError as e:
+                self.assertEqual(502, e.status_code)
+                failures += 1
+        self.assertTrue(10 < failures < 40)
+
+    def test_executions(self):
+        self.manager.execution_duration = 60
+        execution = self.client.executions.start('dep1', 'install')
+        self.assertEqual('started', execution.status)
+        self.assertEqual('bp1', execution['blueprint_id'])
+        self.client.executions.cancel(execution.id)
+        self.assertEqual('cancelled',
+                         self.client.executions.get(execution.id).status)
+
+        self.manager.execution_duration = 0
+        execution = self.client.executions.start('dep1', 'uninstall')
+        self.assertEqual('terminated',
+                         self.client.executions.get(execution.id).status)
+        events = self.client.events.list(execution_id=execution.id)
+        self.assertEqual(['workflow_started', 'workflow_succeeded'],
+                         [event['event_type'] for event in events])
+
+    def test_maintenance_mode(self):
+        self.assertEqual('deactivated',
+                         self.client.maintenance_mode.status().status)
+        self.client.maintenance_mode.activate()
+        self.assertRaises(NotModifiedError,
+                          self.client.maintenance_mode.activate)
+        self.assertRaises(MaintenanceModeActiveError,
+                          self.client.blueprints.list)
+        self.assertEqual('activated',
+                         self.client.maintenance_mode.status().status)
+        self.client.maintenance_mode.deactivate()
+        self.assertEqual(10, len(self.client.blueprints.list()))
+
+    def test_cluster(self):
+        self.assertFalse(self.client.cluster.status().initialized)
+        self.manager.cluster_nodes = make_cluster_nodes(3)
+        self.assertTrue(self.client.cluster.status().initialized)
+        nodes = self.client.cluster.nodes.list()
+        self.assertEqual([True, False, False], [n.master for n in nodes])
+
+    def test_not_cluster_master(self):
+        self.manager.master = False
+        self.assertRaises(NotClusterMaster, self.client.blueprints.list)
+
+
+class FakeClusterTest(CliCommandTest):
+
+    def setUp(self):
+        super(FakeClusterTest, self).setUp()
+        dataset = make_dataset(size=10)
+        self.replica = FakeManager(dataset, master=False)
+        self.master = FakeManager(dataset, host='127.0.0.2')
+        for manager in [self.replica, self.master]:
+            manager.start()
+            self.addCleanup(manager.stop)
+        self.use_manager(manager_ip=self.replica.host,
+                         rest_port=self.replica.port)
+        env.profile.cluster = [
+            {'manager_ip': manager.host, 'rest_port': manager.port}
+            for manager in [self.replica, self.master]]
+        env.profile.save()
+
+    def test_requests_sent_to_master(self):
+        client = self.original_utils_get_rest_client()
+        self.assertEqual(10, len(client.blueprints.list()))
+        self.assertEqual(('GET', '/api/v3/blueprints'),
+                         self.replica.requests[0])
+        self.assertEqual(('GET', '/api/v3/blueprints'),
+                         self.master.requests[-1])
+        self.assertEqual(self.master.host,
+                         env.get_cluster_state()['master']['ip'])
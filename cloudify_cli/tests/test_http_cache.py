@@ -0,0 +1,193 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import time
+
+from mock import patch
+
+from .. import env
+from .. import constants
+from .. import http_cache
+from .fake_manager import FakeManager, make_dataset
+from .commands.test_base import CliCommandTest
+
+
+class HTTPCacheTest(CliCommandTest):
+
+    def setUp(self):
+        super(HTTPCacheTest, self).setUp()
+        self.manager = FakeManager(make_dataset(size=3))
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.use_manager(manager_ip=self.manager.host,
+                         rest_port=self.manager.port)
+        os.environ[constants.CLOUDIFY_HTTP_CACHE_ENV] = 'true'
+        self.addCleanup(os.environ.pop,
+                        constants.CLOUDIFY_HTTP_CACHE_ENV, None)
+        self.client = self.original_utils_get_rest_client()
+
+    def _requests_to(self, path):
+        return len([request for request in self.manager.requests
+                    if request[1] == '/api/v3' + path])
+
+    def _age_cache(self, seconds):
+        cache_dir = self.client._client.http_cache.cache_dir
+        for directory, _, file_names in os.walk(cache_dir):
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                with open(path) as f:
+                    cached = json.load(f)
+                cached['timestamp'] -= seconds
+                with open(path, 'w') as f:
+                    json.dump(cached, f)
+
+    def test_disabled_by_default(self):
+        os.environ.pop(constants.CLOUDIFY_HTTP_CACHE_ENV)
+        env.clear_rest_clients()
+        client = self.original_utils_get_rest_client()
+        self.assertIsNone(client._client.http_cache)
+
+    def test_fresh_response_used(self):
+        self.client.deployments.list()
+        deployments = self.client.deployments.list()
+        self.assertEqual(['dep0', 'dep1', 'dep2'],
+                         [deployment.id for deployment in deployments])
+        self.assertEqual(1, self._requests_to('/deployments'))
+
+    def test_stale_response_fetched(self):
+        self.client.deployments.list()
+        self._age_cache(http_cache.DEFAULT_TTLS['deployments'] + 1)
+        self.client.deployments.list()
+        self.assertEqual(2, self._requests_to('/deployments'))
+
+    def test_requests_cached_separately(self):
+        self.client.deployments.list()
+        self.client.deployments.list(blueprint_id='bp1')
+        self.client.deployments.get('dep1')
+        self.assertEqual(2, self._requests_to('/deployments'))
+        self.assertEqual(1, self._requests_to('/deployments/dep1'))
+
+    def test_tenants_cached_separately(self):
+        self.client.deployments.list()
+        other_client = self.original_utils_get_rest_client(
+            tenant_name='other_tenant')
+        other_client.deployments.list()
+        self.assertEqual(2, self._requests_to('/deployments'))
+
+    def test_immutable_resources_cached_indefinitely(self):
+        self.client.blueprints.get('bp1')
+        self.client.executions.get('exec1')
+        self._age_cache(10 ** 6)
+        self.client.blueprints.get('bp1')
+        self.client.executions.get('exec1')
+        self.assertEqual(1, self._requests_to('/blueprints/bp1'))
+        self.assertEqual(1, self._requests_to('/executions/exec1'))
+
+    def test_running_execution_not_immutable(self):
+        self.manager.dataset['executions'][1]['status'] = 'started'
+        self.client.executions.get('exec1')
+        self._age_cache(http_cache.DEFAULT_TTLS['executions'] + 1)
+        self.client.executions.get('exec1')
+        self.assertEqual(2, self._requests_to('/executions/exec1'))
+
+    def test_streamed_response_cached(self):
+        # compressed responses are decoded as they're read
+        self.manager.compress = True
+        execution = self.client.executions.get('exec1')
+        self.assertEqual('exec1', execution.id)
+        self._age_cache(10 ** 6)
+        self.assertEqual('exec1', self.client.executions.get('exec1').id)
+        self.assertEqual(1, self._requests_to('/executions/exec1'))
+
+    def test_modifying_request_invalidates(self):
+        self.client.blueprints.get('bp1')
+        self.client.deployments.list()
+        # the fake manager doesn't support deleting, but any successful
+        # request other than GET invalidates the resource type
+        with patch.object(self.client._client, 'session') as session:
+            session.delete.__name__ = 'delete'
+            session.delete.return_value.status_code = 200
+            session.delete.return_value.headers = {}
+            session.delete.return_value.json.return_value = {}
+            self.client.blueprints.delete('bp1')
+        self.client.blueprints.get('bp1')
+        self.client.deployments.list()
+        self.assertEqual(2, self._requests_to('/blueprints/bp1'))
+        self.assertEqual(1, self._requests_to('/deployments'))
+
+    def test_custom_ttl(self):
+        cache = http_cache.HTTPCache(
+            self.client._client.http_cache.cache_dir,
+            ttls={'events': 10, 'deployments': 0})
+        self.assertEqual(10, cache.ttls['events'])
+        self.assertEqual(0, cache.ttls['deployments'])
+        self.assertEqual(http_cache.DEFAULT_TTLS['blueprints'],
+                         cache.ttls['blueprints'])
+
+
+class RevalidationTest(CliCommandTest):
+
+    def setUp(self):
+        super(RevalidationTest, self).setUp()
+        self.use_manager()
+        self.cache = http_cache.HTTPCache(
+            http_cache.get_cache_dir(env.profile.manager_ip, None))
+        self.sent = []
+
+    def _send(self, status_code, headers=None, content='{"items": []}'):
+        def send(request_url, **kwargs):
+            self.sent.append(kwargs.get('headers') or {})
+            response = http_cache.Response()
+            response.status_code = status_code
+            response.reason = 'OK'
+            response.headers = http_cache.CaseInsensitiveDict(headers or {})
+            response._content = content
+            return response
+        return send
+
+    def _get(self, send, path='/deployments'):
+        return self.cache.send('GET', send,
+                               'http://10.10.1.10/api/v3' + path,
+                               params={}, headers={})
+
+    def test_uncached_resources(self):
+        self._get(self._send(200), '/events')
+        self._get(self._send(200), '/events')
+        self.assertEqual(2, len(self.sent))
+
+    def test_revalidated_with_etag(self):
+        self._get(self._send(200, {'ETag': '"v1"'}))
+        with patch('time.time', return_value=time.time() + 3600):
+            response = self._get(self._send(304))
+        self.assertEqual({'items': []}, response.json())
+        self.assertEqual('"v1"', self.sent[1]['If-None-Match'])
+
+    def test_revalidated_with_last_modified(self):
+        last_modified = 'Sun, 01 Jan 2017 00:00:00 GMT'
+        self._get(self._send(200, {'Last-Modified': last_modified}))
+        with patch('time.time', return_value=time.time() + 3600):
+            self._get(self._send(304))
+        self.assertEqual(last_modified, self.sent[1]['If-Modified-Since'])
+
+    def test_changed_response_replaces_cached(self):
+        self._get(self._send(200, {'ETag': '"v1"'}))
+        with patch('time.time', return_value=time.time() + 3600):
+            response = self._get(self._send(
+                200, {'ETag': '"v2"'}, '{"items": [1]}'))
+            self.assertEqual({'items': [1]}, response.json())
+            self.assertEqual({'items': [1]},
+                             self._get(self._send(500)).json())
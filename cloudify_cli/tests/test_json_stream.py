@@ -0,0 +1,125 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+import unittest
+
+from mock import patch
+
+from .. import env
+from .. import json_stream
+from .fake_manager import FakeManager, make_dataset
+from .commands.test_base import CliCommandTest
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+DOCUMENT = {
+    'metadata': {'pagination': {'total': 100, 'offset': 0, 'size': 1000}},
+    'items': [{'id': u'n\u05d0de{0}'.format(i),
+               'version': i,
+               'ratio': i / 3.0,
+               'runtime_properties': {'ip': None, 'ready': i % 2 == 0},
+               'relationships': [[], {}]} for i in range(100)],
+}
+
+
+class JSONStreamTest(unittest.TestCase):
+
+    def test_load(self):
+        data = json.dumps(DOCUMENT, ensure_ascii=False).encode('utf-8')
+        # the chunks split multi-byte characters, numbers, and keywords
+        for size in [1, 2, 3, 7, 64, len(data)]:
+            self.assertEqual(DOCUMENT, json_stream.load(_chunks(data, size)))
+
+    def test_load_other_documents(self):
+        for document in [{}, {'items': []}, {'items': {'a': 1}},
+                         {'id': 'bp1', 'plan': {'nodes': [1, 2]}},
+                         [1, 2, 3], 12345, u'text', None]:
+            self.assertEqual(document, json_stream.load(
+                _chunks(json.dumps(document), 2)))
+
+    def test_invalid_documents(self):
+        for data in ['', '{', '{"items": [1, }', '{"items": [1]',
+                     '{"a": 1} {', '{"a" 1}', '[1, 2']:
+            self.assertRaises(ValueError, json_stream.load,
+                              _chunks(data, 3))
+
+    def test_iter_items(self):
+        read = []
+
+        def chunks():
+            for chunk in _chunks(json.dumps(DOCUMENT), 100):
+                read.append(chunk)
+                yield chunk
+
+        document = {}
+        items = json_stream.iter_items(chunks(), document)
+        with patch.object(json_stream, 'MIN_READ_SIZE', 100):
+            self.assertEqual(DOCUMENT['items'][0], next(items))
+        # the first item was decoded before the rest of the body was read
+        self.assertLess(len(read), 10)
+        self.assertEqual(DOCUMENT['items'][1:], list(items))
+        self.assertEqual(DOCUMENT['metadata'], document['metadata'])
+
+    def test_large_values_decoded_once_read(self):
+        document = {'id': 'bp1', 'plan': {'node{0}'.format(i): 'x' * 100
+                                          for i in range(10000)}}
+        with patch.object(json_stream, '_decoder',
+                          wraps=json_stream._decoder) as decoder:
+            self.assertEqual(document, json_stream.load(
+                _chunks(json.dumps(document), 1024)))
+        # the value is decoded again each time twice as much was read,
+        # rather than once per chunk
+        self.assertLess(decoder.raw_decode.call_count, 10)
+
+
+class StreamedResponsesTest(CliCommandTest):
+
+    def setUp(self):
+        super(StreamedResponsesTest, self).setUp()
+        self.manager = FakeManager(make_dataset(size=50), compress=True)
+        self.manager.start()
+        self.addCleanup(self.manager.stop)
+        self.use_manager(manager_ip=self.manager.host,
+                         rest_port=self.manager.port)
+        self.client = self.original_utils_get_rest_client()
+
+    def test_large_responses_decoded_as_read(self):
+        with patch('cloudify_cli.constants.JSON_STREAM_MIN_SIZE', 0):
+            with patch.object(json_stream, 'load',
+                              wraps=json_stream.load) as load:
+                blueprints = self.client.blueprints.list()
+        self.assertEqual(1, load.call_count)
+        self.assertEqual(50, len(blueprints))
+        self.assertEqual(50, blueprints.metadata.pagination.total)
+
+    def test_small_responses_decoded_as_usual(self):
+        self.manager.compress = False
+        with patch.object(json_stream, 'load') as load:
+            self.assertEqual(50, len(self.client.blueprints.list()))
+        self.assertFalse(load.called)
+
+    def test_compression_accepted(self):
+        self.assertIn('gzip', env.get_session().headers['Accept-Encoding'])
+
+    def test_errors_decoded_as_usual(self):
+        with patch('cloudify_cli.constants.JSON_STREAM_MIN_SIZE', 0):
+            with patch.object(json_stream, 'load') as load:
+                self.assertRaises(Exception, self.client.blueprints.get,
+                                  'no-such-blueprint')
+        self.assertFalse(load.called)
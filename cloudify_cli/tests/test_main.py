@@ -0,0 +1,126 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+############
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+import click.testing as clicktest
+
+from .. import main
+from ..commands import deployments
+
+from .commands.test_base import CliCommandTest
+
+
+class LazyCommandRegistrationTest(CliCommandTest):
+
+    def test_commands_are_not_loaded_on_registration(self):
+        main._register_commands()
+        self.assertNotIn('snapshots', main._cfy.commands)
+        self.assertIn('snapshots', main._cfy.list_commands(None))
+
+    def test_command_loaded_on_demand(self):
+        main._register_commands()
+        command = main._cfy.get_command(None, 'snapshots')
+        self.assertEqual('snapshots', command.name)
+        self.assertIn('snapshots', main._cfy.commands)
+
+    def test_aliased_command_loaded_on_demand(self):
+        main._register_commands()
+        command = main._cfy.get_command(None, 'snap')
+        self.assertEqual('snapshots', command.name)
+
+    def test_context_specific_subcommands(self):
+        main._register_commands()
+        group = main._cfy.get_command(None, 'deployments')
+        self.assertIs(deployments.local_inputs, group.commands['inputs'])
+
+        self.use_manager()
+        group = main._cfy.get_command(None, 'deployments')
+        self.assertIs(deployments.manager_inputs, group.commands['inputs'])
+
+    def test_help_lists_lazy_commands(self):
+        main._register_commands()
+        outcome = clicktest.CliRunner().invoke(main._cfy, ['--help'])
+        self.assertEqual(0, outcome.exit_code)
+        self.assertIn('maintenance-mode', outcome.output)
+        self.assertIn('node-instances', outcome.output)
+
+    def test_did_you_mean(self):
+        main._register_commands()
+        outcome = clicktest.CliRunner().invoke(main._cfy, ['deploymets'])
+        self.assertIn('Did you mean one of these?', outcome.output)
+        self.assertIn('deployments', outcome.output)
+
+    def test_importing_main_does_not_import_commands(self):
+        modules = _imported_modules('import cloudify_cli.main')
+        self.assertFalse(
+            [m for m in modules if m.startswith('cloudify_cli.commands.')])
+
+
+class ImportBudgetTest(CliCommandTest):
+
+    # Modules which are slow to import, and are only needed by the local
+    # and bootstrap related commands
+    HEAVY_MODULES = ('fabric', 'paramiko', 'dsl_parser', 'cloudify.workflows')
+
+    # Commands which are commonly used against a manager
+    MANAGER_COMMANDS = ('deployments', 'executions', 'blueprints', 'nodes',
+                        'node-instances', 'plugins', 'events', 'profiles')
+
+    def test_manager_commands_do_not_import_heavy_modules(self):
+        script = ('from cloudify_cli import main\n'
+                  'main._register_commands()\n'
+                  'for name in {0!r}:\n'
+                  '    command = main._cfy.get_command(None, name)\n'
+                  '    if hasattr(command, "get_command"):\n'
+                  '        command.get_command(None, "list")\n'
+                  .format(self.MANAGER_COMMANDS))
+        modules = _imported_modules(script)
+        self.assertEqual([], [m for m in modules if _is_heavy(m)])
+
+    def test_launcher_imports_nothing_but_the_daemon_client(self):
+        modules = _imported_modules('import cloudify_cli.daemon')
+        self.assertEqual(
+            ['cloudify_cli', 'cloudify_cli.constants', 'cloudify_cli.daemon',
+             'cloudify_cli.timings'],
+            [m for m in modules if m.startswith('cloudify_cli')])
+        self.assertNotIn('requests', modules)
+
+
+def _is_heavy(module):
+    return any(module == heavy or module.startswith(heavy + '.')
+               for heavy in ImportBudgetTest.HEAVY_MODULES)
+
+
+def _imported_modules(script):
+    """Run `script` in a fresh interpreter and return `sys.modules` after"""
+    workdir = tempfile.mkdtemp()
+    try:
+        environ = os.environ.copy()
+        environ['CFY_WORKDIR'] = workdir
+        script += ('\nimport sys, json\n'
+                   'print(json.dumps(sorted(m for m in sys.modules\n'
+                   '                        if sys.modules[m])))\n')
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=environ)
+    finally:
+        shutil.rmtree(workdir)
+    return json.loads(output.splitlines()[-1])
@@ -0,0 +1,198 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import threading
+
+from mock import MagicMock
+
+from cloudify_rest_client.deployments import Deployment
+from cloudify_rest_client.responses import ListResponse
+from cloudify_rest_client.exceptions import CloudifyClientError
+
+from .. import pagination
+from .commands.test_base import CliCommandTest
+
+
+def _make_list(total, id_prefix='dep'):
+    """Return a mock of a list call, listing `total` resources"""
+    def list_func(_offset=0, _size=1000, blueprint_id=None, **kwargs):
+        items = [Deployment({'id': '{0}{1}'.format(id_prefix, i),
+                             'blueprint_id': 'bp{0}'.format(i % 2),
+                             'created_by': 'user{0}'.format(i),
+                             'created_at': None,
+                             'updated_at': None,
+                             'permission': 'creator',
+                             'tenant_name': 'default_tenant'})
+                 for i in range(total)]
+        if blueprint_id:
+            items = [item for item in items
+                     if item.blueprint_id == blueprint_id]
+        return ListResponse(items[_offset:_offset + _size],
+                            {'pagination': {'total': len(items),
+                                            'offset': _offset,
+                                            'size': _size}})
+    return MagicMock(side_effect=list_func)
+
+
+class ListPagesTest(CliCommandTest):
+
+    def _list_ids(self, list_func, **kwargs):
+        return [[item.id for item in page]
+                for page in pagination.list_pages(list_func, **kwargs)]
+
+    def test_pages(self):
+        list_func = _make_list(5)
+        self.assertEqual([['dep0', 'dep1'], ['dep2', 'dep3'], ['dep4']],
+                         self._list_ids(list_func, page_size=2,
+                                        sort='id'))
+        self.assertEqual([((), {'_offset': 0, '_size': 2, 'sort': 'id'}),
+                          ((), {'_offset': 2, '_size': 2, 'sort': 'id'}),
+                          ((), {'_offset': 4, '_size': 2, 'sort': 'id'})],
+                         list_func.call_args_list)
+
+    def test_full_last_page(self):
+        list_func = _make_list(4)
+        self.assertEqual([['dep0', 'dep1'], ['dep2', 'dep3']],
+                         self._list_ids(list_func, page_size=2))
+        self.assertEqual(2, list_func.call_count)
+
+    def test_without_pagination_metadata(self):
+        list_func = MagicMock(return_value=[Deployment({'id': 'dep0'}),
+                                            Deployment({'id': 'dep1'})])
+        self.assertEqual([['dep0', 'dep1']],
+                         self._list_ids(list_func, page_size=2))
+
+    def test_without_prefetch(self):
+        list_func = _make_list(5)
+        pages = pagination.list_pages(list_func, page_size=2, prefetch=False)
+        self.assertEqual(1, list_func.call_count)
+        next(pages)
+        next(pages)
+        self.assertEqual(2, list_func.call_count)
+
+    def test_next_page_prefetched(self):
+        fetched = threading.Event()
+        list_func = _make_list(5)
+
+        def fetch(*args, **kwargs):
+            try:
+                return list_func(*args, **kwargs)
+            finally:
+                if list_func.call_count == 2:
+                    fetched.set()
+
+        pages = pagination.list_pages(fetch, page_size=2)
+        next(pages)
+        self.assertTrue(fetched.wait(10))
+
+    def test_first_page_error_raised_right_away(self):
+        list_func = MagicMock(side_effect=CloudifyClientError('not found'))
+        self.assertRaises(CloudifyClientError,
+                          pagination.list_pages, list_func)
+
+    def test_prefetch_error_raised(self):
+        pages_left = [2]
+        list_func = _make_list(5)
+
+        def fetch(*args, **kwargs):
+            if not pages_left[0]:
+                raise CloudifyClientError('failed')
+            pages_left[0] -= 1
+            return list_func(*args, **kwargs)
+
+        pages = pagination.list_pages(fetch, page_size=2)
+        next(pages)
+        next(pages)
+        self.assertRaises(CloudifyClientError, next, pages)
+
+    def test_prefetch_stopped_with_iteration(self):
+        threads = threading.active_count()
+        list_func = _make_list(20)
+        pages = pagination.list_pages(list_func, page_size=2)
+        next(pages)
+        pages.close()
+        # the page fetched last is dropped, once putting it times out
+        time.sleep(1.5)
+        self.assertEqual(threads, threading.active_count())
+        self.assertLessEqual(list_func.call_count, 3)
+
+    def test_list_command_printed_by_page(self):
+        self.use_manager()
+        self.client.deployments.list = _make_list(5)
+        outcome = self.invoke('cfy deployments list --page-size 2')
+        self.assertEqual(3, self.client.deployments.list.call_count)
+        lines = outcome.logs.splitlines()
+        for i in range(5):
+            self.assertIn('dep{0}'.format(i), outcome.logs)
+        # a single header, and the rows of all pages line up
+        self.assertEqual(1, len([line for line in lines if 'blueprint_id'
+                                 in line]))
+        self.assertEqual(1, len(set(len(line) for line in lines
+                                    if line.startswith('|'))))
+
+    def test_columns_included(self):
+        list_func = _make_list(5)
+        list(pagination.list_pages(list_func, include=['id', 'blueprint_id']))
+        self.assertEqual(['id', 'blueprint_id'],
+                         list_func.call_args[1]['_include'])
+
+    def test_server_filters(self):
+        list_func = _make_list(5)
+        self.assertEqual([['dep1', 'dep3']], self._list_ids(
+            list_func,
+            include=['id'],
+            filters={'blueprint_id': 'bp1'},
+            server_filter_fields=['blueprint_id']))
+        self.assertEqual('bp1', list_func.call_args[1]['blueprint_id'])
+        self.assertEqual(['id'], list_func.call_args[1]['_include'])
+
+    def test_local_filters(self):
+        list_func = _make_list(5)
+        self.assertEqual([[], ['dep3'], []], self._list_ids(
+            list_func,
+            page_size=2,
+            include=['id'],
+            filters={'created_by': 'user3'}))
+        # the filtered field has to be fetched
+        self.assertNotIn('_include', list_func.call_args[1])
+        self.assertNotIn('created_by', list_func.call_args[1])
+
+    def test_list_command_filters(self):
+        self.use_manager()
+        self.client.deployments.list = _make_list(5)
+        outcome = self.invoke('cfy deployments list -b bp1 '
+                              '--filter created_by=user3')
+        self.assertIn('dep3', outcome.logs)
+        self.assertNotIn('dep1', outcome.logs)
+        self.assertEqual('bp1', self.client.deployments.list.call_args[1][
+            'blueprint_id'])
+
+    def test_invalid_filter(self):
+        self.use_manager()
+        outcome = self.invoke('cfy deployments list --filter blueprint_id',
+                              err_str_segment='2',  # Exit code
+                              exception=SystemExit)
+        self.assertIn('key=value', outcome.output)
+
+    def test_non_ascii_filter(self):
+        self.use_manager()
+        deployments = _make_list(2)()
+        deployments[0]['created_by'] = u'us\xe9r'
+        self.client.deployments.list = MagicMock(return_value=deployments)
+        outcome = self.invoke('cfy deployments list '
+                              '--filter created_by=us\xc3\xa9r')
+        self.assertIn('dep0', outcome.logs)
+        self.assertNotIn('dep1', outcome.logs)
@@ -0,0 +1,230 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import socket
+import unittest
+
+import requests
+from mock import Mock, patch
+from requests.packages.urllib3.exceptions import ProtocolError
+
+from cloudify_rest_client.exceptions import (CloudifyClientError,
+                                             MaintenanceModeActiveError)
+
+from .. import env
+from .. import retry
+from .. import timings
+from .commands.test_base import CliCommandTest
+
+
+def _connection_refused():
+    return requests.exceptions.ConnectionError(ProtocolError(
+        'Connection aborted.', socket.error(111, 'Connection refused')))
+
+
+def _connection_reset():
+    return requests.exceptions.ConnectionError(ProtocolError(
+        'Connection aborted.', socket.error(104, 'Connection reset by peer')))
+
+
+class _FakeClock(object):
+    def __init__(self):
+        self.now = 1000
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        patcher = patch('cloudify_cli.retry.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        timings.reset()
+        self.addCleanup(timings.reset)
+
+    def test_max_attempts(self):
+        func = Mock(side_effect=ValueError('failed'))
+        policy = retry.RetryPolicy(max_attempts=3)
+        self.assertRaises(ValueError, policy.call, func)
+        self.assertEqual(3, func.call_count)
+        self.assertEqual(2, len(self.clock.sleeps))
+
+    def test_success_after_retries(self):
+        func = Mock(side_effect=[ValueError('failed'), ValueError('failed'),
+                                 'result'])
+        policy = retry.RetryPolicy(max_attempts=5)
+        self.assertEqual('result', policy.call(func))
+        self.assertEqual(3, func.call_count)
+
+    def test_not_retryable(self):
+        func = Mock(side_effect=ValueError('failed'))
+        policy = retry.RetryPolicy(max_attempts=5)
+        self.assertRaises(ValueError, policy.call, func,
+                          is_retryable=lambda e: False)
+        self.assertEqual(1, func.call_count)
+
+    def test_full_jitter(self):
+        policy = retry.RetryPolicy(base_delay=1, max_delay=10)
+        for attempt, cap in [(1, 1), (2, 2), (3, 4), (4, 8), (5, 10),
+                             (10, 10)]:
+            delays = [policy.get_delay(attempt) for _ in range(100)]
+            self.assertTrue(all(0 <= delay <= cap for delay in delays))
+            # the delays are random, rather than all equal to the cap
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_deadline(self):
+        policy = retry.RetryPolicy(base_delay=10, max_delay=60, deadline=100)
+        attempts = list(policy.attempts())
+        self.assertEqual(len(attempts), len(self.clock.sleeps) + 1)
+        # the last attempt is made at the deadline
+        self.assertEqual(1100, self.clock.now)
+
+    def test_deadline_shared_by_calls(self):
+        policy = retry.RetryPolicy(base_delay=10, max_delay=60, deadline=100,
+                                   start_time=self.clock.now)
+        func = Mock(side_effect=ValueError('failed'))
+        self.assertRaises(ValueError, policy.call, func)
+        calls = func.call_count
+        self.assertEqual(1100, self.clock.now)
+        # the deadline passed, so the next call isn't retried
+        self.assertRaises(ValueError, policy.call, func)
+        self.assertEqual(calls + 1, func.call_count)
+
+    def test_request_deadline_counted_from_command_start(self):
+        with patch('cloudify_cli.timings.get_start_time', return_value=123):
+            self.assertEqual(123,
+                             retry.get_request_retry_policy().start_time)
+
+    def test_budget(self):
+        budget = retry.RetryBudget(ratio=0.5, min_retries=2)
+        policy = retry.RetryPolicy(max_attempts=10, budget=budget)
+        func = Mock(side_effect=ValueError('failed'))
+        # the first call may retry twice, plus once more for the 2 calls
+        self.assertRaises(ValueError, policy.call, func)
+        self.assertRaises(ValueError, policy.call, func)
+        self.assertEqual(5, func.call_count)
+        self.assertEqual(2, budget.requests)
+        self.assertEqual(3, budget.retries)
+        self.assertEqual(2, budget.denied)
+        self.assertEqual(2, timings._counters[timings.RETRY_REQUESTS])
+        self.assertEqual(3, timings._counters[timings.RETRIES])
+        self.assertEqual(2, timings._counters[timings.RETRIES_DENIED])
+
+
+class RetryableErrorsTest(unittest.TestCase):
+
+    def _is_retryable(self, method, error):
+        return retry.is_retryable_request_error(method, error)
+
+    def test_connection_errors(self):
+        for error in [_connection_refused(), _connection_reset()]:
+            self.assertTrue(self._is_retryable('GET', error))
+        # a request which failed to connect was never handled
+        self.assertTrue(self._is_retryable('POST', _connection_refused()))
+        self.assertTrue(self._is_retryable(
+            'PUT', requests.exceptions.ConnectTimeout()))
+        self.assertFalse(self._is_retryable('POST', _connection_reset()))
+
+    def test_timeouts(self):
+        self.assertTrue(self._is_retryable(
+            'GET', requests.exceptions.ReadTimeout()))
+        self.assertFalse(self._is_retryable(
+            'DELETE', requests.exceptions.ReadTimeout()))
+
+    def test_statuses(self):
+        for status_code in [502, 503, 504]:
+            error = CloudifyClientError('unavailable',
+                                        status_code=status_code)
+            self.assertTrue(self._is_retryable('GET', error))
+            self.assertFalse(self._is_retryable('POST', error))
+        for status_code in [400, 404, 500]:
+            self.assertFalse(self._is_retryable('GET', CloudifyClientError(
+                'failed', status_code=status_code)))
+
+    def test_errors_returned_on_purpose(self):
+        error = MaintenanceModeActiveError(
+            'maintenance mode', status_code=503,
+            error_code=MaintenanceModeActiveError.ERROR_CODE)
+        self.assertFalse(self._is_retryable('GET', error))
+
+
+class RetryRequestsTest(CliCommandTest):
+
+    def setUp(self):
+        super(RetryRequestsTest, self).setUp()
+        patcher = patch('cloudify_cli.retry.time', _FakeClock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.use_manager()
+        self.rest_client = self.original_utils_get_rest_client()
+        self.session = self.rest_client._client.session = Mock()
+
+    def _response(self, status_code):
+        response = Mock(status_code=status_code, content='<html></html>')
+        if status_code < 300:
+            response.json.return_value = {}
+        else:
+            response.json.side_effect = ValueError()
+        return response
+
+    def test_unavailable_manager_retried(self):
+        self.session.get.side_effect = [_connection_reset(),
+                                        self._response(502),
+                                        self._response(200)]
+        self.rest_client.manager.get_status()
+        self.assertEqual(3, self.session.get.call_count)
+
+    def test_mutating_requests_not_resent(self):
+        self.session.post.side_effect = [_connection_reset()]
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          self.rest_client.executions.start,
+                          'dep', 'install')
+        self.assertEqual(1, self.session.post.call_count)
+
+    def test_mutating_requests_which_failed_to_connect_retried(self):
+        self.session.post.side_effect = [_connection_refused(),
+                                         self._response(201)]
+        self.rest_client.executions.start('dep', 'install')
+        self.assertEqual(2, self.session.post.call_count)
+
+    def test_gives_up(self):
+        self.session.get.side_effect = lambda *a, **kw: self._response(503)
+        self.assertRaises(CloudifyClientError,
+                          self.rest_client.manager.get_status)
+        self.assertEqual(retry.DEFAULT_REQUEST_RETRY['max_attempts'],
+                         self.session.get.call_count)
+
+    def test_version_probe_not_retried(self):
+        self.session.get.side_effect = _connection_refused()
+        self.assertIsNone(env.get_manager_version_data(
+            rest_client=self.rest_client, refresh=True))
+        self.assertEqual(1, self.session.get.call_count)
+
+    def test_not_retried_without_retry_config(self):
+        for retry_config in [{}, {'enabled': False, 'max_attempts': 4}]:
+            with patch('cloudify_cli.config.config.get_retry_config',
+                       return_value=retry_config):
+                self.assertIsNone(env._get_retry_policy())
+        with patch('cloudify_cli.config.config.get_retry_config',
+                   return_value={'enabled': True, 'max_attempts': 2}):
+            self.assertEqual(2, env._get_retry_policy().max_attempts)
@@ -0,0 +1,104 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+from itertools import islice
+
+from mock import Mock, patch
+
+from cloudify_rest_client.bytes_stream_utils import \
+    request_data_file_stream_gen
+
+from ..retry_body import RetryBody
+
+
+def _chunks(count, size=1024):
+    for i in range(count):
+        yield chr(i % 256) * size
+
+
+class RetryBodyTest(unittest.TestCase):
+
+    def test_generator_replayed(self):
+        with RetryBody(_chunks(10)) as body:
+            self.assertEqual(''.join(_chunks(10)), ''.join(body))
+            self.assertEqual(''.join(_chunks(10)), ''.join(body))
+
+    def test_replayed_after_partial_iteration(self):
+        with RetryBody(_chunks(10)) as body:
+            self.assertEqual(''.join(_chunks(3)),
+                             ''.join(islice(iter(body), 3)))
+            self.assertEqual(''.join(_chunks(10)), ''.join(body))
+
+    def test_spooled_to_file(self):
+        with patch('tempfile.TemporaryFile',
+                   side_effect=tempfile.TemporaryFile) as temporary_file:
+            with RetryBody(_chunks(10)) as body:
+                list(body)
+                list(body)
+        self.assertEqual(1, temporary_file.call_count)
+
+    def test_file_reopened(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'blueprint.tar.gz')
+        with open(path, 'wb') as f:
+            f.write(''.join(_chunks(10)))
+        progress = Mock()
+
+        with patch('tempfile.TemporaryFile') as temporary_file:
+            with RetryBody(request_data_file_stream_gen(
+                    path, 1024, progress)) as body:
+                self.assertEqual(''.join(_chunks(3)),
+                                 ''.join(islice(iter(body), 3)))
+                self.assertEqual(''.join(_chunks(10)), ''.join(body))
+        self.assertFalse(temporary_file.called)
+        # the progress is reported again by the second iteration
+        progress.assert_called_with(10 * 1024, 10 * 1024)
+
+    def test_spooled_if_file_args_unknown(self):
+        # e.g. the rest client's generator's arguments were renamed
+        def file_stream_gen(path, chunk_size, callback):
+            for chunk in _chunks(10):
+                yield chunk
+
+        with patch('cloudify_cli.retry_body._is_file_stream_gen',
+                   return_value=True):
+            with RetryBody(file_stream_gen('path', 1024, None)) as body:
+                self.assertEqual(''.join(_chunks(10)), ''.join(body))
+                self.assertEqual(''.join(_chunks(10)), ''.join(body))
+
+    def test_large_body_not_kept_in_memory(self):
+        # 64MB, sent in full twice, after the first 32MB were sent once
+        body_size = 64 * 1024 * 1024
+        expected = hashlib.md5()
+        for chunk in _chunks(1024, 64 * 1024):
+            expected.update(chunk)
+
+        with RetryBody(_chunks(1024, 64 * 1024)) as body:
+            for _ in islice(iter(body), 512):
+                pass
+            for _ in range(2):
+                received = hashlib.md5()
+                size = 0
+                for chunk in body:
+                    received.update(chunk)
+                    size += len(chunk)
+                self.assertEqual(body_size, size)
+                self.assertEqual(expected.hexdigest(), received.hexdigest())
@@ -0,0 +1,129 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import shutil
+import tempfile
+
+from mock import Mock, patch
+from click.testing import CliRunner
+
+from .. import env
+from .. import main
+from .. import timings
+from .commands.test_base import CliCommandTest
+
+
+class TimingsTest(CliCommandTest):
+
+    def setUp(self):
+        super(TimingsTest, self).setUp()
+        timings.reset()
+        self.addCleanup(timings.reset)
+
+    def test_span(self):
+        with timings.span(timings.HTTP, 'GET /blueprints') as details:
+            details['status'] = 200
+        phase, name, _, duration, _, details = timings._events[0]
+        self.assertEqual(timings.HTTP, phase)
+        self.assertEqual('GET /blueprints', name)
+        self.assertEqual({'status': 200}, details)
+        self.assertGreaterEqual(duration, 0)
+
+    def test_span_on_error(self):
+        def fail():
+            with timings.span(timings.HTTP):
+                raise ValueError()
+
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(1, len(timings._events))
+
+    def test_counters(self):
+        timings.count(timings.RETRIES)
+        timings.count(timings.RETRIES, 2)
+        self.assertRegexpMatches(timings.get_summary(), r'retries +3')
+        timings.reset()
+        self.assertNotIn('retries', timings.get_summary())
+
+    def test_summary(self):
+        timings.timed(timings.RENDER)(lambda: None)()
+        timings.timed(timings.RENDER)(lambda: None)()
+        with timings.span(timings.HTTP, 'GET /api/v3/blueprints') as details:
+            details.update(status=200, bytes=1024)
+        summary = timings.get_summary()
+        self.assertRegexpMatches(summary, r'rendering +[\d.]+ms +2x')
+        self.assertRegexpMatches(
+            summary, r'[\d.]+ms +200 +1024B GET /api/v3/blueprints')
+        self.assertNotIn(timings.SLEEP, summary)
+
+    def test_requests_are_timed(self):
+        client = env.CloudifySessionClient(host='10.10.1.10')
+        response = Mock(status_code=200, content='{"items": []}',
+                        headers={'Content-Length': '13'})
+        response.json.return_value = {'items': []}
+        get = Mock(return_value=response)
+        get.__name__ = 'get'
+        with patch('requests.get', get):
+            client.blueprints.api.get('/blueprints')
+
+        (phase, name, _, _, _, details), = timings._events
+        self.assertEqual(timings.HTTP, phase)
+        self.assertEqual('GET /api/v3/blueprints', name)
+        self.assertEqual({'status': 200, 'bytes': 13}, details)
+
+    def test_trace_option(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'trace.json')
+        with timings.span(timings.RENDER):
+            pass
+
+        result = CliRunner().invoke(
+            main._cfy, ['--timings-trace', path, 'profiles', 'list'])
+        self.assertEqual(0, result.exit_code)
+        with open(path) as f:
+            events = json.load(f)['traceEvents']
+        self.assertIn(timings.RENDER, [event['cat'] for event in events])
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+
+    def test_summary_option_from_env(self):
+        with patch.dict(os.environ, {'CFY_TIMINGS': 'true'}):
+            with patch('cloudify_cli.timings.print_summary') as print_summary:
+                CliRunner().invoke(main._cfy, ['profiles', 'list'])
+        self.assertTrue(print_summary.called)
+
+    def test_summary_printed_by_version(self):
+        with patch.dict(os.environ, {'CFY_TIMINGS': 'true'}):
+            with patch('cloudify_cli.timings.print_summary') as print_summary:
+                result = CliRunner().invoke(main._cfy, ['--version'])
+        self.assertEqual(0, result.exit_code)
+        self.assertTrue(print_summary.called)
+
+    def test_spans_kept_up_to_max(self):
+        with patch.object(timings, 'MAX_EVENTS', 5):
+            for _ in range(8):
+                with timings.span(timings.HTTP, 'GET /blueprints'):
+                    pass
+            summary = timings.get_summary()
+        self.assertEqual(5, len(timings._events))
+        # all of the spans are summarized
+        self.assertRegexpMatches(summary, r'http +[\d.]+ms +8x')
+        self.assertIn('3 more spans', summary)
+
+    def test_summary_not_printed_by_default(self):
+        with patch('cloudify_cli.timings.print_summary') as print_summary:
+            CliRunner().invoke(main._cfy, ['profiles', 'list'])
+        self.assertFalse(print_summary.called)
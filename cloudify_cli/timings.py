@@ -0,0 +1,205 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Record how long each phase of a command takes, for `cfy --timings`.
+
+The phases are always recorded, as that only costs a couple of calls to
+`time.time()` each, and some of them (e.g. the imports, or loading the
+profile) happen before the command line is parsed. They're only reported
+if `--timings` or `--timings-trace` is passed, either as a summary, or as
+a trace file which can be loaded in Chrome (`chrome://tracing`).
+
+Each span is kept (for the trace, and the list of requests in the summary)
+up to `MAX_EVENTS` spans, so that long-running commands (e.g. `cfy events
+list --tail`) don't keep growing. Only the total duration and count of
+each phase are kept after that.
+
+Note that phases may be nested (e.g. the profile is loaded while the CLI
+is imported), in which case their times overlap.
+
+This module is imported by the `cfy` executable before anything else, so
+that the time spent importing the CLI is accounted for. It must not import
+anything slow to import.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+IMPORTS = 'imports'
+PROFILE = 'profile load'
+CONFIG = 'config load'
+LOGGER = 'logger setup'
+REST_CLIENT = 'rest client'
+HTTP = 'http'
+RENDER = 'rendering'
+SLEEP = 'sleep'
+# Waiting before retrying (see `retry`)
+RETRY = 'retry'
+# Waiting for the request rate limit (see `concurrency.TokenBucket`)
+RATE_LIMIT = 'rate limit'
+
+# Counters (see `count`): the requests which may be retried, the retries,
+# and the retries the retry budget denied
+RETRY_REQUESTS = 'retryable requests'
+RETRIES = 'retries'
+RETRIES_DENIED = 'retries denied'
+
+# The order in which the phases are summarized
+PHASES = [IMPORTS, PROFILE, CONFIG, LOGGER, REST_CLIENT, HTTP, RENDER, SLEEP,
+          RETRY, RATE_LIMIT]
+
+# The number of spans kept, at most
+MAX_EVENTS = 10000
+
+_start = time.time()
+# (phase, name, start, duration, thread id, details) tuples
+_events = []
+# The number of spans which weren't kept, as there were MAX_EVENTS already
+_dropped_events = 0
+# [total duration, count] of the spans of each phase, by phase
+_totals = {}
+# The value of each counter, by its name
+_counters = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def span(phase, name=None, **details):
+    """Record the time it takes to run the body of the `with` statement.
+
+    The `details` dict is yielded, so that details only known once the
+    body is run (e.g. a response's status) can be added to it.
+    """
+    start = time.time()
+    try:
+        yield details
+    finally:
+        record(phase, start, name, **details)
+
+
+def timed(phase):
+    """Record the time each call to the decorated function takes"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(phase, func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(phase, start, name=None, **details):
+    """Record a span of `phase`, which started at `start` and ended now"""
+    global _dropped_events
+    duration = time.time() - start
+    with _lock:
+        totals = _totals.setdefault(phase, [0, 0])
+        totals[0] += duration
+        totals[1] += 1
+        if len(_events) < MAX_EVENTS:
+            _events.append((phase, name or phase, start, duration,
+                            threading.current_thread().ident, details))
+        else:
+            _dropped_events += 1
+
+
+def count(name, value=1):
+    """Add `value` to the counter `name`, reported with the phases"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def get_start_time():
+    """Return the time the current command started"""
+    return _start
+
+
+def reset():
+    """Forget everything recorded so far, and start timing anew.
+
+    Used when several commands are run by the same process (e.g. by
+    `cfy shell`, or by the daemon), so that each is timed separately.
+    """
+    global _start, _dropped_events
+    _start = time.time()
+    with _lock:
+        del _events[:]
+        _dropped_events = 0
+        _totals.clear()
+        _counters.clear()
+
+
+def get_summary():
+    """Return a summary of the recorded phases, as text"""
+    total = time.time() - _start
+    lines = ['Timings (total: {0}):'.format(_format_ms(total))]
+    for phase in PHASES:
+        if phase in _totals:
+            duration, count = _totals[phase]
+            lines.append('  {0:<14} {1:>10} {2:>6}x'.format(
+                phase, _format_ms(duration), count))
+
+    for name in sorted(_counters):
+        lines.append('  {0:<20} {1:>6}'.format(name, _counters[name]))
+
+    requests = [event for event in _events if event[0] == HTTP]
+    if requests:
+        lines.append('HTTP requests:')
+    for _, name, _, duration, _, details in requests:
+        lines.append('  {0:>10} {1:>5} {2:>10} {3}'.format(
+            _format_ms(duration),
+            details.get('status', '-'),
+            '{0}B'.format(details['bytes'])
+            if details.get('bytes') is not None else '-',
+            name))
+    if _dropped_events:
+        lines.append('({0} more spans, past the first {1}, were only '
+                     'summarized)'.format(_dropped_events, MAX_EVENTS))
+    return '\n'.join(lines)
+
+
+def print_summary(stream=None):
+    stream = stream or sys.stderr
+    stream.write(get_summary() + '\n')
+
+
+def write_trace(path):
+    """Write the recorded phases as a Chrome trace event file"""
+    pid = os.getpid()
+    events = [{
+        'name': name,
+        'cat': phase,
+        'ph': 'X',
+        'ts': _to_us(start - _start),
+        'dur': _to_us(duration),
+        'pid': pid,
+        'tid': thread_id,
+        'args': details,
+    } for phase, name, start, duration, thread_id, details in _events]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def _format_ms(seconds):
+    return '{0:.1f}ms'.format(seconds * 1000)
+
+
+def _to_us(seconds):
+    return int(seconds * 10 ** 6)
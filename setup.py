@@ -38,7 +38,7 @@ setup(
     description="Cloudify's Command Line Interface",
     entry_points={
         'console_scripts': [
-            'cfy = cloudify_cli.main:_cfy'
+            'cfy = cloudify_cli.daemon:launch'
         ]
     },
     install_requires=[